@@ -0,0 +1,184 @@
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from storage import (CUSTOMER_FILE, DATABASE_DIR, PRODUCTS_FILE, FileBackend, atomic_write, empty_lines_frame,
+                     file_signature, get_backend, parse_legacy_history, read_lines_csv)
+
+CACHE_FILE_NAME = ".analytics_cache.pkl"
+PARALLEL_THRESHOLD = 8
+
+
+def _aggregate_lines(lines):
+    """
+    Liczy częściowe agregaty sprzedaży dla jednej porcji pozycji zakupów.
+
+    Returns:
+        dict: 'products' (PRODUCT_ID -> NAME, UNITS, REVENUE), 'daily' i 'hourly'
+        (przychód w czasie) oraz 'customers' (CUSTOMER_ID -> REVENUE, UNITS, PURCHASES, FIRST, LAST).
+    """
+    lines = lines.assign(REVENUE=lines["QUANTITY"] * lines["UNIT_PRICE"])
+    products = lines.groupby("PRODUCT_ID").agg(
+        NAME=("NAME", "last"), UNITS=("QUANTITY", "sum"), REVENUE=("REVENUE", "sum")
+    )
+    daily = lines.groupby(lines["DATE"].dt.floor("D"))["REVENUE"].sum()
+    hourly = lines.groupby(lines["DATE"].dt.floor("h"))["REVENUE"].sum()
+    customers = lines.groupby("CUSTOMER_ID").agg(
+        REVENUE=("REVENUE", "sum"), UNITS=("QUANTITY", "sum"), PURCHASES=("PURCHASE_ID", "nunique"),
+        FIRST=("DATE", "min"), LAST=("DATE", "max")
+    )
+    return {'products': products, 'daily': daily, 'hourly': hourly, 'customers': customers}
+
+
+def _aggregate_file(task):
+    """Agreguje jeden plik historii; wywoływane w procesie roboczym."""
+    kind, customer_id, path = task
+    if kind == 'lines':
+        lines = read_lines_csv(path)
+    else:
+        backend = FileBackend(history_dir=os.path.dirname(path))
+        lines = parse_legacy_history(backend.read_history(customer_id), customer_id)
+    return _aggregate_lines(lines)
+
+
+def _combine(partials):
+    """Łączy częściowe agregaty w wyniki dla całej historii."""
+    partials = [p for p in partials if not p['products'].empty]
+    if not partials:
+        return _aggregate_lines(empty_lines_frame())
+    products = pd.concat([p['products'] for p in partials]).groupby(level=0).agg(
+        NAME=("NAME", "last"), UNITS=("UNITS", "sum"), REVENUE=("REVENUE", "sum")
+    )
+    daily = pd.concat([p['daily'] for p in partials]).groupby(level=0).sum().sort_index()
+    hourly = pd.concat([p['hourly'] for p in partials]).groupby(level=0).sum().sort_index()
+    customers = pd.concat([p['customers'] for p in partials]).groupby(level=0).agg(
+        REVENUE=("REVENUE", "sum"), UNITS=("UNITS", "sum"), PURCHASES=("PURCHASES", "sum"),
+        FIRST=("FIRST", "min"), LAST=("LAST", "max")
+    )
+    return {'products': products, 'daily': daily, 'hourly': hourly, 'customers': customers}
+
+
+class SalesAnalytics:
+    """
+    Analiza sprzedaży na podstawie historii zakupów.
+
+    Dla backendu plikowego każdy plik historii klienta jest agregowany osobno
+    (równolegle w puli procesów), a wyniki częściowe są zapisywane w pamięci
+    podręcznej razem ze znacznikiem pliku. Kolejne odświeżenie przelicza tylko
+    pliki zmienione od poprzedniego przebiegu. Dla bazy SQLite pozycje są
+    wczytywane jednym zapytaniem.
+    """
+
+    def __init__(self, backend=None, cache_file=None, max_workers=None):
+        self.backend = backend or get_backend(PRODUCTS_FILE, CUSTOMER_FILE, DATABASE_DIR)
+        self.max_workers = max_workers
+        if cache_file is None and isinstance(self.backend, FileBackend):
+            cache_file = os.path.join(self.backend.history_dir, CACHE_FILE_NAME)
+        self.cache_file = cache_file
+        self._partials = None
+        self._result = None
+        self._lock = threading.Lock()
+
+    def _sources(self):
+        """Zwraca pliki do analizy: klient -> (rodzaj, ścieżka), z preferencją plików pozycji."""
+        backend = self.backend
+        sources = {cid: ('legacy', backend.history_file(cid)) for cid in backend.history_customers()}
+        for cid in backend.purchase_line_customers():
+            sources[cid] = ('lines', backend.lines_file(cid))
+        return sources
+
+    def _load_cache(self):
+        if self._partials is not None:
+            return self._partials
+        try:
+            with open(self.cache_file, 'rb') as f:
+                self._partials = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError, TypeError):
+            self._partials = {}
+        return self._partials
+
+    def _save_cache(self):
+        with atomic_write(self.cache_file) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(self._partials, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def refresh(self):
+        """
+        Przelicza agregaty dla plików zmienionych od ostatniego przebiegu.
+
+        Returns:
+            int: Liczba przeliczonych plików (dla bazy SQLite zawsze 0).
+        """
+        with self._lock:
+            if not isinstance(self.backend, FileBackend):
+                self._result = _aggregate_lines(self.backend.load_purchase_lines())
+                return 0
+
+            partials = self._load_cache()
+            sources = self._sources()
+            stale = []
+            for cid, (kind, path) in sources.items():
+                signature = (kind, file_signature(path))
+                cached = partials.get(cid)
+                if cached is None or cached[0] != signature:
+                    stale.append((cid, signature, (kind, cid, path)))
+            removed = [cid for cid in partials if cid not in sources]
+
+            if stale:
+                tasks = [task for _, _, task in stale]
+                if len(tasks) >= PARALLEL_THRESHOLD:
+                    with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                        results = list(pool.map(_aggregate_file, tasks, chunksize=max(1, len(tasks) // 32)))
+                else:
+                    results = [_aggregate_file(task) for task in tasks]
+                for (cid, signature, _), result in zip(stale, results):
+                    partials[cid] = (signature, result)
+            for cid in removed:
+                del partials[cid]
+
+            if stale or removed or self._result is None:
+                self._result = _combine([partial for _, partial in partials.values()])
+            if (stale or removed) and self.cache_file:
+                self._save_cache()
+            return len(stale)
+
+    def _current(self):
+        self.refresh()
+        return self._result
+
+    def top_products(self, n=10, by='units'):
+        """
+        Zwraca n najlepiej sprzedających się produktów.
+
+        Args:
+            by (str): 'units' (sprzedane sztuki) lub 'revenue' (przychód).
+        """
+        column = {'units': 'UNITS', 'revenue': 'REVENUE'}[by]
+        return self._current()['products'].sort_values(column, ascending=False).head(n)
+
+    def revenue_by_day(self):
+        """Zwraca przychód dzienny jako Series indeksowaną datą."""
+        return self._current()['daily']
+
+    def revenue_by_hour(self):
+        """Zwraca przychód godzinowy jako Series indeksowaną pełną godziną."""
+        return self._current()['hourly']
+
+    def customer_lifetime_value(self):
+        """Zwraca dla każdego klienta łączny przychód, liczbę sztuk i zakupów oraz daty pierwszego i ostatniego zakupu."""
+        return self._current()['customers'].sort_values('REVENUE', ascending=False)
+
+
+_analytics = None
+
+
+def get_analytics():
+    """Zwraca współdzieloną instancję SalesAnalytics dla bieżącego backendu."""
+    global _analytics
+    backend = get_backend(PRODUCTS_FILE, CUSTOMER_FILE, DATABASE_DIR)
+    if _analytics is None or _analytics.backend is not backend:
+        _analytics = SalesAnalytics(backend)
+    return _analytics
@@ -0,0 +1,8 @@
+"""
+Benchmarki operacji aplikacji na syntetycznych danych.
+
+Uruchamianie z katalogu głównego projektu: python -m benchmarks.run --sizes 1000,10000
+
+Moduły importuje się bezpośrednio (benchmarks.datagen, benchmarks.run), żeby
+import generatora danych nie wczytywał całej aplikacji.
+"""
@@ -0,0 +1,111 @@
+import csv
+import datetime
+import os
+import random
+
+import numpy as np
+import pandas as pd
+
+from storage import CUSTOMER_FIELDS, HISTORY_FIELDS, LINE_FIELDS, PRODUCT_COLUMNS
+
+FIRST_CUSTOMER_ID = 201
+NAMES = ["Jan", "Anna", "Piotr", "Katarzyna", "Marek", "Zofia", "Tomasz", "Agnieszka", "Paweł", "Ewa"]
+PRODUCT_WORDS = ["Chleb", "Mleko", "Masło", "Ser", "Jogurt", "Kawa", "Herbata", "Sok", "Woda", "Baton",
+                 "Piwo", "Chipsy", "Jabłko", "Banan", "Hot-dog", "Kanapka", "Sałatka", "Czekolada"]
+
+
+def customer_email(customer_id):
+    """Zwraca e-mail wygenerowanego klienta o danym ID."""
+    return f"klient{customer_id}@example.com"
+
+
+def generate_products(path, count, seed=0):
+    """Zapisuje count losowych produktów (ID 1..count) do pliku xlsx."""
+    rng = np.random.default_rng(seed)
+    words = np.array(PRODUCT_WORDS)
+    ids = np.arange(1, count + 1)
+    names = pd.Series(words[rng.integers(0, len(words), count)]) + " " + pd.Series(ids).astype(str)
+    df = pd.DataFrame({
+        'id': ids,
+        'name': names,
+        'price': np.round(rng.uniform(0.99, 99.99, count), 2),
+        'stock': rng.integers(0, 500, count),
+    }, columns=PRODUCT_COLUMNS)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    df.to_excel(path, index=False, engine='openpyxl')
+    return df
+
+
+def generate_customers(path, count, seed=0):
+    """Zapisuje count klientów (ID od FIRST_CUSTOMER_ID) do pliku csv."""
+    rng = random.Random(seed)
+    today = datetime.date.today().isoformat()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CUSTOMER_FIELDS)
+        for customer_id in range(FIRST_CUSTOMER_ID, FIRST_CUSTOMER_ID + count):
+            writer.writerow([customer_id, f"{rng.choice(NAMES)} {customer_id}", customer_email(customer_id),
+                             f"{rng.randint(500000000, 799999999)}", today, today])
+
+
+def generate_history(history_dir, products, customer_ids, purchases_per_customer=20, seed=0):
+    """
+    Zapisuje historię zakupów (<ID>_history.csv i <ID>_lines.csv) dla podanych klientów.
+
+    Args:
+        products (pd.DataFrame): Produkty, z których losowane są pozycje zakupów.
+
+    Returns:
+        int: Liczba zapisanych pozycji zakupów.
+    """
+    rng = random.Random(seed)
+    os.makedirs(history_dir, exist_ok=True)
+    catalog = list(products[['id', 'name', 'price']].itertuples(index=False, name=None))
+    start = datetime.datetime.now() - datetime.timedelta(days=365)
+    written = 0
+    for customer_id in customer_ids:
+        history_path = os.path.join(history_dir, f"{customer_id}_history.csv")
+        lines_path = os.path.join(history_dir, f"{customer_id}_lines.csv")
+        with open(history_path, 'w', newline='', encoding='utf-8') as hf, \
+                open(lines_path, 'w', newline='', encoding='utf-8') as lf:
+            history = csv.writer(hf)
+            lines = csv.writer(lf)
+            history.writerow(HISTORY_FIELDS)
+            lines.writerow(LINE_FIELDS)
+            when = start
+            for n in range(purchases_per_customer):
+                when += datetime.timedelta(minutes=rng.randint(60, 60 * 24 * 30))
+                date = when.isoformat(sep=' ', timespec='seconds')
+                items = rng.sample(catalog, min(len(catalog), rng.randint(1, 3)))
+                details, total = [], 0.0
+                for product_id, name, price in items:
+                    quantity = rng.randint(1, 4)
+                    total += price * quantity
+                    details.append(f"{name} (ID: {product_id}, Ilość: {quantity}, Cena: {price:.2f})")
+                    lines.writerow([f"gen-{customer_id}-{n}", date, customer_id, product_id, name, quantity, price])
+                    written += 1
+                history.writerow([date, "; ".join(details), f"{total:.2f}"])
+    return written
+
+
+def generate_dataset(root, products=1000, customers=1000, history_customers=None, purchases_per_customer=20, seed=0):
+    """
+    Tworzy w katalogu root układ danych aplikacji: database/products.xlsx,
+    database/customer.csv i database/DATABASE z historią zakupów.
+
+    Args:
+        history_customers (int): Liczba klientów z historią; domyślnie min(customers, 100).
+
+    Returns:
+        dict: Liczba wygenerowanych produktów, klientów i pozycji zakupów.
+    """
+    if history_customers is None:
+        history_customers = min(customers, 100)
+    database = os.path.join(root, "database")
+    product_df = generate_products(os.path.join(database, "products.xlsx"), products, seed)
+    generate_customers(os.path.join(database, "customer.csv"), customers, seed)
+    customer_ids = range(FIRST_CUSTOMER_ID, FIRST_CUSTOMER_ID + history_customers)
+    lines = generate_history(os.path.join(database, "DATABASE"), product_df, customer_ids,
+                             purchases_per_customer, seed) if products else 0
+    return {'products': products, 'customers': customers, 'lines': lines}
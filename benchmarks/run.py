@@ -0,0 +1,222 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import history
+import product_management
+import projekt_customers
+import storage
+from benchmarks.datagen import FIRST_CUSTOMER_ID, customer_email, generate_dataset
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+BACKENDS = ('file', 'sqlite')
+REGRESSION_THRESHOLD = 1.2
+MIN_REGRESSION_MS = 1.0
+
+
+@contextlib.contextmanager
+def _environment(root, backend):
+    """Przełącza katalog roboczy na root i wybiera backend; czyści współdzielone pamięci podręczne."""
+    cwd = os.getcwd()
+    saved_env = {key: os.environ.get(key) for key in ("FROG_STORAGE", "FROG_DB")}
+    os.chdir(root)
+    if backend == 'sqlite':
+        os.environ["FROG_STORAGE"] = "sqlite"
+        os.environ["FROG_DB"] = storage.SQLITE_FILE
+    else:
+        os.environ.pop("FROG_STORAGE", None)
+    _reset_caches()
+    try:
+        yield
+    finally:
+        _reset_caches()
+        os.chdir(cwd)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _reset_caches():
+    for backend in list(storage._backends.values()):
+        close = getattr(backend, 'close', None)
+        if close is not None:
+            close()
+    storage._backends.clear()
+    product_management._stores.clear()
+    projekt_customers._invalidate_customer_index()
+
+
+def _time(func, repeat):
+    """Wywołuje func repeat razy (z indeksem powtórzenia) i zwraca czasy w sekundach."""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(repeat):
+            started = time.perf_counter()
+            func(i)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _operations(size, customers, seed):
+    """Zwraca listę (nazwa, funkcja) mierzonych operacji dla zbioru danych o danym rozmiarze."""
+    rng = random.Random(seed)
+    products_file = storage.PRODUCTS_FILE
+    store = lambda: product_management.get_store(products_file)
+    new_ids = [size + 1 + i for i in range(10000)]
+    user = {'ID': str(FIRST_CUSTOMER_ID), 'NAME': 'Benchmark'}
+
+    def cold_login(_):
+        projekt_customers._invalidate_customer_index()
+        projekt_customers.login(customer_email(FIRST_CUSTOMER_ID + rng.randrange(customers)))
+
+    def in_stock_id():
+        while True:
+            product_id = rng.randint(1, size)
+            product = store().get(product_id)
+            if product is not None and product['stock'] > 0:
+                return product_id
+
+    def purchase(_):
+        projekt_customers.purchase_products([(in_stock_id(), 1) for _ in range(3)], user)
+
+    return [
+        ('load_products', lambda i: store().load(force=True)),
+        ('get_product_stats', lambda i: product_management.get_product_stats(products_file)),
+        ('check_product_availability',
+         lambda i: product_management.check_product_availability(products_file, rng.randint(1, size), 1)),
+        ('add_product', lambda i: product_management.add_product(
+            products_file, {'id': new_ids[i], 'name': f"Benchmark {i}", 'price': 9.99, 'stock': 10})),
+        ('remove_product', lambda i: product_management.remove_product(products_file, new_ids[i])),
+        ('update_product_stock',
+         lambda i: product_management.update_product_stock(products_file, rng.randint(1, size), 1)),
+        ('login_cold', cold_login),
+        ('login', lambda i: projekt_customers.login(customer_email(FIRST_CUSTOMER_ID + rng.randrange(customers)))),
+        ('register_customer', lambda i: projekt_customers.register_customer(
+            f"Nowy {i}", f"nowy{i}.{seed}@example.com", "500000000")),
+        ('purchase_products', purchase),
+        ('history_page', lambda i: history.read_history_page(FIRST_CUSTOMER_ID)),
+    ]
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, backends=BACKENDS, repeat=5, customers=None, seed=0, verbose=True):
+    """
+    Generuje dane dla każdego rozmiaru i mierzy operacje na każdym backendzie.
+
+    Args:
+        sizes: Liczby produktów (i klientów, jeśli customers nie podano).
+        backends: 'file' (xlsx/csv) i/lub 'sqlite' (dane zaimportowane migrate_to_sqlite).
+        repeat (int): Liczba powtórzeń każdej operacji.
+
+    Returns:
+        list: Słowniki z polami size, backend, operation, median_ms, min_ms, max_ms, repeat.
+    """
+    results = []
+    for size in sizes:
+        customer_count = customers or size
+        with tempfile.TemporaryDirectory(prefix="frog-bench-") as root:
+            started = time.perf_counter()
+            generate_dataset(root, products=size, customers=customer_count, seed=seed)
+            if verbose:
+                print(f"Wygenerowano dane dla rozmiaru {size} w {time.perf_counter() - started:.1f} s", file=sys.stderr)
+            if 'sqlite' in backends:
+                with _environment(root, 'file'), contextlib.redirect_stdout(io.StringIO()):
+                    storage.migrate_to_sqlite()
+            for backend in backends:
+                with _environment(root, backend):
+                    for name, func in _operations(size, customer_count, seed):
+                        timings = _time(func, repeat)
+                        results.append({
+                            'size': size, 'backend': backend, 'operation': name, 'repeat': repeat,
+                            'median_ms': statistics.median(timings) * 1000,
+                            'min_ms': min(timings) * 1000, 'max_ms': max(timings) * 1000,
+                        })
+                        if verbose:
+                            print(f"  {backend:<6} {size:>8} {name:<28} {results[-1]['median_ms']:10.2f} ms",
+                                  file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD, min_delta_ms=MIN_REGRESSION_MS):
+    """
+    Porównuje wyniki z wcześniejszym przebiegiem.
+
+    Różnice mniejsze niż min_delta_ms są pomijane jako szum pomiaru.
+
+    Returns:
+        list: (size, backend, operation, baseline_ms, current_ms) dla operacji wolniejszych niż threshold razy.
+    """
+    previous = {(r['size'], r['backend'], r['operation']): r['median_ms'] for r in baseline}
+    regressions = []
+    for r in results:
+        before = previous.get((r['size'], r['backend'], r['operation']))
+        if before and r['median_ms'] > before * threshold and r['median_ms'] - before >= min_delta_ms:
+            regressions.append((r['size'], r['backend'], r['operation'], before, r['median_ms']))
+    return regressions
+
+
+def format_results(results):
+    """Formatuje wyniki jako tabelę: operacja x rozmiar, z kolumną na backend i przyspieszeniem sqlite/file."""
+    table = {}
+    backends = []
+    for r in results:
+        table.setdefault((r['operation'], r['size']), {})[r['backend']] = r['median_ms']
+        if r['backend'] not in backends:
+            backends.append(r['backend'])
+    header = f"{'Operacja':<28} {'Rozmiar':>9}" + "".join(f" {b + ' ms':>12}" for b in backends)
+    if set(BACKENDS) <= set(backends):
+        header += f" {'file/sqlite':>12}"
+    lines = [header, "-" * len(header)]
+    for (operation, size), values in table.items():
+        line = f"{operation:<28} {size:>9}" + "".join(
+            f" {values[b]:>12.2f}" if b in values else f" {'-':>12}" for b in backends)
+        if set(BACKENDS) <= set(backends) and values.get('sqlite'):
+            line += f" {values['file'] / values['sqlite']:>11.1f}x"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark operacji na produktach, klientach i historii zakupów.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Rozmiary katalogu oddzielone przecinkami (np. 1000,10000,1000000).")
+    parser.add_argument("--customers", type=int, default=None, help="Liczba klientów (domyślnie równa rozmiarowi).")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Zapisuje wyniki do pliku JSON.")
+    parser.add_argument("--baseline", help="Plik JSON z wcześniejszego przebiegu do wykrywania regresji.")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    backends = [b for b in args.backends.split(",") if b]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"Nieznany backend: {', '.join(sorted(unknown))}")
+    results = run_benchmarks(sizes, backends, args.repeat, args.customers, args.seed)
+    print(format_results(results))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for size, backend, operation, before, after in regressions:
+            print(f"Regresja: {operation} ({backend}, {size}): {before:.2f} ms -> {after:.2f} ms")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+from product_management import get_store
+from storage import PRODUCTS_FILE
+from utils import apply_discount, normalize_id
+
+
+class Cart:
+    """
+    Koszyk zakupów z ilościami zsumowanymi po ID produktu.
+
+    Przy pierwszym dodaniu produktu jego dane (nazwa, cena) są pobierane
+    z katalogu po ID w O(1) i zapamiętywane, więc wyświetlenie koszyka nie
+    zależy od wielkości katalogu; refresh() pobiera aktualne ceny (promotions.price_cart
+    robi to na kopii z copy(), nie zmieniając koszyka). Sumy są aktualizowane przyrostowo przy
+    każdej zmianie. Rabaty (utils.apply_discount) mogą dotyczyć pojedynczego
+    produktu albo całego koszyka; oba są wliczane w cenę jednostkową pozycji,
+    więc suma pozycji zawsze równa się sumie koszyka.
+    """
+
+    def __init__(self, lookup=None):
+        """
+        Args:
+            lookup (callable): ID -> słownik produktu lub None; domyślnie katalog products.xlsx.
+        """
+        self._lookup = lookup or (lambda product_id: get_store(PRODUCTS_FILE).get(product_id))
+        self._quantities = {}
+        self._products = {}
+        self._line_totals = {}
+        self._line_discounts = {}
+        self._discount_rate = 0.0
+        self._subtotal = 0.0
+        self._lines_total = 0.0
+
+    def __len__(self):
+        return len(self._quantities)
+
+    def __bool__(self):
+        return bool(self._quantities)
+
+    def __iter__(self):
+        """Zwraca pary (ID, ilość), jak dotychczasowa lista koszyka."""
+        return iter(list(self._quantities.items()))
+
+    def __contains__(self, product_id):
+        return normalize_id(product_id) in self._quantities
+
+    def quantity(self, product_id):
+        return self._quantities.get(normalize_id(product_id), 0)
+
+    def items(self):
+        """Zwraca listę par (ID, ilość)."""
+        return list(self._quantities.items())
+
+    def unit_price(self, product_id, base_price):
+        """Zwraca cenę jednostkową po rabacie produktu i rabacie koszyka."""
+        price = apply_discount(float(base_price), self._line_discounts.get(normalize_id(product_id), 0.0))
+        return apply_discount(price, self._discount_rate)
+
+    def _update_line(self, product_id):
+        product = self._products[product_id]
+        quantity = self._quantities.get(product_id, 0)
+        price = float(product['price'])
+        old_base, old_total = self._line_totals.pop(product_id, (0.0, 0.0))
+        self._subtotal -= old_base
+        self._lines_total -= old_total
+        if quantity:
+            base = price * quantity
+            total = self.unit_price(product_id, price) * quantity
+            self._line_totals[product_id] = (base, total)
+            self._subtotal += base
+            self._lines_total += total
+        elif not self._line_totals:
+            self._subtotal = self._lines_total = 0.0
+
+    def add(self, product_id, quantity=1, product=None):
+        """
+        Dodaje produkt do koszyka (ilości tego samego produktu są sumowane).
+
+        Args:
+            product (dict): Dane produktu, jeśli są już znane (np. z wyników wyszukiwania);
+                wtedy katalog nie jest odpytywany.
+
+        Raises:
+            KeyError: Gdy produkt nie istnieje.
+            ValueError: Gdy ilość nie jest dodatnia.
+        """
+        if quantity <= 0:
+            raise ValueError("Ilość musi być dodatnia.")
+        product_id = normalize_id(product_id)
+        if product_id not in self._products:
+            if product is None:
+                product = self._lookup(product_id)
+            if product is None:
+                raise KeyError(f"Produkt o ID {product_id} nie istnieje.")
+            self._products[product_id] = product
+        self._quantities[product_id] = self._quantities.get(product_id, 0) + quantity
+        self._update_line(product_id)
+
+    def remove(self, product_id, quantity=None):
+        """Usuwa produkt z koszyka albo zmniejsza jego ilość o quantity."""
+        product_id = normalize_id(product_id)
+        if product_id not in self._quantities:
+            return
+        remaining = 0 if quantity is None else self._quantities[product_id] - quantity
+        if remaining > 0:
+            self._quantities[product_id] = remaining
+        else:
+            del self._quantities[product_id]
+            self._line_discounts.pop(product_id, None)
+        self._update_line(product_id)
+        if product_id not in self._quantities:
+            del self._products[product_id]
+
+    def set_quantity(self, product_id, quantity):
+        """Ustawia ilość produktu; 0 usuwa go z koszyka."""
+        product_id = normalize_id(product_id)
+        current = self._quantities.get(product_id, 0)
+        if quantity > current:
+            self.add(product_id, quantity - current)
+        elif quantity < current:
+            self.remove(product_id, current - quantity)
+
+    def copy(self):
+        """
+        Zwraca niezależną kopię koszyka (dane produktów są współdzielone, bo nie są modyfikowane).
+
+        Kopię można przekazać do innego wątku, podczas gdy oryginał jest dalej zmieniany.
+        """
+        other = Cart(lookup=self._lookup)
+        other._quantities = dict(self._quantities)
+        other._products = dict(self._products)
+        other._line_totals = dict(self._line_totals)
+        other._line_discounts = dict(self._line_discounts)
+        other._discount_rate = self._discount_rate
+        other._subtotal = self._subtotal
+        other._lines_total = self._lines_total
+        return other
+
+    def clear(self):
+        self._quantities.clear()
+        self._products.clear()
+        self._line_totals.clear()
+        self._line_discounts.clear()
+        self._subtotal = 0.0
+        self._lines_total = 0.0
+
+    def apply_discount(self, rate, product_id=None):
+        """
+        Ustawia rabat (np. 0.1 = 10%) dla produktu albo, gdy product_id jest None, dla całego koszyka.
+
+        Raises:
+            ValueError: Gdy rabat jest spoza zakresu 0-1.
+            KeyError: Gdy produktu nie ma w koszyku.
+        """
+        if not 0 <= rate <= 1:
+            raise ValueError("Rabat musi być z zakresu 0-1.")
+        if product_id is None:
+            self._discount_rate = rate
+            for pid in self._quantities:
+                self._update_line(pid)
+            return
+        product_id = normalize_id(product_id)
+        if product_id not in self._quantities:
+            raise KeyError(f"Produktu o ID {product_id} nie ma w koszyku.")
+        self._line_discounts[product_id] = rate
+        self._update_line(product_id)
+
+    def refresh(self):
+        """Pobiera aktualne dane produktów z katalogu i przelicza sumy (np. po zmianie cen)."""
+        for product_id in list(self._quantities):
+            product = self._lookup(product_id)
+            if product is None:
+                self.remove(product_id)
+                continue
+            self._products[product_id] = product
+            self._update_line(product_id)
+
+    def lines(self):
+        """
+        Zwraca pozycje koszyka.
+
+        Returns:
+            list: Słowniki z kluczami id, name, quantity, unit_price (po rabatach), base_price, total.
+        """
+        lines = []
+        for product_id, quantity in self._quantities.items():
+            product = self._products[product_id]
+            base, total = self._line_totals[product_id]
+            lines.append({
+                'id': product_id,
+                'name': product['name'],
+                'quantity': quantity,
+                'base_price': float(product['price']),
+                'unit_price': total / quantity,
+                'total': total,
+            })
+        return lines
+
+    def priced(self, promotions, customer_id=None):
+        """
+        Wycenia koszyk regułami promocji (promotions.PromotionEngine).
+
+        Ceną wyjściową jest cena jednostkowa po rabatach ustawionych w koszyku.
+
+        Returns:
+            dict: Wynik PromotionEngine.evaluate; pozycje zawierają też nazwę produktu.
+        """
+        products = dict(self._products)
+        result = promotions.evaluate(self.items(),
+                                     lambda product_id: self.unit_price(product_id, products[product_id]['price']),
+                                     customer_id)
+        for line in result['lines']:
+            line['name'] = products[line['id']]['name']
+        return result
+
+    @property
+    def subtotal(self):
+        """Suma przed rabatami."""
+        return self._subtotal
+
+    @property
+    def total(self):
+        """Suma po rabatach."""
+        return self._lines_total
+
+    @property
+    def discount(self):
+        """Łączna kwota rabatów."""
+        return self.subtotal - self.total
@@ -0,0 +1,435 @@
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+CATALOG_COLUMNS = ('id', 'name', 'price', 'stock')
+COLUMN_DTYPES = {'id': np.int64, 'price': np.float64, 'stock': np.int64}
+INDEX_PENDING = 1024
+ITER_CHUNK = 10000
+NAME_SEPARATOR = '\x00'
+
+
+@dataclass
+class Product:
+    """
+    Jeden produkt katalogu.
+
+    Pola można też czytać jak klucze słownika (product['stock'], dict(product)),
+    więc Product można przekazać wszędzie tam, gdzie dotąd trafiał słownik produktu.
+    """
+
+    __slots__ = CATALOG_COLUMNS
+    id: object
+    name: str
+    price: float
+    stock: int
+
+    def keys(self):
+        return CATALOG_COLUMNS
+
+    def __getitem__(self, key):
+        if key not in CATALOG_COLUMNS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {column: getattr(self, column) for column in CATALOG_COLUMNS}
+
+
+def _fits(kind, value):
+    """Czy wartość można zapisać w kolumnie NumPy danego rodzaju bez zmiany jej znaczenia."""
+    if isinstance(value, (bool, np.bool_)):
+        return kind == 'O'
+    if kind == 'i':
+        return isinstance(value, (int, np.integer))
+    if kind == 'f':
+        return isinstance(value, (int, float, np.integer, np.floating))
+    return True
+
+
+def _column(values, dtype):
+    """Zwraca kolumnę typu dtype albo tablicę obiektów, gdy któraś wartość do tego typu nie pasuje."""
+    array = np.asarray(values)
+    target = np.dtype(dtype)
+    if array.dtype.kind in 'iu' or (array.dtype.kind == 'f' and target.kind == 'f'):
+        return array.astype(target)
+    if array.dtype.kind == 'O' and all(_fits(target.kind, value) for value in array):
+        try:
+            return array.astype(target)
+        except OverflowError:
+            pass
+    return array.astype(object)
+
+
+class _NameTable:
+    """
+    Tabela nazw: kod nazwy to jej numer w tabeli.
+
+    Wszystkie nazwy są zapisane w jednym buforze UTF-8 (rozdzielone znakiem
+    NUL) z tablicą przesunięć, więc milion nazw nie oznacza miliona obiektów
+    str; napis powstaje dopiero przy odczycie. Nazwy dopisane później trafiają
+    na krótką listę, a wartości niebędące zwykłym tekstem (np. NaN z pustej
+    komórki) są pamiętane osobno.
+    """
+
+    def __init__(self, names=()):
+        self._other = {}
+        encoded = []
+        for code, name in enumerate(names):
+            if isinstance(name, str) and NAME_SEPARATOR not in name:
+                encoded.append(name.encode('utf-8'))
+            else:
+                self._other[code] = name
+                encoded.append(b'')
+        self._data = NAME_SEPARATOR.encode().join(encoded)
+        # Nazwa k zajmuje bajty _starts[k]:_starts[k + 1] - 1 (ostatni bajt to separator).
+        self._starts = np.zeros(len(encoded) + 1, np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), np.int64, len(encoded)) + 1, out=self._starts[1:])
+        self._tail = []
+        self._index = None
+
+    @classmethod
+    def from_buffers(cls, data, starts, other=()):
+        """Odtwarza tabelę z bufora nazw, tablicy przesunięć i par (kod, wartość) spoza bufora (zob. buffers())."""
+        table = cls()
+        table._data = data
+        table._starts = starts
+        table._other = {code: name for code, name in other}
+        return table
+
+    def buffers(self):
+        """Zwraca (bufor nazw, tablica przesunięć, pary (kod, wartość) spoza bufora); nazwy dopisane później są włączane do bufora."""
+        table = self if not self._tail else _NameTable(self[code] for code in range(len(self)))
+        return table._data, table._starts, [[code, name] for code, name in table._other.items()]
+
+    def __len__(self):
+        return len(self._starts) - 1 + len(self._tail)
+
+    def __getitem__(self, code):
+        base = len(self._starts) - 1
+        if code >= base:
+            return self._tail[code - base]
+        if self._other and code in self._other:
+            return self._other[code]
+        return self._data[self._starts[code]:self._starts[code + 1] - 1].decode('utf-8')
+
+    def lookup(self, codes):
+        """Zwraca nazwy dla tablicy kodów jako tablicę obiektów."""
+        base = len(self._starts) - 1
+        if base and len(codes) * 8 >= base:
+            # Dużo kodów: jeden podział całego bufora jest szybszy niż odczyt nazw po kolei.
+            table = np.empty(len(self), dtype=object)
+            table[:base] = self._data.decode('utf-8').split(NAME_SEPARATOR)
+            table[base:] = self._tail
+            for code, name in self._other.items():
+                table[code] = name
+            return table[codes]
+        names = np.empty(len(codes), dtype=object)
+        inside = codes < base
+        own = codes[inside]
+        data = self._data
+        names[inside] = [data[start:end].decode('utf-8') for start, end in
+                         zip(self._starts[own].tolist(), (self._starts[own + 1] - 1).tolist())]
+        names[~inside] = [self._tail[code - base] for code in codes[~inside].tolist()]
+        if self._other:
+            special = np.isin(codes, list(self._other))
+            names[special] = [self._other[code] for code in codes[special].tolist()]
+        return names
+
+    def code(self, name):
+        """Zwraca kod nazwy, dopisując ją do tabeli, jeśli jeszcze jej nie ma."""
+        if self._index is None:
+            self._index = {self[code]: code for code in range(len(self))}
+        code = self._index.get(name)
+        if code is None:
+            code = self._index[name] = len(self)
+            self._tail.append(name)
+        return code
+
+    def nbytes(self):
+        return (len(self._data) + self._starts.nbytes + sys.getsizeof(self._tail)
+                + sum(sys.getsizeof(name) for name in self._tail))
+
+
+class ProductCatalog:
+    """
+    Katalog produktów w kolumnach NumPy (id, cena, stan) z tabelą nazw.
+
+    Zamiast osobnego słownika na każdy produkt każda kolumna jest jedną
+    tablicą, a nazwy są zapisane raz w tabeli nazw (jeden bufor UTF-8)
+    i wskazywane kodem int32.
+    Kolumna, do której trafi wartość innego typu (np. tekstowe ID albo pusty
+    stan), jest przechowywana jako tablica obiektów. Produkt o danym ID jest
+    znajdowany w posortowanej kopii kolumny id (searchsorted); produkty
+    dopisane po jej zbudowaniu trafiają do małego słownika, dopóki nie
+    będzie ich wiele. Kolejność wierszy odpowiada kolejności w pliku.
+
+    Odczyt pojedynczego produktu zwraca obiekt Product, column() daje widoki
+    kolumn bez kopiowania, a mask()/filter() filtrują katalog wektorowo.
+    """
+
+    def __init__(self):
+        self._columns = {column: np.empty(0, dtype) for column, dtype in COLUMN_DTYPES.items()}
+        self._codes = np.empty(0, np.int32)
+        self._names = _NameTable()
+        self._size = 0
+        self._index = None
+        self._pending = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Buduje katalog z DataFrame z kolumnami id, name, price, stock (ID muszą być unikalne)."""
+        import pandas as pd
+        catalog = cls()
+        for column, dtype in COLUMN_DTYPES.items():
+            catalog._columns[column] = _column(df[column].to_numpy(), dtype)
+        codes, names = pd.factorize(df['name'].to_numpy(dtype=object), use_na_sentinel=False)
+        catalog._codes = codes.astype(np.int32)
+        catalog._names = _NameTable(names)
+        catalog._size = len(df)
+        return catalog
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        """
+        Odtwarza katalog z tablic zwróconych przez to_arrays().
+
+        Tablice nie są kopiowane, więc mogą być widokami na plik zmapowany w pamięci.
+        """
+        catalog = cls()
+        for column in COLUMN_DTYPES:
+            catalog._columns[column] = arrays[column]
+        catalog._codes = arrays['codes']
+        catalog._names = _NameTable.from_buffers(arrays['name_data'].tobytes(), arrays['name_starts'], meta['other'])
+        catalog._size = len(catalog._codes)
+        return catalog
+
+    def to_arrays(self):
+        """
+        Zwraca katalog jako tablice NumPy i metadane do zapisania w migawce.
+
+        Returns:
+            tuple: (nazwa -> tablica, metadane) albo None, gdy któraś kolumna przechowuje obiekty Pythona.
+        """
+        arrays = {column: array[:self._size] for column, array in self._columns.items()}
+        if any(array.dtype == object for array in arrays.values()):
+            return None
+        data, starts, other = self._names.buffers()
+        arrays.update(codes=self._codes[:self._size], name_data=np.frombuffer(data, np.uint8), name_starts=starts)
+        return arrays, {'other': other}
+
+    def copy(self):
+        """Zwraca niezależną kopię katalogu (np. do wycofania nieudanego zapisu)."""
+        other = ProductCatalog()
+        other._columns = {column: array[:self._size].copy() for column, array in self._columns.items()}
+        other._codes = self._codes[:self._size].copy()
+        # Tabela nazw jest tylko dopisywana, więc kopia może ją współdzielić.
+        other._names = self._names
+        other._size = self._size
+        return other
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self._columns['id'][:self._size].tolist())
+
+    def keys(self):
+        return iter(self)
+
+    def __contains__(self, product_id):
+        return self.row(product_id) is not None
+
+    def _build_index(self):
+        ids = self._columns['id'][:self._size]
+        if ids.dtype == object:
+            self._index = {product_id: row for row, product_id in enumerate(ids.tolist())}
+        else:
+            order = np.argsort(ids, kind='stable')
+            self._index = (ids[order], order)
+        self._pending = {}
+        return self._index
+
+    def row(self, product_id):
+        """Zwraca numer wiersza produktu o podanym ID lub None."""
+        row = self._pending.get(product_id)
+        if row is not None:
+            return row
+        index = self._index if self._index is not None else self._build_index()
+        if isinstance(index, dict):
+            return index.get(product_id)
+        if not _fits('i', product_id):
+            return None
+        sorted_ids, order = index
+        try:
+            position = int(np.searchsorted(sorted_ids, product_id))
+        except OverflowError:
+            return None
+        if position < len(sorted_ids) and sorted_ids[position] == product_id:
+            return int(order[position])
+        return None
+
+    def _product(self, row):
+        columns = self._columns
+        return Product(columns['id'].item(row), self._names[self._codes[row]],
+                       columns['price'].item(row), columns['stock'].item(row))
+
+    def get(self, product_id, default=None):
+        """Zwraca Product o podanym ID lub default."""
+        row = self.row(product_id)
+        return default if row is None else self._product(row)
+
+    def __getitem__(self, product_id):
+        row = self.row(product_id)
+        if row is None:
+            raise KeyError(product_id)
+        return self._product(row)
+
+    def values(self, start=0, stop=None):
+        """Zwraca kolejne produkty (Product) z wierszy start:stop."""
+        stop = self._size if stop is None else min(stop, self._size)
+        names = self._names
+        for chunk in range(start, stop, ITER_CHUNK):
+            end = min(chunk + ITER_CHUNK, stop)
+            yield from (Product(product_id, names[code], price, stock) for product_id, code, price, stock in zip(
+                self._columns['id'][chunk:end].tolist(), self._codes[chunk:end].tolist(),
+                self._columns['price'][chunk:end].tolist(), self._columns['stock'][chunk:end].tolist()))
+
+    def column(self, name):
+        """
+        Zwraca kolumnę id, price lub stock jako widok tylko do odczytu, bez kopiowania.
+
+        Kolumna name jest składana z kodów i tabeli nazw (tablica obiektów).
+        """
+        if name == 'name':
+            return self._names.lookup(self._codes[:self._size])
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def _numeric(self, name):
+        import pandas as pd
+        values = self.column(name)
+        if values.dtype == object:
+            return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+        return values
+
+    def _reserve(self, size):
+        capacity = len(self._codes)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 16)
+        for column, array in self._columns.items():
+            grown = np.empty(capacity, array.dtype)
+            grown[:self._size] = array[:self._size]
+            self._columns[column] = grown
+        codes = np.empty(capacity, np.int32)
+        codes[:self._size] = self._codes[:self._size]
+        self._codes = codes
+
+    def _set(self, column, row, value):
+        array = self._columns[column]
+        if _fits(array.dtype.kind, value):
+            try:
+                array[row] = value
+                return
+            except (OverflowError, ValueError, TypeError):
+                pass
+        array = self._columns[column] = array.astype(object)
+        array[row] = value
+        if column == 'id':
+            self._index = None
+
+    def put(self, product):
+        """Dodaje produkt lub zastępuje produkt o tym samym ID (słownik lub Product z polami id, name, price, stock)."""
+        product_id = product['id']
+        row = self.row(product_id)
+        if row is None:
+            row = self._size
+            self._reserve(row + 1)
+            self._size += 1
+            self._set('id', row, product_id)
+            if self._index is not None:
+                self._pending[product_id] = row
+                if len(self._pending) > max(INDEX_PENDING, self._size // 8):
+                    self._index = None
+        self._set('price', row, product['price'])
+        self._set('stock', row, product['stock'])
+        self._codes[row] = self._names.code(product['name'])
+
+    def set_stock(self, product_id, stock):
+        """Ustawia stan magazynowy produktu. Raises: KeyError, gdy produkt nie istnieje."""
+        row = self.row(product_id)
+        if row is None:
+            raise KeyError(product_id)
+        self._set('stock', row, stock)
+
+    def remove(self, product_ids):
+        """Usuwa produkty o podanych ID. Zwraca liczbę usuniętych produktów."""
+        rows = {row for row in map(self.row, product_ids) if row is not None}
+        if not rows:
+            return 0
+        keep = np.ones(self._size, dtype=bool)
+        keep[list(rows)] = False
+        for column, array in self._columns.items():
+            self._columns[column] = array[:self._size][keep]
+        # Tabela nazw jest przy okazji oczyszczana z nazw, których nikt już nie używa.
+        used, codes = np.unique(self._codes[:self._size][keep], return_inverse=True)
+        self._names = _NameTable(self._names[code] for code in used.tolist())
+        self._codes = codes.astype(np.int32).reshape(-1)
+        self._size -= len(rows)
+        self._index = None
+        self._pending = {}
+        return len(rows)
+
+    def frame(self, start=0, stop=None):
+        """Zwraca wiersze start:stop jako DataFrame z kolumnami id, name, price, stock."""
+        stop = self._size if stop is None else min(stop, self._size)
+        return self.take(np.arange(start, max(start, stop)))
+
+    def take(self, rows):
+        """Zwraca wskazane wiersze jako DataFrame z kolumnami id, name, price, stock."""
+        import pandas as pd
+        return pd.DataFrame({
+            'id': self._columns['id'][rows],
+            'name': self._names.lookup(self._codes[rows]),
+            'price': self._columns['price'][rows],
+            'stock': self._columns['stock'][rows],
+        }, columns=list(CATALOG_COLUMNS))
+
+    def mask(self, min_price=None, max_price=None, in_stock=None):
+        """
+        Zwraca maskę wierszy spełniających wszystkie podane warunki, liczoną wektorowo na kolumnach.
+
+        Args:
+            min_price, max_price: Zakres ceny (włącznie); None oznacza brak ograniczenia.
+            in_stock: True – tylko produkty na stanie, False – tylko produkty wyprzedane, None – wszystkie.
+        """
+        mask = np.ones(self._size, dtype=bool)
+        if min_price is not None or max_price is not None:
+            price = self._numeric('price')
+            if min_price is not None:
+                mask &= price >= min_price
+            if max_price is not None:
+                mask &= price <= max_price
+        if in_stock is not None:
+            mask &= (self._numeric('stock') > 0) == bool(in_stock)
+        return mask
+
+    def filter(self, min_price=None, max_price=None, in_stock=None):
+        """Zwraca produkty spełniające warunki mask() jako DataFrame."""
+        return self.take(np.flatnonzero(self.mask(min_price, max_price, in_stock)))
+
+    def nbytes(self):
+        """Zwraca przybliżony rozmiar katalogu w pamięci w bajtach (kolumny, indeks ID i tabela nazw)."""
+        size = self._codes.nbytes + self._names.nbytes()
+        for array in self._columns.values():
+            size += array.nbytes
+            if array.dtype == object:
+                size += sum(sys.getsizeof(value) for value in array[:self._size])
+        if isinstance(self._index, tuple):
+            size += sum(array.nbytes for array in self._index)
+        elif self._index is not None:
+            size += sys.getsizeof(self._index)
+        return size
@@ -0,0 +1,242 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+from product_management import LOW_STOCK_THRESHOLD, get_store
+from storage import (CUSTOMER_FILE, DATABASE_DIR, PRODUCTS_FILE, FileBackend, get_backend, parse_legacy_history,
+                     read_lines_tail)
+
+VELOCITY_WINDOWS = (7, 28)
+FORECAST_HORIZON = 14
+COVER_DAYS = 28
+REPORT_COLUMNS = ["id", "name", "stock", "units_7d", "units_28d", "velocity", "days_left", "stockout_date", "reorder"]
+
+
+def _empty_daily():
+    index = pd.MultiIndex.from_arrays([np.array([], dtype=np.int64)] * 2, names=["PRODUCT_ID", "DAY"])
+    return pd.Series(np.array([], dtype=np.int64), index=index, name="QUANTITY")
+
+
+def _day_number(moment=None):
+    """Zamienia datę na numer dnia (liczba dni od 1970-01-01); domyślnie dzisiejszy dzień."""
+    moment = pd.Timestamp.now() if moment is None else pd.Timestamp(moment)
+    return int(moment.to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+
+def _daily_units(lines):
+    """Sumuje sprzedane sztuki w parach (PRODUCT_ID, DAY), gdzie DAY to numer dnia zakupu."""
+    if lines.empty:
+        return _empty_daily()
+    days = lines["DATE"].to_numpy().astype('datetime64[D]').astype(np.int64)
+    daily = lines["QUANTITY"].groupby([lines["PRODUCT_ID"].to_numpy(), days]).sum()
+    return daily.rename_axis(["PRODUCT_ID", "DAY"]).astype(np.int64)
+
+
+def _sum_daily(parts):
+    """Dodaje do siebie serie sprzedaży dziennej; pary o zerowej sumie są usuwane."""
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return _empty_daily()
+    if len(parts) == 1:
+        return parts[0]
+    total = pd.concat(parts).groupby(level=[0, 1]).sum()
+    return total[total != 0]
+
+
+class RestockForecast:
+    """
+    Prognoza wyczerpania zapasów na podstawie historii zakupów.
+
+    Historia jest trzymana w pamięci jako liczba sprzedanych sztuk w parach
+    (produkt, dzień). Z plików pozycji klientów przy każdym odświeżeniu
+    czytana jest tylko część dopisana od poprzedniego odczytu (zapamiętane
+    i-węzeł i przesunięcie), więc zakup dopisany przez purchase_products
+    kosztuje odczyt kilku wierszy, a nie całej historii. Plik przepisany
+    w całości (np. przy konwersji starej historii) jest wczytywany ponownie,
+    a jego poprzedni wkład odejmowany. Dla bazy SQLite wczytywane są pozycje
+    o rowid większym niż ostatnio widziany.
+    """
+
+    def __init__(self, backend=None, products_file=PRODUCTS_FILE, windows=VELOCITY_WINDOWS):
+        self.backend = backend or get_backend(products_file, CUSTOMER_FILE, DATABASE_DIR)
+        self.products_file = products_file
+        self.windows = tuple(sorted(windows))
+        self._daily = _empty_daily()
+        # Backend plikowy: klient -> (rodzaj pliku, stan odczytu, wkład klienta); SQLite: (liczba pozycji, rowid).
+        self._files = {}
+        self._position = None
+        self._lock = threading.Lock()
+
+    def _sources(self):
+        """Zwraca pliki historii: klient -> (rodzaj, ścieżka), z preferencją plików pozycji."""
+        backend = self.backend
+        sources = {cid: ('legacy', backend.history_file(cid)) for cid in backend.history_customers()}
+        for cid in backend.purchase_line_customers():
+            sources[cid] = ('lines', backend.lines_file(cid))
+        return sources
+
+    def refresh(self):
+        """
+        Wczytuje pozycje zakupów dopisane od ostatniego odświeżenia.
+
+        Returns:
+            int: Liczba wczytanych pozycji.
+        """
+        with self._lock:
+            if isinstance(self.backend, FileBackend):
+                return self._refresh_files()
+            return self._refresh_database()
+
+    def _refresh_files(self):
+        sources = self._sources()
+        added, removed, count = [], [], 0
+        for cid, (kind, path) in sources.items():
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            known = self._files.get(cid)
+            if kind == 'lines':
+                if known is not None and known[0] == kind and known[1][0] == st.st_ino and st.st_size >= known[1][1]:
+                    if st.st_size == known[1][1]:
+                        continue
+                    lines, offset = read_lines_tail(path, known[1][1])
+                    part = _daily_units(lines)
+                    contribution = _sum_daily([known[2], part])
+                else:
+                    lines, offset = read_lines_tail(path)
+                    part = contribution = _daily_units(lines)
+                    if known is not None:
+                        removed.append(known[2])
+                state = (st.st_ino, offset)
+            else:
+                state = (st.st_ino, st.st_mtime_ns, st.st_size)
+                if known is not None and known[:2] == (kind, state):
+                    continue
+                lines = parse_legacy_history(self.backend.read_history(cid), cid)
+                part = contribution = _daily_units(lines)
+                if known is not None:
+                    removed.append(known[2])
+            self._files[cid] = (kind, state, contribution)
+            added.append(part)
+            count += len(lines)
+        for cid in [cid for cid in self._files if cid not in sources]:
+            removed.append(self._files.pop(cid)[2])
+        if added or removed:
+            self._daily = _sum_daily([self._daily, *added, *(-part for part in removed)])
+        return count
+
+    def _refresh_database(self):
+        count, last = self.backend.purchase_lines_position()
+        if self._position == (count, last):
+            return 0
+        if self._position is not None:
+            known_count, known_last = self._position
+            lines, new_last = self.backend.load_purchase_lines_after(known_last)
+            # Inna liczba pozycji niż oczekiwana oznacza usunięcia (np. ponowną konwersję historii).
+            if known_count + len(lines) == count:
+                self._daily = _sum_daily([self._daily, _daily_units(lines)])
+                self._position = (count, new_last)
+                return len(lines)
+        lines, new_last = self.backend.load_purchase_lines_after(0)
+        self._daily = _daily_units(lines)
+        self._position = (len(lines), new_last)
+        return len(lines)
+
+    def velocity(self, as_of=None):
+        """
+        Zwraca tempo sprzedaży produktów w oknach VELOCITY_WINDOWS (domyślnie 7 i 28 dni).
+
+        Sprzedaż z ostatnich dni jest układana w macierz produkty × dni, a sumy
+        we wszystkich oknach kończących się w dniu as_of są liczone jednym
+        cumsum dla wszystkich produktów naraz.
+
+        Returns:
+            pd.DataFrame: Indeks PRODUCT_ID, kolumny units_<n>d (sprzedane sztuki)
+            i velocity (sztuki dziennie; większe z tempa w oknach, czyli ostrożniejsza prognoza).
+        """
+        self.refresh()
+        today = _day_number(as_of)
+        span = self.windows[-1]
+        daily = self._daily
+        days = daily.index.get_level_values("DAY").to_numpy()
+        recent = (days > today - span) & (days <= today)
+        products, rows = np.unique(daily.index.get_level_values("PRODUCT_ID").to_numpy()[recent], return_inverse=True)
+        matrix = np.zeros((len(products), span))
+        # Kolumna 0 to dzień as_of, kolumna k to k dni wcześniej.
+        matrix[rows, today - days[recent]] = daily.to_numpy()[recent]
+        totals = np.cumsum(matrix, axis=1)
+        result = pd.DataFrame(index=pd.Index(products, name="PRODUCT_ID"))
+        rates = []
+        for window in self.windows:
+            units = totals[:, window - 1]
+            result[f"units_{window}d"] = units.astype(np.int64)
+            rates.append(units / window)
+        result["velocity"] = np.max(rates, axis=0)
+        return result
+
+    def report(self, as_of=None, horizon=FORECAST_HORIZON, cover_days=COVER_DAYS, low_stock=LOW_STOCK_THRESHOLD):
+        """
+        Zwraca ranking produktów do uzupełnienia.
+
+        Obejmuje produkty, których zapas przy obecnym tempie sprzedaży skończy
+        się w ciągu horizon dni, oraz produkty o stanie poniżej low_stock.
+        Stany pochodzą z katalogu w pamięci, razem ze zmianami z dziennika stanów.
+
+        Returns:
+            pd.DataFrame: Kolumny REPORT_COLUMNS, od produktu, który skończy się najwcześniej.
+            days_left to liczba dni do wyczerpania zapasu (inf, gdy produkt się nie sprzedaje),
+            a reorder to liczba sztuk, po dokupieniu których zapas wystarczy na cover_days dni.
+        """
+        velocity = self.velocity(as_of)
+        report = get_store(self.products_file).frame()[["id", "name", "stock"]].join(velocity, on="id")
+        report[velocity.columns] = report[velocity.columns].fillna(0)
+        for column in velocity.columns.drop("velocity"):
+            report[column] = report[column].astype(np.int64)
+        stock = report["stock"].clip(lower=0).to_numpy(dtype=float)
+        rate = report["velocity"].to_numpy(dtype=float)
+        with np.errstate(divide='ignore'):
+            days_left = np.where(rate > 0, stock / np.where(rate > 0, rate, 1), np.inf)
+        start = pd.Timestamp.now().normalize() if as_of is None else pd.Timestamp(as_of).normalize()
+        offsets = pd.to_timedelta(np.where(np.isfinite(days_left), np.floor(days_left), np.nan), unit='D')
+        report["velocity"] = rate.round(2)
+        report["days_left"] = days_left.round(1)
+        report["stockout_date"] = (start + offsets).strftime("%Y-%m-%d")
+        target = np.maximum(np.ceil(rate * cover_days), low_stock)
+        report["reorder"] = np.maximum(target - stock, 0).astype(np.int64)
+        selected = report[(days_left <= horizon) | (report["stock"] < low_stock)]
+        selected = selected.sort_values(["days_left", "velocity"], ascending=[True, False], kind='stable')
+        return selected[REPORT_COLUMNS].reset_index(drop=True)
+
+
+_forecast = None
+
+
+def get_forecast(products_file=PRODUCTS_FILE):
+    """Zwraca współdzieloną instancję RestockForecast dla bieżącego backendu."""
+    global _forecast
+    backend = get_backend(products_file, CUSTOMER_FILE, DATABASE_DIR)
+    if _forecast is None or _forecast.backend is not backend:
+        _forecast = RestockForecast(backend, products_file)
+    return _forecast
+
+
+@instrumented()
+def get_restock_report(file_path=PRODUCTS_FILE, horizon=FORECAST_HORIZON, cover_days=COVER_DAYS, as_of=None):
+    """
+    Zwraca raport uzupełnień: produkty, które wkrótce się skończą lub mają niski stan.
+
+    Tempo sprzedaży jest liczone z historii zakupów w oknach 7 i 28 dni;
+    kolejne wywołania wczytują tylko zakupy dopisane od poprzedniego.
+    """
+    try:
+        return get_forecast(file_path).report(as_of, horizon, cover_days)
+    except PermissionError as e:
+        print(f"Błąd uprawnień podczas odczytu historii zakupów: {e}")
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    except Exception as e:
+        print(f"Błąd podczas prognozowania stanów magazynowych: {e}")
+        return pd.DataFrame(columns=REPORT_COLUMNS)
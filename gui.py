@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-import pandas as pd
+from projekt_customers import iter_customers
+from product_management import LOW_STOCK_THRESHOLD, get_store
+from gui_tasks import TaskRunner
+from table_view import CHUNK_SIZE, VirtualTable
 
 def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remove_customer, get_product_stats, check_product_availability):
     """
@@ -12,6 +15,8 @@ def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remo
         get_product_stats, check_product_availability: Funkcje do zarządzania produktami.
     """
     root.title("Żabka Online - Pakiet Frog")
+    progress = ttk.Progressbar(root, mode="indeterminate", length=200)
+    tasks = TaskRunner(root, progress=progress)
 
     def add_product_gui():
         try:
@@ -24,11 +29,16 @@ def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remo
             if not product_data["id"] or not product_data["name"]:
                 messagebox.showerror("Błąd", "ID i nazwa produktu nie mogą być puste.")
                 return
-            success = add_product("database/products.xlsx", product_data)
-            if success:
-                messagebox.showinfo("Sukces", "Produkt dodany!")
-            else:
-                messagebox.showerror("Błąd", "Nie udało się dodać produktu. Sprawdź uprawnienia do pliku products.xlsx.")
+
+            def done(success):
+                if success:
+                    messagebox.showinfo("Sukces", "Produkt dodany!")
+                else:
+                    messagebox.showerror("Błąd", "Nie udało się dodać produktu. Sprawdź uprawnienia do pliku products.xlsx.")
+
+            tasks.submit(add_product, "database/products.xlsx", product_data, on_success=done,
+                         on_error=lambda e: messagebox.showerror("Błąd", f"Błąd podczas dodawania produktu: {str(e)}"),
+                         widgets=[button_add_product])
         except ValueError as e:
             messagebox.showerror("Błąd", f"Nieprawidłowe dane: {str(e)}")
         except Exception as e:
@@ -45,15 +55,19 @@ def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remo
                 messagebox.showerror("Błąd", "Proszę podać ID lub nazwę produktu.")
                 return
             if product_id:
-                success = remove_product("database/products.xlsx", product_id, by="id")
-                criterion = f"ID {product_id}"
-            else:
-                success = remove_product("database/products.xlsx", product_name, by="name")
-                criterion = f"nazwie {product_name}"
-            if success:
-                messagebox.showinfo("Sukces", f"Produkt usunięty na podstawie {criterion}!")
+                identifier, by, criterion = product_id, "id", f"ID {product_id}"
             else:
-                messagebox.showerror("Błąd", f"Nie udało się usunąć produktu o {criterion}.")
+                identifier, by, criterion = product_name, "name", f"nazwie {product_name}"
+
+            def done(success):
+                if success:
+                    messagebox.showinfo("Sukces", f"Produkt usunięty na podstawie {criterion}!")
+                else:
+                    messagebox.showerror("Błąd", f"Nie udało się usunąć produktu o {criterion}.")
+
+            tasks.submit(remove_product, "database/products.xlsx", identifier, by=by, on_success=done,
+                         on_error=lambda e: messagebox.showerror("Błąd", f"Błąd podczas usuwania produktu: {str(e)}"),
+                         widgets=[button_remove_product])
         except Exception as e:
             messagebox.showerror("Błąd", f"Błąd podczas usuwania produktu: {str(e)}")
 
@@ -65,11 +79,16 @@ def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remo
             if not name or not email:
                 messagebox.showerror("Błąd", "Imię i e-mail klienta nie mogą być puste.")
                 return
-            customer_id = register_customer(name, email, phone)
-            if customer_id:
-                messagebox.showinfo("Sukces", f"Zarejestrowano klienta z ID: {customer_id}")
-            else:
-                messagebox.showerror("Błąd", "Nie udało się zarejestrować klienta. Sprawdź uprawnienia do pliku customer.csv.")
+
+            def done(customer_id):
+                if customer_id:
+                    messagebox.showinfo("Sukces", f"Zarejestrowano klienta z ID: {customer_id}")
+                else:
+                    messagebox.showerror("Błąd", "Nie udało się zarejestrować klienta. Sprawdź uprawnienia do pliku customer.csv.")
+
+            tasks.submit(register_customer, name, email, phone, on_success=done,
+                         on_error=lambda e: messagebox.showerror("Błąd", f"Błąd podczas rejestracji klienta: {str(e)}"),
+                         widgets=[button_register_customer])
         except Exception as e:
             messagebox.showerror("Błąd", f"Błąd podczas rejestracji klienta: {str(e)}")
 
@@ -84,18 +103,28 @@ def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remo
                 messagebox.showerror("Błąd", "Proszę podać ID lub imię klienta.")
                 return
             identifier = customer_id or customer_name
-            success = remove_customer(identifier)
             criterion = f"ID {customer_id}" if customer_id else f"nazwie {customer_name}"
-            if success:
-                messagebox.showinfo("Sukces", f"Klient usunięty na podstawie {criterion}!")
-            else:
-                messagebox.showerror("Błąd", f"Nie udało się usunąć klienta o {criterion}.")
+
+            def done(success):
+                if success:
+                    messagebox.showinfo("Sukces", f"Klient usunięty na podstawie {criterion}!")
+                else:
+                    messagebox.showerror("Błąd", f"Nie udało się usunąć klienta o {criterion}.")
+
+            tasks.submit(remove_customer, identifier, on_success=done,
+                         on_error=lambda e: messagebox.showerror("Błąd", f"Błąd podczas usuwania klienta: {str(e)}"),
+                         widgets=[button_remove_customer])
         except Exception as e:
             messagebox.showerror("Błąd", f"Błąd podczas usuwania klienta: {str(e)}")
 
     def show_product_stats():
+        tasks.submit(get_product_stats, "database/products.xlsx", on_success=display_product_stats,
+                     on_error=lambda e: messagebox.showerror("Błąd", f"Błąd podczas pobierania statystyk: {str(e)}"),
+                     widgets=[button_product_stats])
+
+    def display_product_stats(stats):
+        import pandas as pd
         try:
-            stats = get_product_stats("database/products.xlsx")
             if not stats:
                 messagebox.showerror("Błąd", "Nie udało się pobrać statystyk produktów. Plik products.xlsx może być pusty lub niedostępny.")
                 return
@@ -107,58 +136,60 @@ def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remo
                 f"Średnia cena: {stats['avg_price']:.2f}\n"
                 f"Minimalny stan: {stats['min_stock']}\n"
                 f"Maksymalny stan: {stats['max_stock']}\n"
-                f"Średni stan: {stats['avg_stock']:.2f}"
+                f"Średni stan: {stats['avg_stock']:.2f}\n"
+                f"Mediana ceny / p90 / p99: {stats['price_p50']:.2f} / {stats['price_p90']:.2f} / {stats['price_p99']:.2f}\n"
+                f"Mediana stanu / p90 / p99: {stats['stock_p50']:.1f} / {stats['stock_p90']:.1f} / {stats['stock_p99']:.1f}\n"
+                f"Liczba produktów: {stats['count']}\n"
+                f"Łączny stan: {stats['total_stock']}\n"
+                f"Wartość magazynu: {stats['inventory_value']:.2f}\n"
+                f"Produkty z niskim stanem (< {LOW_STOCK_THRESHOLD}): {stats['low_stock_count']}"
             )
             messagebox.showinfo("Statystyki produktów", stats_message)
         except Exception as e:
             messagebox.showerror("Błąd", f"Błąd podczas pobierania statystyk: {str(e)}")
 
 
-    def preview_file(file_path, title, columns):
+    def preview_file(file_path, title, columns, loader=None):
         try:
             preview_window = tk.Toplevel(root)
             preview_window.title(title)
             preview_window.geometry("600x400")
+        except Exception as e:
+            messagebox.showerror("Błąd", f"Błąd podczas wczytywania pliku: {str(e)}")
+            return
 
-            tree = ttk.Treeview(preview_window, columns=columns, show="headings")
-            for col in columns:
-                tree.heading(col, text=col)
-                tree.column(col, width=100, anchor="center")
-            tree.pack(fill="both", expand=True, padx=10, pady=10)
-
-            scrollbar_y = ttk.Scrollbar(preview_window, orient="vertical", command=tree.yview)
-            scrollbar_y.pack(side="right", fill="y")
-            tree.configure(yscrollcommand=scrollbar_y.set)
-
-            scrollbar_x = ttk.Scrollbar(preview_window, orient="horizontal", command=tree.xview)
-            scrollbar_x.pack(side="bottom", fill="x")
-            tree.configure(xscrollcommand=scrollbar_x.set)
-
-            if file_path.endswith(".xlsx"):
-                df = pd.read_excel(file_path, engine="openpyxl")
+        def failed(error):
+            if isinstance(error, FileNotFoundError):
+                messagebox.showerror("Błąd", f"Plik {file_path} nie istnieje.")
+            elif isinstance(error, PermissionError):
+                messagebox.showerror("Błąd", f"Brak uprawnień do pliku {file_path}.")
             else:
-                df = pd.read_csv(file_path)
-            if df.empty:
-                messagebox.showinfo("Informacja", "Plik jest pusty.")
+                messagebox.showerror("Błąd", f"Błąd podczas wczytywania pliku: {str(error)}")
+            if preview_window.winfo_exists():
                 preview_window.destroy()
-                return
-            for _, row in df.iterrows():
-                tree.insert("", "end", values=[row[col] for col in columns])
-        except FileNotFoundError:
-            messagebox.showerror("Błąd", f"Plik {file_path} nie istnieje.")
-            preview_window.destroy()
-        except PermissionError:
-            messagebox.showerror("Błąd", f"Brak uprawnień do pliku {file_path}.")
-            preview_window.destroy()
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Błąd podczas wczytywania pliku: {str(e)}")
-            preview_window.destroy()
+
+        table = VirtualTable(preview_window, loader if loader is not None else file_path, columns, tasks,
+                             on_error=failed)
+        table.pack(fill="both", expand=True)
 
     def preview_products():
-        preview_file("database/products.xlsx", "Podgląd produktów", ["id", "name", "price", "stock"])
+        # Katalog z pamięci, razem ze zmianami stanów, które nie trafiły jeszcze do arkusza; porcje
+        # są składane wprost z kolumn katalogu, bez słownika dla każdego produktu.
+        preview_file("database/products.xlsx", "Podgląd produktów", ["id", "name", "price", "stock"],
+                     loader=lambda: get_store("database/products.xlsx").iter_frames(CHUNK_SIZE))
+
+    def show_restock_report():
+        # Prognoza (pandas, historia zakupów) jest importowana dopiero przy pierwszym raporcie.
+        from forecast import REPORT_COLUMNS, get_restock_report
+
+        def load_report():
+            report = get_restock_report("database/products.xlsx")
+            return report.astype(object).where(report.notna(), "").to_dict('records')
+
+        preview_file("database/products.xlsx", "Raport uzupełnień", REPORT_COLUMNS, loader=load_report)
 
     def preview_customers():
-        preview_file("database/customer.csv", "Podgląd klientów", ["ID", "NAME", "E-MAIL", "PHONE"])
+        preview_file("database/customer.csv", "Podgląd klientów", ["ID", "NAME", "E-MAIL", "PHONE"], loader=iter_customers)
 
     tk.Label(root, text="Dodaj produkt", font=("Arial", 12, "bold")).grid(row=0, column=0, columnspan=2, pady=5)
     tk.Label(root, text="ID:").grid(row=1, column=0, sticky="e")
@@ -176,7 +207,8 @@ def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remo
     entry_product_price.grid(row=3, column=1, pady=2)
     entry_product_stock.grid(row=4, column=1, pady=2)
 
-    tk.Button(root, text="Dodaj produkt", command=add_product_gui).grid(row=5, column=0, columnspan=2, pady=10)
+    button_add_product = tk.Button(root, text="Dodaj produkt", command=add_product_gui)
+    button_add_product.grid(row=5, column=0, columnspan=2, pady=10)
 
     tk.Label(root, text="Usuń produkt", font=("Arial", 12, "bold")).grid(row=6, column=0, columnspan=2, pady=5)
     tk.Label(root, text="ID:").grid(row=7, column=0, sticky="e")
@@ -188,10 +220,12 @@ def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remo
     entry_remove_product_id.grid(row=7, column=1, pady=2)
     entry_remove_product_name.grid(row=8, column=1, pady=2)
 
-    tk.Button(root, text="Usuń produkt", command=remove_product_gui).grid(row=9, column=0, columnspan=2, pady=10)
+    button_remove_product = tk.Button(root, text="Usuń produkt", command=remove_product_gui)
+    button_remove_product.grid(row=9, column=0, columnspan=2, pady=10)
 
     tk.Label(root, text="Statystyki produktów", font=("Arial", 12, "bold")).grid(row=10, column=0, columnspan=2, pady=5)
-    tk.Button(root, text="Pokaż statystyki", command=show_product_stats).grid(row=11, column=0, columnspan=2, pady=5)
+    button_product_stats = tk.Button(root, text="Pokaż statystyki", command=show_product_stats)
+    button_product_stats.grid(row=11, column=0, columnspan=2, pady=5)
 
     tk.Label(root, text="Rejestracja klienta", font=("Arial", 12, "bold")).grid(row=0, column=2, columnspan=2, pady=5)
     tk.Label(root, text="Imię i nazwisko:").grid(row=1, column=2, sticky="e")
@@ -206,7 +240,8 @@ def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remo
     entry_customer_email.grid(row=2, column=3, pady=2)
     entry_customer_phone.grid(row=3, column=3, pady=2)
 
-    tk.Button(root, text="Zarejestruj klienta", command=register_customer_gui).grid(row=4, column=2, columnspan=2, pady=10)
+    button_register_customer = tk.Button(root, text="Zarejestruj klienta", command=register_customer_gui)
+    button_register_customer.grid(row=4, column=2, columnspan=2, pady=10)
 
     tk.Label(root, text="Usuń klienta", font=("Arial", 12, "bold")).grid(row=5, column=2, columnspan=2, pady=5)
     tk.Label(root, text="ID:").grid(row=6, column=2, sticky="e")
@@ -218,8 +253,13 @@ def create_gui(root: tk.Tk, add_product, remove_product, register_customer, remo
     entry_remove_customer_id.grid(row=6, column=3, pady=2)
     entry_remove_customer_name.grid(row=7, column=3, pady=2)
 
-    tk.Button(root, text="Usuń klienta", command=remove_customer_gui).grid(row=8, column=2, columnspan=2, pady=10)
+    button_remove_customer = tk.Button(root, text="Usuń klienta", command=remove_customer_gui)
+    button_remove_customer.grid(row=8, column=2, columnspan=2, pady=10)
 
     tk.Label(root, text="Podgląd danych", font=("Arial", 12, "bold")).grid(row=9, column=2, columnspan=2, pady=5)
     tk.Button(root, text="Podgląd produktów", command=preview_products).grid(row=10, column=2, columnspan=2, pady=5)
     tk.Button(root, text="Podgląd klientów", command=preview_customers).grid(row=11, column=2, columnspan=2, pady=5)
+
+    tk.Button(root, text="Raport uzupełnień", command=show_restock_report).grid(row=12, column=0, columnspan=4, pady=5)
+
+    progress.grid(row=13, column=0, columnspan=4, pady=5)
@@ -0,0 +1,115 @@
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+POLL_INTERVAL_MS = 30
+
+
+class TaskRunner:
+    """
+    Wykonuje operacje na danych w puli wątków, poza pętlą zdarzeń Tk.
+
+    Wynik jest odbierany w wątku Tk: root.after co POLL_INTERVAL_MS sprawdza,
+    czy zadanie się zakończyło, i dopiero wtedy wywołuje on_success lub
+    on_error, więc widżety są zmieniane wyłącznie z głównego wątku. Na czas
+    pracy przekazane przyciski są wyłączane, kursor zmienia się na "watch",
+    a pasek postępu (jeśli podano) działa w trybie nieokreślonym.
+
+    Domyślnie pula ma jeden wątek, więc operacje wykonują się w kolejności
+    zlecenia (np. dodanie produktu przed jego usunięciem).
+    """
+
+    def __init__(self, root, max_workers=1, progress=None):
+        self.root = root
+        self.progress = progress
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gui-task")
+        self._pending = 0
+        self._closed = False
+        root.bind("<Destroy>", self._on_destroy, add="+")
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.shutdown()
+
+    def shutdown(self):
+        """Zamyka pulę; zadania już rozpoczęte kończą się w tle bez wywoływania callbacków."""
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def submit(self, func, *args, on_success=None, on_error=None, widgets=(), **kwargs):
+        """
+        Zleca func(*args, **kwargs) puli wątków.
+
+        Args:
+            on_success (callable): Wywoływane w wątku Tk z wynikiem func.
+            on_error (callable): Wywoływane w wątku Tk z wyjątkiem; domyślnie okno błędu.
+            widgets: Widżety wyłączane na czas wykonywania zadania.
+        """
+        if self._closed:
+            return None
+        disabled = [(w, state) for w in widgets for state in [_disable(w)] if state is not None]
+        self._set_busy(+1)
+        future = self._executor.submit(func, *args, **kwargs)
+        self.root.after(POLL_INTERVAL_MS, self._poll, future, on_success, on_error, disabled)
+        return future
+
+    def _poll(self, future, on_success, on_error, disabled):
+        if self._closed:
+            return
+        if not future.done():
+            self.root.after(POLL_INTERVAL_MS, self._poll, future, on_success, on_error, disabled)
+            return
+        for widget, state in disabled:
+            _set_state(widget, state)
+        self._set_busy(-1)
+        error = future.exception()
+        if error is not None:
+            (on_error or _show_error)(error)
+        elif on_success is not None:
+            on_success(future.result())
+
+    def _set_busy(self, delta):
+        was_busy = self.busy
+        self._pending += delta
+        if was_busy == self.busy:
+            return
+        try:
+            self.root.configure(cursor="watch" if self.busy else "")
+            progress = self.progress
+            if progress is not None and progress.winfo_exists():
+                if self.busy:
+                    progress.start(10)
+                else:
+                    progress.stop()
+        except tk.TclError:
+            pass
+
+
+def _disable(widget):
+    """Wyłącza widżet i zwraca jego poprzedni stan (None, jeśli widżet już nie istnieje)."""
+    try:
+        if not widget.winfo_exists():
+            return None
+        state = str(widget.cget("state")) or "normal"
+        widget.configure(state="disabled")
+        return state
+    except tk.TclError:
+        return None
+
+
+def _set_state(widget, state):
+    try:
+        if not widget.winfo_exists():
+            return False
+        widget.configure(state=state)
+        return True
+    except tk.TclError:
+        return False
+
+
+def _show_error(error):
+    messagebox.showerror("Błąd", f"Błąd podczas operacji: {error}")
@@ -0,0 +1,81 @@
+import datetime
+
+from storage import CUSTOMER_FILE, DATABASE_DIR, PRODUCTS_FILE, get_backend
+
+PAGE_SIZE = 100
+
+
+def _backend():
+    return get_backend(PRODUCTS_FILE, CUSTOMER_FILE, DATABASE_DIR)
+
+
+def _date_bound(value):
+    """Sprowadza datę (date, datetime lub tekst) do postaci porównywalnej z kolumną DATE."""
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_history(customer_id, offset=0, limit=None, start=None, end=None):
+    """
+    Leniwie zwraca historię zakupów klienta wiersz po wierszu.
+
+    Args:
+        customer_id: ID klienta.
+        offset (int): Liczba pominiętych wierszy (po zastosowaniu filtrów dat).
+        limit (int): Maksymalna liczba wierszy; None oznacza wszystkie.
+        start, end: Zakres dat (włącznie) jako date, datetime lub tekst "RRRR-MM-DD[ GG:MM:SS]".
+
+    Yields:
+        list: Wiersz [DATE, PRODUCTS, TOTAL_PRICE].
+
+    Raises:
+        FileNotFoundError: Gdy klient nie ma historii zakupów.
+    """
+    return _backend().iter_history(customer_id, start=_date_bound(start), end=_date_bound(end),
+                                   offset=offset, limit=limit)
+
+
+def read_history_page(customer_id, offset=0, limit=PAGE_SIZE, start=None, end=None):
+    """Zwraca jedną stronę historii zakupów jako listę wierszy."""
+    return list(iter_history(customer_id, offset=offset, limit=limit, start=start, end=end))
+
+
+class HistoryPager:
+    """
+    Podaje historię zakupów stronami, trzymając otwarty iterator między stronami.
+
+    Kolejna strona jest czytana od miejsca, w którym skończyła się poprzednia,
+    więc przewijanie długiej historii nie wraca do początku pliku.
+    """
+
+    def __init__(self, customer_id, page_size=PAGE_SIZE, start=None, end=None):
+        self.page_size = page_size
+        self._rows = iter_history(customer_id, start=start, end=end)
+        self.loaded = 0
+        self.exhausted = False
+
+    def next_page(self):
+        """Zwraca kolejną stronę (pustą, gdy historia się skończyła)."""
+        if self.exhausted:
+            return []
+        page = []
+        for row in self._rows:
+            page.append(row)
+            if len(page) >= self.page_size:
+                break
+        if len(page) < self.page_size:
+            self.exhausted = True
+        self.loaded += len(page)
+        return page
+
+    def close(self):
+        """Zamyka otwarty plik historii."""
+        close = getattr(self._rows, 'close', None)
+        if close is not None:
+            close()
+        self.exhausted = True
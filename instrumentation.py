@@ -0,0 +1,330 @@
+import argparse
+import atexit
+import cProfile
+import functools
+import inspect
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+METRICS_ENV = "FROG_METRICS"
+REPORT_ENV = "FROG_METRICS_REPORT"
+PROFILE_ENV = "FROG_PROFILE"
+SAMPLE_SIZE = 4096
+PERCENTILES = (50, 95, 99)
+TOP_ENTRIES = 25
+
+
+def _open_io_counters():
+    try:
+        return os.open("/proc/self/io", os.O_RDONLY)
+    except OSError:
+        return None
+
+
+_io_fd = _open_io_counters()
+
+
+def _io_counters():
+    """Zwraca (bajty odczytane, bajty zapisane) przez proces albo None, gdy system ich nie udostępnia."""
+    if _io_fd is None:
+        return None
+    try:
+        data = os.pread(_io_fd, 512, 0)
+    except OSError:
+        return None
+    read = written = 0
+    for line in data.split(b"\n"):
+        if line.startswith(b"rchar:"):
+            read = int(line[6:])
+        elif line.startswith(b"wchar:"):
+            written = int(line[6:])
+    return read, written
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q / 100
+    f = int(k)
+    c = min(f + 1, len(sorted_values) - 1)
+    return sorted_values[f] + (sorted_values[c] - sorted_values[f]) * (k - f)
+
+
+class OperationStats:
+    """
+    Pomiary jednej operacji: liczba wywołań, błędy, łączny czas, bajty I/O
+    oraz próbka czasów (reservoir sampling) do wyznaczania percentyli.
+    """
+
+    __slots__ = ('count', 'errors', 'total', 'max', 'bytes_read', 'bytes_written', 'memory', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.memory = 0
+        self.samples = []
+
+    def record(self, duration, ok, io_delta, memory_delta):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        if not ok:
+            self.errors += 1
+        if io_delta is not None:
+            self.bytes_read += io_delta[0]
+            self.bytes_written += io_delta[1]
+        if memory_delta is not None:
+            self.memory += memory_delta
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append(duration)
+        else:
+            slot = random.randrange(self.count)
+            if slot < SAMPLE_SIZE:
+                self.samples[slot] = duration
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        summary = {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'max_ms': self.max * 1000,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'memory_bytes': self.memory,
+        }
+        for q in PERCENTILES:
+            summary[f'p{q}_ms'] = _percentile(ordered, q) * 1000
+        return summary
+
+
+class Metrics:
+    """
+    Rejestr pomiarów operacji oparty na dekoratorze instrumented.
+
+    Po włączeniu (FROG_METRICS=1) mierzone są czas i liczba wywołań, a dla
+    operacji backendów także bajty I/O z liczników procesu (/proc/self/io),
+    więc przy pracy wielowątkowej obejmują też I/O innych wątków. Tryb przechwytywania
+    (start_capture) dodatkowo uruchamia cProfile i tracemalloc.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._operations = {}
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._memory = False
+        self._capture = {}
+
+    def record(self, name, duration, ok, io_delta=None, memory_delta=None):
+        with self._lock:
+            stats = self._operations.get(name)
+            if stats is None:
+                stats = self._operations[name] = OperationStats()
+            stats.record(duration, ok, io_delta, memory_delta)
+
+    def reset(self):
+        """Czyści zebrane pomiary."""
+        with self._lock:
+            self._operations = {}
+
+    @property
+    def memory_tracing(self):
+        return self._memory
+
+    def start_capture(self, profile=True, memory=True):
+        """
+        Włącza tryb przechwytywania: cProfile dla bieżącego wątku i/lub tracemalloc.
+
+        Przy włączonym tracemalloc każde wywołanie zapisuje też przyrost zaalokowanej pamięci.
+        """
+        if profile and self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._memory = True
+
+    def stop_capture(self, top=TOP_ENTRIES):
+        """
+        Kończy tryb przechwytywania.
+
+        Returns:
+            dict: 'profile' (najdroższe funkcje według czasu łącznego) oraz
+            'memory' (szczyt pamięci i miejsca największych alokacji).
+        """
+        capture = {}
+        if self._profiler is not None:
+            self._profiler.disable()
+            stream = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=stream)
+            stats.sort_stats('cumulative').print_stats(top)
+            capture['profile'] = stream.getvalue()
+            self._profiler = None
+        if self._memory:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self._memory = False
+            capture['memory'] = {
+                'current_bytes': current,
+                'peak_bytes': peak,
+                'top': [str(stat) for stat in snapshot.statistics('lineno')[:top]],
+            }
+        self._capture = capture
+        return capture
+
+    def report(self):
+        """Zwraca pomiary wszystkich operacji jako słownik gotowy do zapisu w JSON."""
+        with self._lock:
+            operations = {name: stats.summary() for name, stats in self._operations.items()}
+        report = {'generated': time.strftime('%Y-%m-%d %H:%M:%S'), 'io_supported': _io_fd is not None,
+                  'operations': operations}
+        if self._capture:
+            report['capture'] = self._capture
+        return report
+
+    def dump(self, path=None):
+        """Zapisuje raport JSON do pliku albo, gdy path jest None, wypisuje tabelę podsumowania."""
+        report = self.report()
+        if path is None:
+            print(format_report(report))
+            return report
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+
+# Pomiary są domyślnie wyłączone; włącza je FROG_METRICS=1 albo zamówienie raportu (FROG_METRICS_REPORT).
+metrics = Metrics(enabled=os.environ.get(METRICS_ENV, "1" if os.environ.get(REPORT_ENV) else "0") != "0")
+
+
+def _format_bytes(value):
+    for unit in ('B', 'KiB', 'MiB'):
+        if value < 1024:
+            return f"{value:.0f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+def format_report(report):
+    """Formatuje raport jako tabelę tekstową posortowaną według łącznego czasu."""
+    header = (f"{'Operacja':<48} {'Wywołania':>9} {'Błędy':>6} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'p99 ms':>9} {'Łącznie ms':>11} {'Odczyt':>10} {'Zapis':>10}")
+    lines = [header, "-" * len(header)]
+    operations = sorted(report['operations'].items(), key=lambda item: item[1]['total_ms'], reverse=True)
+    for name, s in operations:
+        lines.append(f"{name:<48} {s['count']:>9} {s['errors']:>6} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} "
+                     f"{s['p99_ms']:>9.2f} {s['total_ms']:>11.1f} {_format_bytes(s['bytes_read']):>10} "
+                     f"{_format_bytes(s['bytes_written']):>10}")
+    if not operations:
+        lines.append("Brak pomiarów.")
+    capture = report.get('capture', {})
+    if 'memory' in capture:
+        lines.append(f"\nSzczyt pamięci (tracemalloc): {_format_bytes(capture['memory']['peak_bytes'])}")
+        lines.extend(capture['memory']['top'][:10])
+    if 'profile' in capture:
+        lines.append("\n" + capture['profile'])
+    return "\n".join(lines)
+
+
+def instrumented(name=None, io=False):
+    """
+    Dekorator mierzący czas, bajty I/O i liczbę wywołań funkcji w rejestrze metrics.
+
+    Args:
+        name (str): Nazwa operacji w raporcie; domyślnie moduł.funkcja.
+        io (bool): Czy mierzyć bajty I/O (dwa odczyty /proc/self/io na wywołanie);
+            tylko dla operacji, które faktycznie czytają lub zapisują dane.
+    """
+    def decorator(func):
+        operation = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            io_before = _io_counters() if io else None
+            memory_before = tracemalloc.get_traced_memory()[0] if metrics.memory_tracing else None
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = func(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                duration = time.perf_counter() - started
+                io_after = _io_counters() if io_before is not None else None
+                io_delta = (io_after[0] - io_before[0], io_after[1] - io_before[1]) if io_after else None
+                memory_delta = None
+                if memory_before is not None and metrics.memory_tracing:
+                    memory_delta = tracemalloc.get_traced_memory()[0] - memory_before
+                metrics.record(operation, duration, ok, io_delta, memory_delta)
+        return wrapper
+    return decorator
+
+
+def instrument_methods(prefix, skip=(), io=False):
+    """
+    Dekorator klasy opakowujący jej publiczne metody w instrumented (io jak w instrumented).
+
+    Pomija generatory i metody z listy skip (np. menedżery kontekstu), dla
+    których czas wywołania nie odpowiada czasowi pracy.
+    """
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith('_') or attr in skip or not inspect.isfunction(value):
+                continue
+            if inspect.isgeneratorfunction(value):
+                continue
+            setattr(cls, attr, instrumented(f"{prefix}.{attr}", io=io)(value))
+        return cls
+    return decorator
+
+
+def _configure_from_env():
+    if os.environ.get(PROFILE_ENV) == "1":
+        metrics.start_capture()
+    report_path = os.environ.get(REPORT_ENV)
+    if report_path:
+        def _dump_at_exit():
+            if metrics._profiler is not None or metrics.memory_tracing:
+                metrics.stop_capture()
+            metrics.dump(None if report_path == "-" else report_path)
+        atexit.register(_dump_at_exit)
+
+
+_configure_from_env()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wyświetla raport pomiarów operacji zapisany w JSON.")
+    parser.add_argument("report", help=f"Plik raportu (zapisany przy {REPORT_ENV}=ścieżka).")
+    args = parser.parse_args(argv)
+    try:
+        with open(args.report, encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Nie można wczytać raportu: {e}")
+        return 1
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
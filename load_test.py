@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+from benchmarks.datagen import FIRST_CUSTOMER_ID, PRODUCT_WORDS, customer_email, generate_dataset
+
+SERVICE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "service.py")
+STARTUP_TIMEOUT = 120
+
+
+class _Connection:
+    """Połączenie HTTP/1.1 keep-alive jednego wirtualnego klienta."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, payload=None, token=None):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b"" if payload is None else json.dumps(payload).encode('utf-8')
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n"
+        if token:
+            head += f"Authorization: Bearer {token}\r\n"
+        self._writer.write(head.encode('latin-1') + b"\r\n" + body)
+        await self._writer.drain()
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        data = await self._reader.readexactly(length)
+        return status, json.loads(data) if data else None
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+async def _client(host, port, email, requests, products, rng, timings):
+    """Wykonuje scenariusz klienta: logowanie, wyszukiwanie, koszyk, zakup i uzupełnianie stanów."""
+    connection = _Connection(host, port)
+
+    async def call(name, method, path, payload=None, token=None):
+        started = time.perf_counter()
+        try:
+            status, data = await connection.request(method, path, payload, token)
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            status, data = 0, None
+        timings.setdefault(name, []).append((time.perf_counter() - started, status))
+        return status, data
+
+    try:
+        token = None
+        if email:
+            status, data = await call("login", "POST", "/login", {"email": email})
+            token = data.get("token") if status == 200 else None
+        for _ in range(requests):
+            product_id = rng.randint(1, products)
+            roll = rng.random()
+            if roll < 0.35:
+                await call("search", "GET", f"/products?q={quote(rng.choice(PRODUCT_WORDS)[:rng.randint(2, 5)])}")
+            elif roll < 0.55:
+                await call("product", "GET", f"/products/{product_id}")
+            elif roll < 0.65:
+                await call("stock", "POST", f"/products/{product_id}/stock", {"change": rng.randint(1, 3)})
+            elif token is None:
+                await call("page", "GET", f"/products?offset={rng.randrange(products)}&limit=20")
+            elif roll < 0.85:
+                await call("cart_add", "POST", "/cart", {"product_id": product_id, "quantity": 1}, token)
+            elif roll < 0.95:
+                await call("cart", "GET", "/cart", token=token)
+            else:
+                await call("checkout", "POST", "/checkout", token=token)
+    finally:
+        connection.close()
+
+
+async def _run_clients(host, port, clients, requests, products, emails, seed):
+    timings = {}
+    tasks = [
+        _client(host, port, emails[i % len(emails)] if emails else None, requests, products,
+                random.Random(seed + i), timings)
+        for i in range(clients)
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return timings, time.perf_counter() - started
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(host, port, process, timeout=STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Usługa zakończyła działanie przed rozpoczęciem testu.")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Usługa nie uruchomiła się w wyznaczonym czasie.")
+
+
+def format_report(timings, elapsed):
+    """Formatuje liczbę żądań, przepustowość i percentyle czasu odpowiedzi dla każdego typu żądania."""
+    total = sum(len(samples) for samples in timings.values())
+    lines = [f"Żądania: {total} w {elapsed:.2f} s ({total / elapsed if elapsed else 0:.0f} żądań/s)",
+             f"{'Żądanie':<10} {'liczba':>7} {'błędy':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    for name, samples in sorted(timings.items()):
+        durations = sorted(d * 1000 for d, _ in samples)
+        errors = sum(1 for _, status in samples if status == 0 or status >= 500)
+        cuts = statistics.quantiles(durations, n=100, method='inclusive') if len(durations) > 1 else durations * 99
+        lines.append(f"{name:<10} {len(samples):>7} {errors:>6} {cuts[49]:>9.2f} {cuts[94]:>9.2f} {cuts[98]:>9.2f}")
+    return "\n".join(lines)
+
+
+def run(clients=50, requests=40, products=10000, customers=1000, host=None, port=None, emails=None,
+        storage_backend=None, seed=0):
+    """
+    Uruchamia test obciążeniowy usługi HTTP (service.py).
+
+    Bez host/port generuje dane w katalogu tymczasowym i uruchamia usługę
+    w osobnym procesie; w przeciwnym razie łączy się z działającą usługą
+    (logowanie tylko dla podanych adresów e-mail).
+
+    Returns:
+        bool: True, jeśli żadne żądanie nie zakończyło się błędem serwera lub połączenia.
+    """
+    if host is not None:
+        timings, elapsed = asyncio.run(_run_clients(host, port, clients, requests, products, emails, seed))
+    else:
+        with tempfile.TemporaryDirectory(prefix="frog-load-") as root:
+            generate_dataset(root, products=products, customers=customers, history_customers=0, seed=seed)
+            port = _free_port()
+            env = dict(os.environ)
+            if storage_backend == 'sqlite':
+                subprocess.run([sys.executable, os.path.join(os.path.dirname(SERVICE_SCRIPT), "storage.py"),
+                                "migrate"], cwd=root, check=True, stdout=subprocess.DEVNULL)
+                env.update(FROG_STORAGE="sqlite", FROG_DB="database/frog.db")
+            process = subprocess.Popen([sys.executable, SERVICE_SCRIPT, "--port", str(port)], cwd=root, env=env,
+                                       stdout=subprocess.DEVNULL)
+            try:
+                _wait_for_port("127.0.0.1", port, process)
+                emails = [customer_email(FIRST_CUSTOMER_ID + i) for i in range(min(clients, customers))]
+                timings, elapsed = asyncio.run(
+                    _run_clients("127.0.0.1", port, clients, requests, products, emails, seed))
+            finally:
+                process.terminate()
+                process.wait()
+    print(format_report(timings, elapsed))
+    return not any(status == 0 or status >= 500 for samples in timings.values() for _, status in samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test obciążeniowy usługi HTTP sklepu.")
+    parser.add_argument("--clients", type=int, default=50, help="Liczba równoczesnych klientów.")
+    parser.add_argument("--requests", type=int, default=40, help="Liczba żądań na klienta.")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--backend", choices=("file", "sqlite"), default="file")
+    parser.add_argument("--url", help="Adres działającej usługi (host:port); domyślnie uruchamiana jest nowa.")
+    parser.add_argument("--email", action="append", help="E-mail klienta do logowania (z --url, można powtarzać).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    host = port = None
+    if args.url:
+        host, _, port = args.url.rpartition(":")
+        port = int(port)
+    ok = run(args.clients, args.requests, args.products, args.customers, host, port, args.email,
+             args.backend, args.seed)
+    sys.exit(0 if ok else 1)
@@ -1,23 +1,967 @@
-import pandas as pd
+import atexit
+import bisect
+import heapq
+import itertools
+import math
+import numbers
 import os
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from contextlib import contextmanager
 
+import numpy as np
+from instrumentation import instrumented
+from catalog import ProductCatalog
+from storage import PRODUCT_COLUMNS, get_backend, read_table, write_table_chunks
+from utils import normalize_id
+
+RESERVATION_TTL = 15 * 60
+LOW_STOCK_THRESHOLD = 5
+STAT_PERCENTILES = (50, 90, 99)
+SEARCH_LIMIT = 10
+FUZZY_CANDIDATES = 50
+STOCK_FLUSH_INTERVAL = 2.0
+STOCK_FLUSH_RECORDS = 1000
+WRITE_BEHIND_ENV = "FROG_WRITE_BEHIND"
+
+
+def _is_number(value):
+    # numbers.Real obejmuje też typy NumPy (np.int64, np.float32), ale nie wartości logiczne.
+    return (isinstance(value, numbers.Real) and not isinstance(value, (bool, np.bool_))
+            and not math.isnan(value))
+
+
+def _percentile(sorted_values, q):
+    """Percentyl z interpolacją liniową (jak numpy.percentile) dla posortowanej listy."""
+    if not sorted_values:
+        return math.nan
+    k = (len(sorted_values) - 1) * q / 100
+    f = math.floor(k)
+    c = min(f + 1, len(sorted_values) - 1)
+    return sorted_values[f] + (sorted_values[c] - sorted_values[f]) * (k - f)
+
+
+class ProductStats:
+    """
+    Statystyki katalogu aktualizowane przyrostowo przy każdej zmianie produktu.
+
+    Liczniki i sumy zmieniają się w O(1), a posortowane listy cen i stanów
+    (bisect) dają minimum, maksimum, percentyle i liczbę niskich stanów bez
+    przeglądania katalogu. Wartości niebędące liczbami są pomijane, tak jak
+    w pandas.
+    """
+
+    def __init__(self, products=(), low_stock_threshold=LOW_STOCK_THRESHOLD):
+        products = list(products)
+        self.low_stock_threshold = low_stock_threshold
+        self.count = len(products)
+        self._prices = sorted(p['price'] for p in products if _is_number(p['price']))
+        self._stocks = sorted(p['stock'] for p in products if _is_number(p['stock']))
+        self.price_sum = sum(self._prices)
+        self.stock_sum = sum(self._stocks)
+        self.inventory_value = sum(self._value(p) for p in products)
+
+    @classmethod
+    def from_catalog(cls, catalog, low_stock_threshold=LOW_STOCK_THRESHOLD):
+        """Buduje statystyki wektorowo z kolumn katalogu (ProductCatalog), bez tworzenia obiektów produktów."""
+        prices, stocks = catalog.column('price'), catalog.column('stock')
+        if prices.dtype == object or stocks.dtype == object:
+            return cls(catalog.values(), low_stock_threshold)
+        stats = cls((), low_stock_threshold)
+        stats.count = len(catalog)
+        valid = ~np.isnan(prices)
+        stats._prices = np.sort(prices[valid]).tolist()
+        stats._stocks = np.sort(stocks).tolist()
+        stats.price_sum = sum(stats._prices)
+        stats.stock_sum = sum(stats._stocks)
+        stats.inventory_value = float(np.dot(prices[valid], stocks[valid]))
+        return stats
+
+    @staticmethod
+    def _value(product):
+        if _is_number(product['price']) and _is_number(product['stock']):
+            return product['price'] * product['stock']
+        return 0.0
+
+    def add(self, product):
+        self.count += 1
+        if _is_number(product['price']):
+            bisect.insort(self._prices, product['price'])
+            self.price_sum += product['price']
+        if _is_number(product['stock']):
+            bisect.insort(self._stocks, product['stock'])
+            self.stock_sum += product['stock']
+        self.inventory_value += self._value(product)
+
+    def discard(self, product):
+        self.count -= 1
+        if _is_number(product['price']):
+            del self._prices[bisect.bisect_left(self._prices, product['price'])]
+            self.price_sum -= product['price']
+        if _is_number(product['stock']):
+            del self._stocks[bisect.bisect_left(self._stocks, product['stock'])]
+            self.stock_sum -= product['stock']
+        self.inventory_value -= self._value(product)
+
+    def snapshot(self):
+        """Zwraca statystyki jako słownik (pusty, gdy katalog jest pusty)."""
+        if not self.count:
+            return {}
+        prices, stocks = self._prices, self._stocks
+        stats = {
+            'min_price': prices[0] if prices else math.nan,
+            'max_price': prices[-1] if prices else math.nan,
+            'avg_price': self.price_sum / len(prices) if prices else math.nan,
+            'min_stock': stocks[0] if stocks else math.nan,
+            'max_stock': stocks[-1] if stocks else math.nan,
+            'avg_stock': self.stock_sum / len(stocks) if stocks else math.nan,
+            'count': self.count,
+            'total_stock': self.stock_sum,
+            'inventory_value': self.inventory_value,
+            'low_stock_count': bisect.bisect_left(stocks, self.low_stock_threshold),
+        }
+        for q in STAT_PERCENTILES:
+            stats[f'price_p{q}'] = _percentile(prices, q)
+            stats[f'stock_p{q}'] = _percentile(stocks, q)
+        return stats
+
+    @classmethod
+    def recompute(cls, products, low_stock_threshold=LOW_STOCK_THRESHOLD):
+        """Liczy te same statystyki od zera przy użyciu pandas (do weryfikacji)."""
+        import pandas as pd
+        df = pd.DataFrame(list(products), columns=PRODUCT_COLUMNS)
+        if df.empty:
+            return {}
+        price = pd.to_numeric(df['price'], errors='coerce')
+        stock = pd.to_numeric(df['stock'], errors='coerce')
+        stats = {
+            'min_price': price.min(),
+            'max_price': price.max(),
+            'avg_price': price.mean(),
+            'min_stock': stock.min(),
+            'max_stock': stock.max(),
+            'avg_stock': stock.mean(),
+            'count': len(df),
+            'total_stock': stock.sum(),
+            'inventory_value': (price * stock).sum(),
+            'low_stock_count': int((stock < low_stock_threshold).sum()),
+        }
+        for q in STAT_PERCENTILES:
+            stats[f'price_p{q}'] = price.quantile(q / 100)
+            stats[f'stock_p{q}'] = stock.quantile(q / 100)
+        return stats
+
+
+_FOLD = str.maketrans("ąćęłńóśźżĄĆĘŁŃÓŚŹŻ", "acelnoszzACELNOSZZ")
+_TOKEN = re.compile(r"[0-9a-z]+")
+
+
+def fold_text(text):
+    """Sprowadza tekst do małych liter bez polskich (i innych) znaków diakrytycznych."""
+    text = str(text).translate(_FOLD)
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def _tokens(text):
+    return _TOKEN.findall(fold_text(text))
+
+
+def _trigrams(token):
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b, max_distance):
+    """Odległość Damerau-Levenshteina (z przestawieniem sąsiednich liter), przerywana po przekroczeniu max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = ca != cb
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class ProductSearchIndex:
+    """
+    Indeks wyszukiwania produktów po nazwie i ID.
+
+    Nazwy są dzielone na słowa po sprowadzeniu do małych liter bez znaków
+    diakrytycznych ("Żółty ser" -> "zolty", "ser"). Indeks odwrócony mapuje
+    słowo na listę ID produktów posortowaną od najkrótszej nazwy, a
+    posortowana lista słów (bisect) służy jak drzewo prefiksowe do
+    wyszukiwania po początku słowa. Słowa, do których nie pasuje żaden
+    prefiks, są szukane w przybliżeniu: kandydaci z indeksu trigramów są
+    sprawdzani odległością edycyjną.
+    """
+
+    def __init__(self, products=()):
+        self._postings = {}
+        self._words = []
+        self._trigrams = {}
+        self._names = {}
+        self._product_tokens = {}
+        # Budowa hurtowa: listy ID i słów są sortowane raz na końcu zamiast wstawiania po jednym.
+        for product in products:
+            product_id = product['id']
+            tokens = self._tokenize(product_id, product['name'])
+            self._names[product_id] = str(product['name'])
+            self._product_tokens[product_id] = tokens
+            for token in tokens:
+                self._postings.setdefault(token, []).append(product_id)
+        for ids in self._postings.values():
+            ids.sort(key=self._rank)
+        self._words = sorted(self._postings)
+        for token in self._words:
+            for gram in _trigrams(token):
+                self._trigrams.setdefault(gram, set()).add(token)
+
+    def __len__(self):
+        return len(self._names)
+
+    @staticmethod
+    def _tokenize(product_id, name):
+        return tuple(dict.fromkeys(_tokens(name) + [fold_text(product_id)]))
+
+    def _rank(self, product_id):
+        return len(self._names[product_id]), str(product_id)
+
+    def add(self, product):
+        product_id = product['id']
+        if product_id in self._names:
+            self.discard(product)
+        name = str(product['name'])
+        tokens = self._tokenize(product_id, name)
+        self._names[product_id] = name
+        self._product_tokens[product_id] = tokens
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = []
+                bisect.insort(self._words, token)
+                for gram in _trigrams(token):
+                    self._trigrams.setdefault(gram, set()).add(token)
+            bisect.insort(ids, product_id, key=self._rank)
+
+    def discard(self, product):
+        product_id = product['id']
+        tokens = self._product_tokens.pop(product_id, None)
+        if tokens is None:
+            return
+        rank = self._rank(product_id)
+        for token in tokens:
+            ids = self._postings[token]
+            del ids[bisect.bisect_left(ids, rank, key=self._rank)]
+            if not ids:
+                del self._postings[token]
+                del self._words[bisect.bisect_left(self._words, token)]
+                for gram in _trigrams(token):
+                    tokens_with_gram = self._trigrams[gram]
+                    tokens_with_gram.discard(token)
+                    if not tokens_with_gram:
+                        del self._trigrams[gram]
+        del self._names[product_id]
+
+    def _prefix_matches(self, term):
+        start = bisect.bisect_left(self._words, term)
+        end = bisect.bisect_left(self._words, term + "\uffff")
+        return self._words[start:end]
+
+    def _fuzzy_matches(self, term):
+        max_distance = 1 if len(term) <= 4 else 2
+        shared = {}
+        for gram in _trigrams(term):
+            for token in self._trigrams.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        candidates = heapq.nlargest(FUZZY_CANDIDATES, shared, key=shared.get)
+        matches = []
+        for token in candidates:
+            # Słowo dłuższe od zapytania porównujemy też po przycięciu, żeby literówka w prefiksie pasowała.
+            distance = min(_edit_distance(term, token, max_distance),
+                           _edit_distance(term, token[:len(term)], max_distance))
+            if distance <= max_distance:
+                matches.append((token, distance))
+        return matches
+
+    def _term_matches(self, term):
+        """Zwraca słowo indeksu -> wynik dopasowania dla jednego słowa zapytania."""
+        matches = {token: 1.0 if token == term else 0.6 + 0.3 * len(term) / len(token)
+                   for token in self._prefix_matches(term)}
+        if not matches and len(term) >= 3:
+            matches = {token: 0.5 - 0.15 * distance for token, distance in self._fuzzy_matches(term)}
+        return matches
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        Zwraca ID najlepiej pasujących produktów (najwyżej limit), od najlepszego.
+
+        Każde słowo zapytania musi pasować do produktu: dokładnie (najwyższy
+        wynik), jako prefiks słowa lub ID, albo w przybliżeniu (literówki).
+        Przy równym wyniku wygrywa krótsza nazwa. Puste zapytanie zwraca
+        pierwsze produkty katalogu.
+        """
+        terms = list(dict.fromkeys(_tokens(query)))
+        if not terms:
+            return list(itertools.islice(self._names, limit))
+        matches = [self._term_matches(term) for term in terms]
+        if not all(matches):
+            return []
+        if len(matches) == 1:
+            return self._search_single(matches[0], limit)
+        return self._search_all(matches, limit)
+
+    def _groups(self, matches):
+        """
+        Zwraca grupy (wynik, ID produktów) od najlepszego wyniku; w grupie ID idą od najkrótszej nazwy.
+
+        Listy ID są posortowane od najkrótszej nazwy, więc grupę wystarczy scalić
+        leniwie. Każdy produkt pojawia się raz, w grupie swojego najlepszego wyniku.
+        """
+        by_score = {}
+        for token, score in matches.items():
+            by_score.setdefault(score, []).append(self._postings[token])
+        seen = set()
+
+        def unique(lists):
+            for product_id in heapq.merge(*lists, key=self._rank):
+                if product_id not in seen:
+                    seen.add(product_id)
+                    yield product_id
+
+        for score in sorted(by_score, reverse=True):
+            yield score, unique(by_score[score])
+
+    def _search_single(self, matches, limit):
+        found = []
+        for _, product_ids in self._groups(matches):
+            found.extend(itertools.islice(product_ids, limit - len(found)))
+            if len(found) >= limit:
+                break
+        return found
+
+    def _search_all(self, matches, limit):
+        # Produkty są przeglądane grupami wyniku słowa o najmniejszej liczbie
+        # trafień, a pozostałe słowa są sprawdzane na słowach samego produktu.
+        # Grupę przerywamy, gdy nawet najlepsze dopasowanie pozostałych słów nie
+        # pozwoli wejść do pierwszych limit wyników (przy remisie wygrywa
+        # krótsza nazwa, a w grupie nazwy są coraz dłuższe).
+        sizes = [sum(len(self._postings[token]) for token in m) for m in matches]
+        driver = sizes.index(min(sizes))
+        best_others = sum(max(m.values()) for i, m in enumerate(matches) if i != driver)
+        top = []
+        for score, product_ids in self._groups(matches[driver]):
+            bound = score + best_others
+            if len(top) >= limit and bound < -top[-1][0] - 1e-9:
+                break
+            for product_id in product_ids:
+                rank = self._rank(product_id)
+                if len(top) >= limit:
+                    worst_total, worst_rank = -top[-1][0], top[-1][1]
+                    if bound < worst_total - 1e-9 or (bound <= worst_total + 1e-9 and rank > worst_rank):
+                        break
+                tokens = self._product_tokens[product_id]
+                term_scores = []
+                for i, m in enumerate(matches):
+                    best = score if i == driver else max(map(m.get, tokens, itertools.repeat(0)))
+                    if not best:
+                        break
+                    term_scores.append(best)
+                else:
+                    # Wynik jest sumowany zawsze w kolejności słów zapytania, żeby był powtarzalny co do bitu.
+                    bisect.insort(top, (-sum(term_scores), rank, product_id))
+                    del top[limit:]
+        return [product_id for _, _, product_id in top]
+
+
+class ProductStore:
+    """
+    Katalog produktów trzymany w pamięci (kolumnowo, catalog.ProductCatalog) i zindeksowany po ID.
+
+    Dane są wczytywane z backendu tylko przy pierwszym odczycie oraz wtedy, gdy
+    zmieni je inny proces (zmiana znacznika products_signature). Odczyty są
+    obsługiwane z pamięci, a każda zmiana jest zapisywana z powrotem do backendu.
+
+    Zmiany są wykonywane pod międzyprocesową blokadą backendu, a stan jest
+    odświeżany po jej uzyskaniu, więc równoległe procesy nie gubią aktualizacji.
+
+    Przy zapisie opóźnionym (write_behind) zmiany stanów magazynowych są od
+    razu widoczne w pamięci i dopisywane do dziennika backendu z fsync, a
+    katalog jest zapisywany zbiorczo (flush) co flush_interval sekund lub po
+    flush_records rekordach dziennika. Każdy odczyt po katalogu z backendu
+    odtwarza dziennik, więc inne procesy i ponowne uruchomienie po awarii
+    widzą wszystkie zatwierdzone zmiany.
+    """
+
+    def __init__(self, file_path, backend=None, write_behind=None):
+        self.file_path = file_path
+        self.backend = backend or get_backend(file_path)
+        self._products = ProductCatalog()
+        self._stats = ProductStats()
+        self._search = None
+        self._signature = None
+        self._loaded = False
+        if write_behind is None:
+            setting = os.environ.get(WRITE_BEHIND_ENV)
+            write_behind = self.backend.WRITE_BEHIND if setting is None else setting != "0"
+        self.write_behind = write_behind
+        self.flush_interval = STOCK_FLUSH_INTERVAL
+        self.flush_records = STOCK_FLUSH_RECORDS
+        self._log_position = None
+        self._log_records = 0
+        self._dirty = set()
+        self._flush_timer = None
+        # Stan katalogu w pamięci jest zmieniany także przez wątek zapisu zbiorczego (threading.Timer).
+        self._lock = threading.RLock()
+        if write_behind:
+            atexit.register(self._flush_at_exit)
+
+    @contextmanager
+    def lock(self):
+        """Blokada do zmian katalogu: międzyprocesowa blokada backendu i blokada stanu w pamięci."""
+        with self.backend.lock(), self._lock:
+            yield
+
+    def exists(self):
+        return self.backend.products_exist()
+
+    def load(self, force=False):
+        """Wczytuje katalog, jeśli nie ma go w pamięci lub zmienił go inny proces."""
+        with self._lock:
+            self._load(force)
+
+    def _load(self, force):
+        signature = self.backend.products_signature()
+        if force or not self._loaded or signature != self._signature:
+            # Niezmieniony plik jest wczytywany z migawki binarnej (mmap), bez pandas i parsowania pliku.
+            self._products = self.backend.load_catalog_snapshot()
+            if self._products is None:
+                self._products = self._read_catalog()
+                self.backend.save_catalog_snapshot(self._products, signature)
+            self._stats = ProductStats.from_catalog(self._products)
+            self._search = None
+            self._signature = signature
+            self._loaded = True
+            self._log_position = None
+            self._log_records = 0
+            self._dirty = set()
+        if self.write_behind:
+            self._replay_stock_log()
+
+    def _read_catalog(self):
+        df = self.backend.load_product_columns(PRODUCT_COLUMNS).reindex(columns=PRODUCT_COLUMNS)
+        if df['id'].dtype.kind not in 'iu':
+            df['id'] = [normalize_id(value) for value in df['id']]
+        # Przy powtórzonym ID obowiązuje ostatni wiersz, a miejsce w kolejności - pierwszy.
+        first = ~df['id'].duplicated()
+        if not first.all():
+            df = df.drop_duplicates('id', keep='last').set_index('id').reindex(df['id'][first]).reset_index()
+        return ProductCatalog.from_frame(df)
+
+    def _replay_stock_log(self):
+        """Nanosi na katalog w pamięci rekordy dziennika stanów dopisane od ostatniego odczytu."""
+        records, position = self.backend.read_stock_log(self._log_position)
+        if position is not None and self._log_position is not None and position[0] != self._log_position[0]:
+            self._log_records = 0
+        self._log_position = position
+        self._log_records += len(records)
+        for record in records:
+            product = self._products.get(normalize_id(record['id']))
+            if product is None or product.stock == record['stock']:
+                continue
+            self._set_stock(product, record['stock'])
+            self._dirty.add(product.id)
+
+    def _set_stock(self, product, stock):
+        """Ustawia stan produktu w katalogu i statystykach."""
+        self._stats.discard(product)
+        product.stock = stock
+        self._products.set_stock(product.id, stock)
+        self._stats.add(product)
+
+    def save(self, changed=None, removed=()):
+        """
+        Zapisuje katalog; changed/removed pozwalają backendowi zapisać tylko zmiany.
+
+        Przy zapisie opóźnionym zapisywane są też zaległe zmiany stanów, a dziennik jest czyszczony.
+        """
+        if self._dirty and changed is not None:
+            changed = set(changed) | self._dirty
+        self.backend.write_products(self._products, changed=changed, removed=removed)
+        self._signature = self.backend.products_signature()
+        if self.write_behind:
+            self.backend.clear_stock_log()
+            self._log_position = None
+            self._log_records = 0
+            self._dirty = set()
+
+    def flush(self):
+        """
+        Zapisuje zaległe zmiany stanów z dziennika do katalogu jednym zapisem.
+
+        Returns:
+            int: Liczba zapisanych produktów.
+        """
+        with self.lock():
+            timer, self._flush_timer = self._flush_timer, None
+            if timer is not None:
+                timer.cancel()
+            self.load()
+            count = len(self._dirty)
+            if count:
+                self.save(changed=())
+            elif self._log_position is not None:
+                # Dziennik zawiera tylko zmiany już obecne w katalogu.
+                self.backend.clear_stock_log()
+                self._log_position = None
+                self._log_records = 0
+            return count
+
+    def pending_changes(self):
+        """Zwraca liczbę produktów ze zmianami stanu czekającymi na zapis do katalogu."""
+        with self._lock:
+            return len(self._dirty)
+
+    def _schedule_flush(self):
+        if self._log_records >= self.flush_records:
+            self.flush()
+        elif self._flush_timer is None:
+            timer = threading.Timer(self.flush_interval, self._timed_flush)
+            timer.daemon = True
+            self._flush_timer = timer
+            timer.start()
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Błąd podczas zapisu zmian stanów magazynowych: {e}")
+
+    def _flush_at_exit(self):
+        if self.pending_changes():
+            try:
+                self.flush()
+            except Exception:
+                # Zmiany pozostają w dzienniku i zostaną odtworzone przy następnym odczycie.
+                pass
+
+    def __len__(self):
+        self.load()
+        return len(self._products)
+
+    def __contains__(self, product_id):
+        self.load()
+        return normalize_id(product_id) in self._products
+
+    def get(self, product_id):
+        """Zwraca kopię produktu o podanym ID lub None."""
+        product = self.product(product_id)
+        return product.to_dict() if product is not None else None
+
+    def product(self, product_id):
+        """Zwraca produkt o podanym ID jako obiekt Product (bez budowania słownika) lub None."""
+        self.load()
+        return self._products.get(normalize_id(product_id))
+
+    def page(self, offset=0, limit=50):
+        """Zwraca kopie produktów od pozycji offset (maksymalnie limit) w kolejności z pliku."""
+        self.load()
+        return [p.to_dict() for p in self._products.values(offset, offset + limit)]
+
+    def stock(self, product_id):
+        """
+        Zwraca stan magazynowy produktu lub None, gdy produkt nie istnieje.
+
+        Gdy katalogu nie ma w pamięci (lub zmienił go inny proces), wczytywane
+        są tylko kolumny id i stock, bez budowania pełnego katalogu.
+        """
+        product_id = normalize_id(product_id)
+        with self._lock:
+            if self._loaded and self.backend.products_signature() == self._signature:
+                self.load()
+                product = self._products.get(product_id)
+                return None if product is None else product.stock
+        levels = self.backend.load_product_columns(['id', 'stock'])
+        ids = levels['id']
+        if ids.dtype == object:
+            ids = ids.map(normalize_id)
+        found = np.flatnonzero(ids.to_numpy() == product_id)
+        if not len(found):
+            return None
+        stock = int(levels['stock'].iat[found[0]])
+        if self.write_behind:
+            for record in self.backend.read_stock_log()[0]:
+                if normalize_id(record['id']) == product_id:
+                    stock = record['stock']
+        return stock
+
+    def all(self):
+        """Zwraca kopie wszystkich produktów w kolejności z pliku."""
+        self.load()
+        return [p.to_dict() for p in self._products.values()]
+
+    def frame(self):
+        """Zwraca katalog jako DataFrame."""
+        self.load()
+        return self._products.frame()
+
+    def column(self, name):
+        """Zwraca kolumnę katalogu (id, price, stock) jako widok NumPy tylko do odczytu, bez kopiowania."""
+        self.load()
+        return self._products.column(name)
+
+    def filter(self, min_price=None, max_price=None, in_stock=None):
+        """
+        Zwraca produkty z ceną w zakresie [min_price, max_price] i, opcjonalnie, na stanie (in_stock=True)
+        lub wyprzedane (in_stock=False) jako DataFrame; warunki są liczone wektorowo na kolumnach katalogu.
+        """
+        self.load()
+        return self._products.filter(min_price, max_price, in_stock)
+
+    def stats(self):
+        """Zwraca statystyki katalogu w O(1) (bez przeliczania całego katalogu)."""
+        self.load()
+        return self._stats.snapshot()
+
+    def verify_stats(self, rel_tol=1e-9):
+        """
+        Porównuje statystyki przyrostowe z pełnym przeliczeniem.
+
+        Returns:
+            dict: Rozbieżności (klucz -> (przyrostowo, pełne przeliczenie)); pusty, gdy wszystko się zgadza.
+        """
+        import pandas as pd
+        self.load()
+        incremental = self._stats.snapshot()
+        full = ProductStats.recompute(self._products.frame().to_dict('records'), self._stats.low_stock_threshold)
+        mismatches = {}
+        for key in set(incremental) | set(full):
+            a, b = incremental.get(key), full.get(key)
+            if a is None or b is None:
+                mismatches[key] = (a, b)
+            elif pd.isna(a) and pd.isna(b):
+                continue
+            elif not math.isclose(float(a), float(b), rel_tol=rel_tol, abs_tol=1e-6):
+                mismatches[key] = (a, b)
+        return mismatches
+
+    def _rebuild_stats(self):
+        self._stats = ProductStats.from_catalog(self._products, self._stats.low_stock_threshold)
+        self._search = None
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        Wyszukuje produkty po nazwie lub ID (prefiksy, literówki, bez polskich znaków).
+
+        Indeks jest budowany przy pierwszym wyszukiwaniu i aktualizowany przy zmianach katalogu.
+
+        Returns:
+            list: Kopie najlepiej pasujących produktów, od najlepszego.
+        """
+        self.load()
+        if self._search is None:
+            self._search = ProductSearchIndex(self._products.values())
+        return [self._products[pid].to_dict() for pid in self._search.search(query, limit)]
+
+    def iter_frames(self, chunksize=10000):
+        """Zwraca katalog porcjami po chunksize wierszy jako kolejne DataFrame."""
+        self.load()
+        products = self._products
+        for start in range(0, len(products), chunksize):
+            yield products.frame(start, start + chunksize)
+
+    def add(self, product_data):
+        """Dodaje produkt. Zwraca False, jeśli produkt o tym ID już istnieje."""
+        with self.lock():
+            self.load()
+            product = dict(product_data)
+            product['id'] = normalize_id(product['id'])
+            if product['id'] in self._products:
+                return False
+            self._products.put(product)
+            self._stats.add(product)
+            if self._search is not None:
+                self._search.add(product)
+            try:
+                self.save(changed=[product['id']])
+            except Exception:
+                self._products.remove([product['id']])
+                self._stats.discard(product)
+                self._search = None
+                raise
+            return True
+
+    def remove(self, identifier, by='id'):
+        """Usuwa produkty pasujące do ID lub nazwy. Zwraca liczbę usuniętych produktów."""
+        import pandas as pd
+        with self.lock():
+            self.load()
+            if by == 'id':
+                identifier = normalize_id(identifier)
+                removed = [identifier] if identifier in self._products else []
+            elif by == 'name':
+                name = identifier.lower()
+                names = pd.Series(self._products.column('name'), dtype=object).astype(str).str.lower()
+                removed = self._products.column('id')[(names == name).to_numpy()].tolist()
+            else:
+                raise ValueError(f"Nieprawidłowy typ identyfikatora: {by}")
+            if not removed:
+                return 0
+            backup = self._products.copy()
+            for pid in removed:
+                self._stats.discard(self._products[pid])
+                if self._search is not None:
+                    self._search.discard(self._products[pid])
+            self._products.remove(removed)
+            try:
+                self.save(changed=(), removed=removed)
+            except Exception:
+                self._products = backup
+                self._rebuild_stats()
+                raise
+            return len(removed)
+
+    def bulk_upsert(self, df, overwrite=False):
+        """
+        Dodaje wiele produktów jednym zapisem, opcjonalnie nadpisując istniejące.
+
+        Args:
+            df (pd.DataFrame): Kolumny id, name, price, stock; ID muszą być unikalne.
+            overwrite (bool): Czy nadpisywać produkty, które już istnieją.
+
+        Returns:
+            pd.Series: Maska wierszy, których ID istniało już w katalogu.
+        """
+        with self.lock():
+            self.load()
+            exists = df['id'].isin(self._products.column('id'))
+            to_write = df if overwrite else df[~exists]
+            if to_write.empty:
+                return exists
+            records = to_write.to_dict('records')
+            backup = self._products.copy()
+            for record in records:
+                previous = self._products.get(record['id'])
+                if previous is not None:
+                    self._stats.discard(previous)
+                    if self._search is not None:
+                        self._search.discard(previous)
+                self._products.put(record)
+                self._stats.add(record)
+                if self._search is not None:
+                    self._search.add(record)
+            try:
+                self.save(changed=[record['id'] for record in records])
+            except Exception:
+                self._products = backup
+                self._rebuild_stats()
+                raise
+            return exists
+
+    def update_stock(self, product_id, quantity_change):
+        """
+        Zmienia stan magazynowy produktu.
+
+        Raises:
+            KeyError: Gdy produkt nie istnieje.
+            ValueError: Gdy wynikowy stan byłby ujemny.
+        """
+        return self.apply_stock_changes([(product_id, quantity_change)])[normalize_id(product_id)]
+
+    def apply_stock_changes(self, changes):
+        """
+        Zmienia stany wielu produktów w jednym przebiegu i zapisuje katalog raz.
+
+        Powtarzające się ID są sumowane. Jeśli którakolwiek zmiana jest
+        niepoprawna lub zapis się nie powiedzie, żaden stan nie jest zmieniany.
+        Przy zapisie opóźnionym zmiany są zapisywane do dziennika stanów,
+        a katalog zapisuje się później (flush).
+
+        Args:
+            changes: Pary (ID, zmiana stanu) lub słownik ID -> zmiana stanu.
+
+        Returns:
+            dict: Nowe stany magazynowe (ID -> stan).
+
+        Raises:
+            KeyError: Gdy któryś produkt nie istnieje.
+            ValueError: Gdy któryś wynikowy stan byłby ujemny.
+        """
+        with self.lock():
+            self.load()
+            new_stocks = {}
+            for product_id, quantity_change in aggregate_quantities(changes).items():
+                new_stock = self._products[product_id].stock + quantity_change
+                if new_stock < 0:
+                    raise ValueError("Nie można zaktualizować stanu - wynikowy stan byłby ujemny.")
+                new_stocks[product_id] = new_stock
+            if not new_stocks:
+                return new_stocks
+
+            if self.write_behind:
+                self._log_position = self.backend.append_stock_log([
+                    {'id': pid, 'stock': new_stock, 'delta': new_stock - self._products[pid].stock}
+                    for pid, new_stock in new_stocks.items()
+                ])
+                self._log_records += len(new_stocks)
+                for product_id, new_stock in new_stocks.items():
+                    self._set_stock(self._products[product_id], new_stock)
+                self._dirty.update(new_stocks)
+                self._schedule_flush()
+                return new_stocks
+
+            previous = {pid: self._products[pid].stock for pid in new_stocks}
+            for product_id, new_stock in new_stocks.items():
+                self._set_stock(self._products[product_id], new_stock)
+            try:
+                self.save(changed=list(new_stocks))
+            except Exception:
+                for product_id, stock in previous.items():
+                    self._products.set_stock(product_id, stock)
+                self._rebuild_stats()
+                raise
+            return new_stocks
+
+    def reserve(self, items, ttl=RESERVATION_TTL):
+        """
+        Rezerwuje towar: od razu zdejmuje go ze stanu i zapisuje rezerwację.
+
+        Rezerwacja musi zostać zatwierdzona (commit) albo zwolniona (release).
+        Rezerwacje starsze niż ttl sekund są zwalniane przy kolejnej rezerwacji.
+
+        Returns:
+            str: ID rezerwacji.
+
+        Raises:
+            KeyError: Gdy któryś produkt nie istnieje.
+            ValueError: Gdy brakuje towaru na którąkolwiek pozycję.
+        """
+        lines = aggregate_quantities(items)
+        with self.lock():
+            reservations = self._expire_reservations()
+            # Najpierw stan, potem zapis rezerwacji: awaria pomiędzy nimi może
+            # najwyżej zablokować towar, ale nigdy nie dopuści do nadsprzedaży.
+            self.apply_stock_changes({pid: -quantity for pid, quantity in lines.items()})
+            reservation_id = uuid.uuid4().hex
+            reservations[reservation_id] = {
+                'expires': time.time() + ttl,
+                'items': [[pid, quantity] for pid, quantity in lines.items()]
+            }
+            self.backend.write_reservations(reservations)
+            return reservation_id
+
+    @contextmanager
+    def purchase(self, items):
+        """
+        Zdejmuje towar ze stanu na czas zapisu zakupu, bez zapisywania rezerwacji.
+
+        Blokada katalogu jest trzymana do końca bloku with, więc rezerwacja
+        żyje tylko w pamięci i plik rezerwacji nie jest przepisywany. Gdy blok
+        zakończy się wyjątkiem, towar wraca na stan. Awaria procesu w trakcie
+        bloku może najwyżej zablokować towar, ale nie dopuści do nadsprzedaży.
+
+        Raises:
+            KeyError: Gdy któryś produkt nie istnieje.
+            ValueError: Gdy brakuje towaru na którąkolwiek pozycję.
+        """
+        lines = aggregate_quantities(items)
+        with self.lock():
+            self._expire_reservations()
+            self.apply_stock_changes({pid: -quantity for pid, quantity in lines.items()})
+            try:
+                yield
+            except BaseException:
+                self.apply_stock_changes(lines)
+                raise
+
+    def commit(self, reservation_id):
+        """
+        Zatwierdza rezerwację; zarezerwowany towar pozostaje zdjęty ze stanu.
+
+        Raises:
+            KeyError: Gdy rezerwacja nie istnieje lub wygasła.
+        """
+        with self.lock():
+            reservations = self.backend.load_reservations()
+            del reservations[reservation_id]
+            self.backend.write_reservations(reservations)
+
+    def release(self, reservation_id):
+        """Zwalnia rezerwację i przywraca towar na stan. Zwraca False, jeśli rezerwacji już nie ma."""
+        with self.lock():
+            reservations = self.backend.load_reservations()
+            reservation = reservations.pop(reservation_id, None)
+            if reservation is None:
+                return False
+            self.backend.write_reservations(reservations)
+            self.apply_stock_changes(reservation['items'])
+            return True
+
+    def _expire_reservations(self):
+        """Zwalnia przeterminowane rezerwacje i zwraca pozostałe. Wymaga blokady."""
+        reservations = self.backend.load_reservations()
+        now = time.time()
+        expired = [rid for rid, r in reservations.items() if r['expires'] <= now]
+        if not expired:
+            return reservations
+        returned = [item for rid in expired for item in reservations.pop(rid)['items']]
+        self.backend.write_reservations(reservations)
+        self.apply_stock_changes([(pid, quantity) for pid, quantity in returned if pid in self])
+        return reservations
+
+
+@instrumented()
+def aggregate_quantities(items):
+    """
+    Sumuje ilości dla powtarzających się ID produktów, zachowując kolejność.
+
+    Args:
+        items: Pary (ID, ilość) lub słownik ID -> ilość.
+
+    Returns:
+        dict: ID -> łączna ilość.
+    """
+    if isinstance(items, dict):
+        items = items.items()
+    totals = {}
+    for product_id, quantity in items:
+        product_id = normalize_id(product_id)
+        totals[product_id] = totals.get(product_id, 0) + quantity
+    return totals
+
+
+_stores = {}
+
+
+@instrumented()
+def get_store(file_path):
+    """Zwraca współdzielony ProductStore dla backendu obsługującego dany plik."""
+    backend = get_backend(file_path)
+    store = _stores.get(backend)
+    if store is None:
+        store = _stores[backend] = ProductStore(file_path, backend)
+    return store
+
+@instrumented()
 def add_product(file_path, product_data):
     """
     Dodaje produkt do pliku Excel.
     """
     try:
-        if os.path.exists(file_path):
-            df = pd.read_excel(file_path, engine='openpyxl')
-        else:
-            df = pd.DataFrame(columns=['id', 'name', 'price', 'stock'])
-
-        if product_data['id'] in df['id'].values:
+        if not get_store(file_path).add(product_data):
             print(f"Produkt o ID {product_data['id']} już istnieje.")
             return False
-
-        new_row = pd.DataFrame([product_data])
-        df = pd.concat([df, new_row], ignore_index=True)
-        df.to_excel(file_path, index=False, engine='openpyxl')
         print(f"Dodano produkt: {product_data['name']}")
         return True
     except PermissionError as e:
@@ -27,17 +971,18 @@ def add_product(file_path, product_data):
         print(f"Błąd podczas dodawania produktu: {e}")
         return False
 
+@instrumented()
 def remove_product(file_path, identifier, by='id'):
     """
     Usuwa produkt na podstawie ID lub nazwy.
     """
     try:
-        if not os.path.exists(file_path):
+        store = get_store(file_path)
+        if not store.exists():
             print(f"Plik {file_path} nie istnieje.")
             return False
 
-        df = pd.read_excel(file_path, engine='openpyxl')
-        if df.empty:
+        if len(store) == 0:
             print("Brak produktów do usunięcia.")
             return False
 
@@ -47,20 +992,14 @@ def remove_product(file_path, identifier, by='id'):
             except ValueError:
                 print(f"Nieprawidłowy format ID: {identifier}")
                 return False
-            original_len = len(df)
-            df = df[df['id'] != identifier]
-            if len(df) < original_len:
-                df.to_excel(file_path, index=False, engine='openpyxl')
+            if store.remove(identifier, by='id'):
                 print(f"Usunięto produkt o ID {identifier}.")
                 return True
             else:
                 print(f"Nie znaleziono produktu o ID {identifier}.")
                 return False
         elif by == 'name':
-            original_len = len(df)
-            df = df[df['name'].str.lower() != identifier.lower()]
-            if len(df) < original_len:
-                df.to_excel(file_path, index=False, engine='openpyxl')
+            if store.remove(identifier, by='name'):
                 print(f"Usunięto produkt o nazwie {identifier}.")
                 return True
             else:
@@ -76,28 +1015,27 @@ def remove_product(file_path, identifier, by='id'):
         print(f"Błąd podczas usuwania produktu: {e}")
         return False
 
+@instrumented()
 def get_product_stats(file_path):
     """
     Zwraca statystyki produktów.
+
+    Poza minimum, maksimum i średnią ceny oraz stanu zawiera liczbę produktów,
+    łączny stan, wartość magazynu, liczbę produktów o stanie poniżej
+    LOW_STOCK_THRESHOLD oraz percentyle (price_p50, stock_p90 itd.).
+    Statystyki są utrzymywane przyrostowo, więc ich pobranie nie przelicza katalogu.
     """
     try:
-        if not os.path.exists(file_path):
+        store = get_store(file_path)
+        if not store.exists():
             print(f"Plik {file_path} nie istnieje.")
             return {}
 
-        df = pd.read_excel(file_path, engine='openpyxl')
-        if df.empty:
+        stats = store.stats()
+        if not stats:
             print("Brak produktów do analizy.")
             return {}
 
-        stats = {
-            'min_price': df['price'].min(),
-            'max_price': df['price'].max(),
-            'avg_price': df['price'].mean(),
-            'min_stock': df['stock'].min(),
-            'max_stock': df['stock'].max(),
-            'avg_stock': df['stock'].mean()
-        }
         return stats
     except PermissionError as e:
         print(f"Błąd uprawnień podczas odczytu pliku {file_path}: {e}")
@@ -106,22 +1044,71 @@ def get_product_stats(file_path):
         print(f"Błąd podczas obliczania statystyk: {e}")
         return {}
 
+@instrumented()
+def verify_product_stats(file_path):
+    """
+    Sprawdza, czy statystyki przyrostowe zgadzają się z pełnym przeliczeniem.
+
+    Returns:
+        bool: True, jeśli statystyki są spójne.
+    """
+    try:
+        mismatches = get_store(file_path).verify_stats()
+        for key, (incremental, full) in mismatches.items():
+            print(f"Niespójna statystyka {key}: przyrostowo {incremental}, pełne przeliczenie {full}")
+        return not mismatches
+    except Exception as e:
+        print(f"Błąd podczas weryfikacji statystyk: {e}")
+        return False
+
+@instrumented()
+def search_products(file_path, query, limit=SEARCH_LIMIT):
+    """
+    Wyszukuje produkty po nazwie lub ID.
+
+    Returns:
+        list: Najlepiej pasujące produkty (najwyżej limit); pusta lista w przypadku błędu.
+    """
+    try:
+        return get_store(file_path).search(query, limit)
+    except Exception as e:
+        print(f"Błąd podczas wyszukiwania produktów: {e}")
+        return []
+
+@instrumented()
+def filter_products(file_path, min_price=None, max_price=None, in_stock=None):
+    """
+    Zwraca produkty z ceną w zakresie [min_price, max_price], opcjonalnie tylko na stanie (in_stock=True)
+    lub tylko wyprzedane (in_stock=False).
+
+    Filtr jest liczony wektorowo na kolumnach katalogu w pamięci.
+
+    Returns:
+        pd.DataFrame: Pasujące produkty; pusta ramka w przypadku błędu.
+    """
+    import pandas as pd
+    try:
+        return get_store(file_path).filter(min_price, max_price, in_stock)
+    except Exception as e:
+        print(f"Błąd podczas filtrowania produktów: {e}")
+        return pd.DataFrame(columns=PRODUCT_COLUMNS)
+
+@instrumented()
 def check_product_availability(file_path, product_id, quantity=1):
     """
     Sprawdza dostępność produktu na podstawie ID.
     """
     try:
-        if not os.path.exists(file_path):
+        store = get_store(file_path)
+        if not store.exists():
             print(f"Plik {file_path} nie istnieje.")
             return False
 
-        df = pd.read_excel(file_path, engine='openpyxl')
-        product = df[df['id'] == product_id]
-        if product.empty:
+        stock = store.stock(product_id)
+        if stock is None:
             print(f"Produkt o ID {product_id} nie istnieje.")
             return False
 
-        stock = product['stock'].iloc[0]
         return stock >= quantity
     except PermissionError as e:
         print(f"Błąd uprawnień podczas odczytu pliku {file_path}: {e}")
@@ -130,21 +1117,22 @@ def check_product_availability(file_path, product_id, quantity=1):
         print(f"Błąd podczas sprawdzania dostępności: {e}")
         return False
 
+@instrumented()
 def get_all_products(file_path):
     """
     Zwraca listę wszystkich produktów jako słowniki.
     """
     try:
-        if not os.path.exists(file_path):
+        store = get_store(file_path)
+        if not store.exists():
             print(f"Plik {file_path} nie istnieje.")
             return []
 
-        df = pd.read_excel(file_path, engine='openpyxl')
-        if df.empty:
+        products = store.all()
+        if not products:
             print("Brak produktów.")
             return []
 
-        products = df.to_dict('records')
         return products
     except PermissionError as e:
         print(f"Błąd uprawnień podczas odczytu pliku {file_path}: {e}")
@@ -154,6 +1142,7 @@ def get_all_products(file_path):
         return []
 
 
+@instrumented()
 def update_product_stock(file_path, product_id, quantity_change):
     """
     Aktualizuje stan magazynowy produktu.
@@ -167,24 +1156,55 @@ def update_product_stock(file_path, product_id, quantity_change):
         bool: True jeśli aktualizacja się powiodła, False w przeciwnym razie.
     """
     try:
-        if not os.path.exists(file_path):
+        store = get_store(file_path)
+        if not store.exists():
             print(f"Plik {file_path} nie istnieje.")
             return False
 
-        df = pd.read_excel(file_path, engine='openpyxl')
-        product_index = df[df['id'] == product_id].index
-        if len(product_index) == 0:
+        if product_id not in store:
             print(f"Produkt o ID {product_id} nie istnieje.")
             return False
 
-        current_stock = df.at[product_index[0], 'stock']
-        new_stock = current_stock + quantity_change
-        if new_stock < 0:
-            print("Nie można zaktualizować stanu - wynikowy stan byłby ujemny.")
+        try:
+            store.update_stock(product_id, quantity_change)
+        except ValueError as e:
+            print(e)
+            return False
+        return True
+    except PermissionError as e:
+        print(f"Błąd uprawnień podczas aktualizacji stanu: {e}")
+        return False
+    except Exception as e:
+        print(f"Błąd podczas aktualizacji stanu: {e}")
+        return False
+
+
+@instrumented()
+def update_products_stock(file_path, changes):
+    """
+    Aktualizuje stany magazynowe wielu produktów jednym zapisem.
+
+    Args:
+        file_path (str): Ścieżka do pliku z produktami.
+        changes: Pary (ID, zmiana stanu) lub słownik ID -> zmiana stanu.
+
+    Returns:
+        bool: True jeśli wszystkie zmiany zostały zapisane, False jeśli żadna nie została wprowadzona.
+    """
+    try:
+        store = get_store(file_path)
+        if not store.exists():
+            print(f"Plik {file_path} nie istnieje.")
             return False
 
-        df.at[product_index[0], 'stock'] = new_stock
-        df.to_excel(file_path, index=False, engine='openpyxl')
+        try:
+            store.apply_stock_changes(changes)
+        except KeyError as e:
+            print(f"Produkt o ID {e.args[0]} nie istnieje.")
+            return False
+        except ValueError as e:
+            print(e)
+            return False
         return True
     except PermissionError as e:
         print(f"Błąd uprawnień podczas aktualizacji stanu: {e}")
@@ -192,3 +1212,171 @@ def update_product_stock(file_path, product_id, quantity_change):
     except Exception as e:
         print(f"Błąd podczas aktualizacji stanu: {e}")
         return False
+
+
+@instrumented()
+def reserve_products(file_path, items, ttl=RESERVATION_TTL):
+    """
+    Rezerwuje produkty, zdejmując je ze stanu do czasu zatwierdzenia lub zwolnienia.
+
+    Args:
+        file_path (str): Ścieżka do pliku z produktami.
+        items: Pary (ID, ilość) lub słownik ID -> ilość.
+        ttl (float): Czas ważności rezerwacji w sekundach.
+
+    Returns:
+        str: ID rezerwacji lub None, jeśli rezerwacja się nie powiodła.
+    """
+    try:
+        return get_store(file_path).reserve(items, ttl)
+    except KeyError as e:
+        print(f"Produkt o ID {e.args[0]} nie istnieje.")
+        return None
+    except ValueError as e:
+        print(e)
+        return None
+    except PermissionError as e:
+        print(f"Błąd uprawnień podczas rezerwacji produktów: {e}")
+        return None
+    except Exception as e:
+        print(f"Błąd podczas rezerwacji produktów: {e}")
+        return None
+
+@instrumented()
+def commit_reservation(file_path, reservation_id):
+    """
+    Zatwierdza rezerwację produktów.
+    """
+    try:
+        get_store(file_path).commit(reservation_id)
+        return True
+    except KeyError:
+        print(f"Rezerwacja {reservation_id} nie istnieje lub wygasła.")
+        return False
+    except Exception as e:
+        print(f"Błąd podczas zatwierdzania rezerwacji: {e}")
+        return False
+
+@instrumented()
+def release_reservation(file_path, reservation_id):
+    """
+    Zwalnia rezerwację i przywraca produkty na stan.
+    """
+    try:
+        if not get_store(file_path).release(reservation_id):
+            print(f"Rezerwacja {reservation_id} nie istnieje lub wygasła.")
+            return False
+        return True
+    except Exception as e:
+        print(f"Błąd podczas zwalniania rezerwacji: {e}")
+        return False
+
+
+def _bulk_products(file_path, source, overwrite):
+    """Wspólna część bulk_add_products i bulk_upsert_products."""
+    import pandas as pd
+    df = read_table(source)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    missing = [c for c in PRODUCT_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Brak kolumn w danych wejściowych: {', '.join(missing)}")
+    df = df[PRODUCT_COLUMNS].reset_index(drop=True)
+
+    ids = pd.to_numeric(df['id'], errors='coerce')
+    prices = pd.to_numeric(df['price'], errors='coerce')
+    stocks = pd.to_numeric(df['stock'], errors='coerce')
+    names = df['name'].fillna('').astype(str).str.strip()
+    invalid = (ids.isna() | (ids % 1 != 0) | prices.isna() | (prices < 0)
+               | stocks.isna() | (stocks < 0) | (stocks % 1 != 0) | (names == ''))
+    duplicate = ~invalid & ids.duplicated(keep='first')
+    valid = ~invalid & ~duplicate
+
+    clean = pd.DataFrame({
+        'id': ids[valid].astype('int64'),
+        'name': names[valid],
+        'price': prices[valid].astype('float64'),
+        'stock': stocks[valid].astype('int64')
+    })
+    exists = pd.Series(False, index=df.index)
+    exists.loc[clean.index] = get_store(file_path).bulk_upsert(clean, overwrite=overwrite).to_numpy()
+
+    status = np.select(
+        [invalid, duplicate, exists & overwrite, exists],
+        ['invalid', 'duplicate', 'updated', 'exists'],
+        default='added'
+    )
+    messages = {
+        'invalid': "Nieprawidłowe dane produktu.",
+        'duplicate': "Powtórzone ID w danych wejściowych.",
+        'exists': "Produkt o tym ID już istnieje.",
+        'updated': "Zaktualizowano produkt.",
+        'added': "Dodano produkt."
+    }
+    report = pd.DataFrame({'row': df.index, 'id': df['id'], 'status': status})
+    report['message'] = report['status'].map(messages)
+    return report.to_dict('records')
+
+@instrumented()
+def bulk_add_products(file_path, source):
+    """
+    Dodaje wiele produktów naraz; istniejące ID są pomijane.
+
+    Args:
+        file_path (str): Ścieżka do pliku z produktami.
+        source: Plik CSV/Parquet/Excel, DataFrame lub iterowalny zbiór słowników z kolumnami id, name, price, stock.
+
+    Returns:
+        list: Raport dla każdego wiersza wejściowego (row, id, status, message) lub None w razie błędu.
+    """
+    try:
+        report = _bulk_products(file_path, source, overwrite=False)
+        added = sum(1 for r in report if r['status'] == 'added')
+        print(f"Dodano {added} z {len(report)} produktów.")
+        return report
+    except PermissionError as e:
+        print(f"Błąd uprawnień podczas zapisu do pliku {file_path}: {e}")
+        return None
+    except Exception as e:
+        print(f"Błąd podczas masowego dodawania produktów: {e}")
+        return None
+
+@instrumented()
+def bulk_upsert_products(file_path, source):
+    """
+    Dodaje nowe i nadpisuje istniejące produkty naraz.
+
+    Args:
+        file_path (str): Ścieżka do pliku z produktami.
+        source: Plik CSV/Parquet/Excel, DataFrame lub iterowalny zbiór słowników z kolumnami id, name, price, stock.
+
+    Returns:
+        list: Raport dla każdego wiersza wejściowego (row, id, status, message) lub None w razie błędu.
+    """
+    try:
+        report = _bulk_products(file_path, source, overwrite=True)
+        written = sum(1 for r in report if r['status'] in ('added', 'updated'))
+        print(f"Zapisano {written} z {len(report)} produktów.")
+        return report
+    except PermissionError as e:
+        print(f"Błąd uprawnień podczas zapisu do pliku {file_path}: {e}")
+        return None
+    except Exception as e:
+        print(f"Błąd podczas masowej aktualizacji produktów: {e}")
+        return None
+
+@instrumented()
+def export_products(file_path, dest, chunksize=10000):
+    """
+    Eksportuje katalog do pliku CSV lub Parquet porcjami po chunksize wierszy.
+
+    Returns:
+        int: Liczba wyeksportowanych produktów lub None w razie błędu.
+    """
+    try:
+        return write_table_chunks(get_store(file_path).iter_frames(chunksize), dest)
+    except PermissionError as e:
+        print(f"Błąd uprawnień podczas zapisu do pliku {dest}: {e}")
+        return None
+    except Exception as e:
+        print(f"Błąd podczas eksportu produktów: {e}")
+        return None
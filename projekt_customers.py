@@ -1,22 +1,140 @@
-import csv
-import os
 import datetime
-import pandas as pd
-from product_management import  update_product_stock
-CUSTOMER_FILE = "database/customer.csv"
-DATABASE_DIR = "database/DATABASE"
+import threading
+import uuid
+import numpy as np
+from instrumentation import instrumented
+from product_management import aggregate_quantities, get_store
+from promotions import get_promotions
+from storage import CUSTOMER_FIELDS, CUSTOMER_FILE, DATABASE_DIR, PRODUCTS_FILE, get_backend, read_table, write_table_chunks
 
+
+def _backend():
+    """Zwraca backend przechowujący klientów i historię zakupów."""
+    return get_backend(PRODUCTS_FILE, CUSTOMER_FILE, DATABASE_DIR)
+
+class CustomerIndex:
+    """
+    Indeks klientów w pamięci: wyszukiwanie po znormalizowanym e-mailu, ID i nazwie w O(1).
+
+    Śledzi też największe ID liczbowe, więc nowe ID nie wymaga przeglądania listy.
+    """
+
+    def __init__(self, customers=()):
+        self._by_id = {}
+        self._by_email = {}
+        self._by_name = {}
+        self.max_id = 200
+        for customer in customers:
+            self.add(customer)
+
+    @staticmethod
+    def normalize(value):
+        return str(value).strip().lower()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def add(self, customer):
+        customer_id = str(customer["ID"])
+        self._by_id[customer_id] = customer
+        self._by_email.setdefault(self.normalize(customer["E-MAIL"]), []).append(customer_id)
+        self._by_name.setdefault(self.normalize(customer["NAME"]), []).append(customer_id)
+        if customer_id.isdigit():
+            self.max_id = max(self.max_id, int(customer_id))
+
+    def remove(self, customer_id):
+        """Usuwa klienta z indeksu i zwraca go (lub None)."""
+        customer = self._by_id.pop(str(customer_id), None)
+        if customer is None:
+            return None
+        for index, key in ((self._by_email, customer["E-MAIL"]), (self._by_name, customer["NAME"])):
+            ids = index.get(self.normalize(key), [])
+            if customer["ID"] in ids:
+                ids.remove(customer["ID"])
+            if not ids:
+                index.pop(self.normalize(key), None)
+        return customer
+
+    def by_id(self, customer_id):
+        return self._by_id.get(str(customer_id))
+
+    def by_email(self, email):
+        """Zwraca pierwszego klienta o podanym e-mailu (bez względu na wielkość liter)."""
+        ids = self._by_email.get(self.normalize(email))
+        return self._by_id[ids[0]] if ids else None
+
+    def emails(self):
+        """Zwraca znormalizowane e-maile wszystkich klientów."""
+        return self._by_email.keys()
+
+    def by_name(self, name):
+        return [self._by_id[i] for i in self._by_name.get(self.normalize(name), [])]
+
+    def match(self, identifier):
+        """Zwraca klientów, których ID lub nazwa pasuje do identyfikatora."""
+        matches = self.by_name(identifier)
+        customer = self.by_id(identifier)
+        if customer is not None and customer not in matches:
+            matches.insert(0, customer)
+        return matches
+
+    def next_id(self):
+        return str(self.max_id + 1)
+
+    def customers(self):
+        return list(self._by_id.values())
+
+    def iter_customers(self):
+        """
+        Zwraca klientów po kolei, bez kopiowania ich listy.
+
+        Kolejność ustalana jest na początku (lista ID); klienci usunięci
+        w trakcie przeglądania są pomijani.
+        """
+        for customer_id in list(self._by_id):
+            customer = self._by_id.get(customer_id)
+            if customer is not None:
+                yield customer
+
+
+_customer_index = None
+_customer_index_signature = None
+_customer_index_lock = threading.RLock()
+
+
+@instrumented()
+def get_customer_index():
+    """
+    Zwraca współdzielony indeks klientów.
+
+    Indeks jest budowany raz i aktualizowany przy rejestracji oraz usuwaniu;
+    przebudowuje się tylko wtedy, gdy dane klientów zmieni inny proces.
+    """
+    global _customer_index, _customer_index_signature
+    with _customer_index_lock:
+        signature = _backend().customers_signature()
+        if _customer_index is None or signature != _customer_index_signature:
+            _customer_index = CustomerIndex(load_customers())
+            _customer_index_signature = signature
+        return _customer_index
+
+
+def _customer_index_written():
+    """Zapamiętuje znacznik danych po zapisie wykonanym przez ten proces."""
+    global _customer_index_signature
+    _customer_index_signature = _backend().customers_signature()
+
+
+def _invalidate_customer_index():
+    global _customer_index
+    _customer_index = None
+
+
+@instrumented()
 def load_customers():
-    """Wczytuje klientów z pliku CSV jako listę słowników."""
+    """Wczytuje klientów z pliku CSV (wraz z dziennikiem zmian) jako listę słowników."""
     try:
-        with open(CUSTOMER_FILE, newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            expected_headers = {"ID", "NAME", "E-MAIL", "PHONE", "CREATED", "UPDATED"}
-            if not expected_headers.issubset(reader.fieldnames):
-                raise ValueError(f"Nieprawidłowe nagłówki w pliku {CUSTOMER_FILE}. Oczekiwano: {expected_headers}")
-            return list(reader)
-    except FileNotFoundError:
-        return []
+        return _backend().load_customers()
     except PermissionError as e:
         print(f"Błąd uprawnień podczas odczytu pliku {CUSTOMER_FILE}: {e}")
         return []
@@ -27,14 +145,23 @@ def load_customers():
         print(f"Błąd podczas wczytywania klientów: {e}")
         return []
 
+
+def iter_customers():
+    """
+    Zwraca kolejnych klientów z indeksu w pamięci (np. do podglądu porcjami w VirtualTable).
+
+    Indeks jest budowany tylko przy pierwszym użyciu lub po zmianie danych
+    przez inny proces; kolejne podglądy nie czytają pliku ani nie kopiują listy klientów.
+    """
+    yield from get_customer_index().iter_customers()
+
+
+@instrumented()
 def save_customers(customers):
     """Zapisuje listę słowników klientów do pliku CSV."""
     try:
-        os.makedirs(os.path.dirname(CUSTOMER_FILE), exist_ok=True)
-        with open(CUSTOMER_FILE, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=["ID", "NAME", "E-MAIL", "PHONE", "CREATED", "UPDATED"])
-            writer.writeheader()
-            writer.writerows(customers)
+        _backend().save_customers(customers)
+        _invalidate_customer_index()
     except PermissionError as e:
         print(f"Błąd uprawnień podczas zapisu do pliku {CUSTOMER_FILE}: {e}")
         raise
@@ -42,6 +169,20 @@ def save_customers(customers):
         print(f"Błąd podczas zapisu klientów: {e}")
         raise
 
+@instrumented()
+def compact_customers():
+    """Scala dziennik zmian klientów z plikiem CSV."""
+    try:
+        _backend().compact_customers()
+        return True
+    except PermissionError as e:
+        print(f"Błąd uprawnień podczas kompaktowania pliku {CUSTOMER_FILE}: {e}")
+        return False
+    except Exception as e:
+        print(f"Błąd podczas kompaktowania klientów: {e}")
+        return False
+
+@instrumented()
 def generate_new_id(customers):
     """Generuje nowe unikalne ID."""
     try:
@@ -57,26 +198,29 @@ def generate_new_id(customers):
         print(f"Błąd podczas generowania nowego ID: {e}")
         raise
 
+@instrumented()
 def register_customer(name, email, phone=None):
     """
     Rejestruje nowego klienta i zapisuje do bazy danych.
     """
     try:
-        customers = load_customers()
-        new_id = generate_new_id(customers)
-        now = datetime.date.today().isoformat()
-
-        new_customer = {
-            "ID": new_id,
-            "NAME": name,
-            "E-MAIL": email,
-            "PHONE": phone or "",
-            "CREATED": now,
-            "UPDATED": now
-        }
+        with _customer_index_lock:
+            index = get_customer_index()
+            new_id = index.next_id()
+            now = datetime.date.today().isoformat()
+
+            new_customer = {
+                "ID": new_id,
+                "NAME": name,
+                "E-MAIL": email,
+                "PHONE": phone or "",
+                "CREATED": now,
+                "UPDATED": now
+            }
 
-        customers.append(new_customer)
-        save_customers(customers)
+            _backend().insert_customer(new_customer)
+            index.add(new_customer)
+            _customer_index_written()
         print(f"Zarejestrowano klienta {name} z ID {new_id}.")
         return new_id
     except PermissionError as e:
@@ -86,18 +230,107 @@ def register_customer(name, email, phone=None):
         print(f"Błąd podczas rejestracji klienta: {e}")
         return None
 
+@instrumented()
+def bulk_register_customers(source):
+    """
+    Rejestruje wielu klientów naraz jednym zapisem.
+
+    Wiersze bez imienia lub e-maila oraz e-maile powtórzone w danych albo już
+    zarejestrowane są pomijane.
+
+    Args:
+        source: Plik CSV/Parquet/Excel, DataFrame lub iterowalny zbiór słowników z kolumnami NAME, E-MAIL i opcjonalnie PHONE.
+
+    Returns:
+        list: Raport dla każdego wiersza wejściowego (row, id, email, status, message) lub None w razie błędu.
+    """
+    import pandas as pd
+    try:
+        df = read_table(source, as_text=True)
+        df.columns = [str(c).strip().upper() for c in df.columns]
+        if "NAME" not in df.columns or "E-MAIL" not in df.columns:
+            raise ValueError("Dane wejściowe muszą zawierać kolumny NAME i E-MAIL.")
+        df = df.reset_index(drop=True)
+        names = df["NAME"].fillna("").astype(str).str.strip()
+        emails = df["E-MAIL"].fillna("").astype(str).str.strip()
+        phones = df["PHONE"].fillna("").astype(str).str.strip() if "PHONE" in df.columns else pd.Series("", index=df.index)
+        normalized = emails.str.lower()
+
+        with _customer_index_lock:
+            index = get_customer_index()
+            invalid = (names == "") | (emails == "")
+            duplicate = ~invalid & normalized.duplicated(keep="first")
+            exists = ~invalid & ~duplicate & normalized.isin(list(index.emails()))
+            new = ~invalid & ~duplicate & ~exists
+
+            ids = pd.Series("", index=df.index)
+            ids[new] = (np.arange(new.sum()) + index.max_id + 1).astype(str)
+            now = datetime.date.today().isoformat()
+            new_customers = pd.DataFrame({
+                "ID": ids[new], "NAME": names[new], "E-MAIL": emails[new], "PHONE": phones[new],
+                "CREATED": now, "UPDATED": now
+            }, columns=CUSTOMER_FIELDS).to_dict("records")
+            if new_customers:
+                _backend().insert_customers(new_customers)
+                for customer in new_customers:
+                    index.add(customer)
+                _customer_index_written()
+
+        status = np.select([invalid, duplicate, exists], ["invalid", "duplicate", "exists"], default="added")
+        messages = {
+            "invalid": "Brak imienia lub e-maila.",
+            "duplicate": "Powtórzony e-mail w danych wejściowych.",
+            "exists": "Klient o tym e-mailu już istnieje.",
+            "added": "Zarejestrowano klienta."
+        }
+        report = pd.DataFrame({"row": df.index, "id": ids, "email": emails, "status": status})
+        report["message"] = report["status"].map(messages)
+        print(f"Zarejestrowano {len(new_customers)} z {len(report)} klientów.")
+        return report.to_dict("records")
+    except PermissionError as e:
+        print(f"Błąd uprawnień podczas rejestracji klientów: {e}")
+        return None
+    except Exception as e:
+        print(f"Błąd podczas masowej rejestracji klientów: {e}")
+        return None
+
+@instrumented()
+def export_customers(dest, chunksize=10000):
+    """
+    Eksportuje klientów do pliku CSV lub Parquet porcjami po chunksize wierszy.
+
+    Returns:
+        int: Liczba wyeksportowanych klientów lub None w razie błędu.
+    """
+    import pandas as pd
+    try:
+        customers = get_customer_index().customers()
+        chunks = (pd.DataFrame(customers[start:start + chunksize], columns=CUSTOMER_FIELDS)
+                  for start in range(0, len(customers), chunksize))
+        return write_table_chunks(chunks, dest)
+    except PermissionError as e:
+        print(f"Błąd uprawnień podczas zapisu do pliku {dest}: {e}")
+        return None
+    except Exception as e:
+        print(f"Błąd podczas eksportu klientów: {e}")
+        return None
+
+@instrumented()
 def remove_customer(identifier):
     """
     Usuwa klienta na podstawie ID lub nazwy.
     """
     try:
-        customers = load_customers()
-        original_count = len(customers)
-
-        customers = [c for c in customers if c["ID"] != str(identifier) and c["NAME"].lower() != str(identifier).lower()]
-        save_customers(customers)
+        with _customer_index_lock:
+            index = get_customer_index()
+            removed = [c["ID"] for c in index.match(identifier)]
+            if removed:
+                _backend().delete_customers(removed)
+                for customer_id in removed:
+                    index.remove(customer_id)
+                _customer_index_written()
 
-        if len(customers) < original_count:
+        if removed:
             print(f"Usunięto klienta o identyfikatorze: {identifier}.")
             return True
         else:
@@ -110,62 +343,97 @@ def remove_customer(identifier):
         print(f"Błąd podczas usuwania klienta: {e}")
         return False
 
+@instrumented()
 def login(email):
     """
     Loguje użytkownika po e-mailu.
     """
-    customers = load_customers()
-    for c in customers:
-        if c["E-MAIL"].lower() == email.lower():
-            print(f"Zalogowano jako {c['NAME']} (ID: {c['ID']})")
-            return c
+    c = get_customer_index().by_email(email)
+    if c is not None:
+        print(f"Zalogowano jako {c['NAME']} (ID: {c['ID']})")
+        return dict(c)
     print("Nie znaleziono użytkownika.")
     return None
 
 
-def purchase_products(cart, user):
+@instrumented()
+def purchase_products(cart, user, expected_total=None, products_file=PRODUCTS_FILE):
     """
     Zapisuje zakupione produkty do pliku historii i aktualizuje stan magazynowy.
+
+    Oprócz czytelnego wiersza historii zapisywane są pozycje zakupu
+    (ID zakupu, data, klient, ID produktu, ilość, cena jednostkowa).
+
+    Koszyk może być listą par (ID, ilość) albo obiektem cart.Cart; wtedy
+    ceny uwzględniają ustawione w nim rabaty. Następnie naliczane są
+    promocje z database/promotions.json (promotions.py), a jako cena
+    jednostkowa zapisywana jest cena po wszystkich rabatach.
+
+    Pozycje koszyka z tym samym ID są sumowane. Cały koszyk jest zdejmowany
+    ze stanu w jednym przebiegu pod blokadą międzyprocesową trzymaną do
+    końca zapisu historii (ProductStore.purchase), więc katalog zapisywany
+    jest raz, a plik rezerwacji wcale; jeśli zapis historii się nie
+    powiedzie, towar wraca na stan.
+
+    Args:
+        expected_total (float): Kwota pokazana klientowi; gdy ceny w katalogu zmieniły
+            się od tego czasu i kwota byłaby inna, zakup nie jest zapisywany.
+        products_file (str): Katalog produktów, z którego pochodzi koszyk.
     """
     if not user:
         print("Brak zalogowanego użytkownika.")
         return None
 
     try:
-        products_df = pd.read_excel("database/products.xlsx", engine="openpyxl")
-        total_price = 0.0
-        purchase_details = []
+        store = get_store(products_file)
+        lines = aggregate_quantities(cart)
+        unit_price = getattr(cart, 'unit_price', None)
+        products = {}
+        prices = {}
 
-        for product_id, quantity in cart:
-            product = products_df[products_df['id'] == product_id]
-            if product.empty:
+        for product_id, quantity in lines.items():
+            product = store.get(product_id)
+            if product is None:
                 print(f"Produkt o ID {product_id} nie istnieje.")
                 return None
-            stock = int(product['stock'].iloc[0])
+            stock = int(product['stock'])
             if quantity > stock:
-                print(f"Brak wystarczającej ilości produktu {product['name'].iloc[0]} (dostępne: {stock}).")
+                print(f"Brak wystarczającej ilości produktu {product['name']} (dostępne: {stock}).")
                 return None
+            price = float(product['price'])
+            if unit_price is not None:
+                price = unit_price(product_id, price)
+            products[product_id] = product
+            prices[product_id] = price
 
-        for product_id, quantity in cart:
-            product = products_df[products_df['id'] == product_id]
-            product_name = product['name'].iloc[0]
-            price = float(product['price'].iloc[0])
-            total_price += price * quantity
-            purchase_details.append(f"{product_name} (ID: {product_id}, Ilość: {quantity}, Cena: {price:.2f})")
-
-            if not update_product_stock("database/products.xlsx", product_id, -quantity):
-                print(f"Nie udało się zaktualizować stanu dla produktu {product_name}")
-                return None
+        priced = get_promotions().evaluate(lines, prices.__getitem__, user['ID'])
+        total_price = priced['total']
+        if expected_total is not None and round(total_price, 2) != round(expected_total, 2):
+            print(f"Ceny zmieniły się od wyświetlenia koszyka (nowa kwota: {total_price:.2f} PLN).")
+            return None
+        purchase_details = []
+        purchase_lines = []
+        for line in priced['lines']:
+            product_id, quantity, price = line['id'], line['quantity'], line['unit_price']
+            name = products[product_id]['name']
+            purchase_details.append(f"{name} (ID: {product_id}, Ilość: {quantity}, Cena: {price:.2f})")
+            purchase_lines.append({
+                "PRODUCT_ID": product_id, "NAME": name, "QUANTITY": quantity, "UNIT_PRICE": price
+            })
 
-        os.makedirs(DATABASE_DIR, exist_ok=True)
-        history_file = os.path.join(DATABASE_DIR, f"{user['ID']}_history.csv")
         now = datetime.datetime.now().isoformat(sep=' ', timespec='seconds')
-
-        with open(history_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            if os.path.getsize(history_file) == 0:
-                writer.writerow(["DATE", "PRODUCTS", "TOTAL_PRICE"])
-            writer.writerow([now, "; ".join(purchase_details), f"{total_price:.2f}"])
+        purchase_id = uuid.uuid4().hex
+        for line in purchase_lines:
+            line.update({"PURCHASE_ID": purchase_id, "DATE": now, "CUSTOMER_ID": str(user['ID'])})
+        try:
+            # Towar jest zdjęty ze stanu pod blokadą katalogu tylko na czas zapisu historii
+            # i wraca na stan, jeśli zapis się nie powiedzie.
+            with store.purchase(lines):
+                _backend().append_purchase(user['ID'], [now, "; ".join(purchase_details), f"{total_price:.2f}"],
+                                           purchase_lines)
+        except (KeyError, ValueError) as e:
+            print(f"Nie udało się zarezerwować produktów: {e}")
+            return None
 
         print(f"Zakup zapisany dla {user['NAME']} (Całkowita cena: {total_price:.2f}).")
         return total_price
@@ -175,3 +443,19 @@ def purchase_products(cart, user):
     except Exception as e:
         print(f"Błąd podczas zapisu historii zakupów: {e}")
         return None
+
+
+@instrumented()
+def get_purchase_history(customer_id):
+    """
+    Zwraca historię zakupów klienta jako listę wierszy [DATE, PRODUCTS, TOTAL_PRICE].
+    """
+    return _backend().read_history(customer_id)
+
+
+@instrumented()
+def get_purchase_lines(customer_id=None):
+    """
+    Zwraca pozycje zakupów jako DataFrame (jednego klienta lub wszystkich klientów).
+    """
+    return _backend().load_purchase_lines(customer_id)
@@ -0,0 +1,268 @@
+import itertools
+import json
+import os
+
+from instrumentation import instrumented
+from product_management import aggregate_quantities, get_store
+from storage import PRODUCTS_FILE, file_signature
+from utils import apply_discount, normalize_id
+
+PROMOTIONS_FILE = "database/promotions.json"
+RULE_TYPES = ('percentage', 'buy_x_get_y', 'bundle', 'tier')
+
+
+def _rate(rule):
+    rate = float(rule.get('rate', 0))
+    if not 0 < rate <= 1:
+        raise ValueError(f"Rabat promocji musi być z zakresu (0, 1]: {rule}")
+    return rate
+
+
+def _rule_name(rule):
+    if rule.get('name'):
+        return str(rule['name'])
+    kind = rule['type']
+    if kind == 'percentage':
+        return f"Rabat {float(rule['rate']):.0%}"
+    if kind == 'buy_x_get_y':
+        return f"{rule['buy']}+{rule['get']} gratis"
+    if kind == 'bundle':
+        return f"Zestaw -{float(rule['rate']):.0%}"
+    return f"Klient {rule['tier']} -{float(rule['rate']):.0%}"
+
+
+class PromotionEngine:
+    """
+    Reguły promocji skompilowane do tablic indeksowanych po ID produktu.
+
+    Obsługiwane typy reguł:
+    - percentage: rabat procentowy na wybrane produkty (lub wszystkie, gdy brak "products"),
+    - buy_x_get_y: przy zakupie "buy" sztuk kolejne "get" sztuk gratis,
+    - bundle: rabat na komplet produktów kupionych razem ("products": lista lub ID -> ilość),
+    - tier: rabat na cały koszyk dla klientów z danego poziomu (mapa "tiers": ID klienta -> poziom).
+
+    Kolejność naliczania: najlepszy rabat procentowy, sztuki gratis, zestawy
+    (każda sztuka trafia do co najwyżej jednego zestawu, zestawy z wyższym
+    rabatem mają pierwszeństwo), na końcu rabat poziomu klienta. Dla każdej
+    pozycji sprawdzane są tylko reguły dotyczące jej produktu, więc czas
+    wyceny rośnie liniowo z rozmiarem koszyka, a nie z liczbą reguł.
+    """
+
+    def __init__(self, rules=(), tiers=None):
+        self._percentage = {}
+        self._default_percentage = None
+        self._multi_buy = {}
+        self._bundles = []
+        self._bundles_by_product = {}
+        self._tier_rates = {}
+        self._tiers = {str(k): str(v) for k, v in (tiers or {}).items()}
+        bundles = []
+        for rule in rules:
+            kind = rule.get('type')
+            if kind not in RULE_TYPES:
+                raise ValueError(f"Nieznany typ promocji: {kind}")
+            name = _rule_name(rule)
+            if kind == 'percentage':
+                self._add_percentage(rule, name)
+            elif kind == 'buy_x_get_y':
+                buy, get = int(rule['buy']), int(rule['get'])
+                if buy < 1 or get < 1:
+                    raise ValueError(f"Promocja {name}: buy i get muszą być dodatnie.")
+                for product_id in rule['products']:
+                    self._multi_buy.setdefault(normalize_id(product_id), []).append((buy, get, name))
+            elif kind == 'bundle':
+                parts = rule['products']
+                if not isinstance(parts, dict):
+                    parts = {product_id: 1 for product_id in parts}
+                parts = {normalize_id(k): int(v) for k, v in parts.items()}
+                if len(parts) < 2 or min(parts.values()) < 1:
+                    raise ValueError(f"Promocja {name}: zestaw wymaga co najmniej dwóch produktów.")
+                bundles.append((_rate(rule), name, parts))
+            else:
+                rate = _rate(rule)
+                tier = str(rule['tier'])
+                if rate > self._tier_rates.get(tier, (0, None))[0]:
+                    self._tier_rates[tier] = (rate, name)
+        # Indeksy zestawów odpowiadają ich priorytetowi (od najwyższego rabatu).
+        bundles.sort(key=lambda bundle: -bundle[0])
+        for index, (rate, name, parts) in enumerate(bundles):
+            self._bundles.append((rate, name, parts))
+            for product_id in parts:
+                self._bundles_by_product.setdefault(product_id, []).append(index)
+
+    def _add_percentage(self, rule, name):
+        rate = _rate(rule)
+        products = rule.get('products')
+        if products is None:
+            if self._default_percentage is None or rate > self._default_percentage[0]:
+                self._default_percentage = (rate, name)
+            return
+        for product_id in products:
+            product_id = normalize_id(product_id)
+            current = self._percentage.get(product_id)
+            if current is None or rate > current[0]:
+                self._percentage[product_id] = (rate, name)
+
+    @classmethod
+    def from_file(cls, file_path=PROMOTIONS_FILE):
+        """Wczytuje reguły z pliku JSON ({"rules": [...], "tiers": {...}}); brak pliku oznacza brak promocji."""
+        if not os.path.exists(file_path):
+            return cls()
+        with open(file_path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('rules', ()), data.get('tiers'))
+
+    def __bool__(self):
+        return bool(self._percentage or self._default_percentage or self._multi_buy
+                    or self._bundles or self._tier_rates)
+
+    def tier(self, customer_id):
+        return self._tiers.get(str(customer_id)) if customer_id is not None else None
+
+    def evaluate(self, items, price_of, customer_id=None):
+        """
+        Wycenia koszyk z uwzględnieniem promocji.
+
+        Args:
+            items: Pary (ID, ilość) lub słownik ID -> ilość.
+            price_of (callable): ID -> cena jednostkowa przed promocjami.
+            customer_id: ID klienta (dla promocji poziomu klienta).
+
+        Returns:
+            dict: lines (lista słowników id, quantity, base_price, unit_price, total),
+                subtotal, discount, total oraz promotions (nazwa -> kwota rabatu).
+        """
+        savings = {}
+
+        def save(name, amount):
+            if amount > 0:
+                savings[name] = savings.get(name, 0.0) + amount
+
+        lines = {}
+        subtotal = 0.0
+        for product_id, quantity in aggregate_quantities(items).items():
+            if quantity <= 0:
+                continue
+            base = float(price_of(product_id))
+            subtotal += base * quantity
+            # Najlepszy z rabatów procentowych: na ten produkt albo na wszystkie produkty.
+            rate, name = max(self._percentage.get(product_id) or (0.0, None), self._default_percentage or (0.0, None),
+                             key=lambda option: option[0])
+            unit = apply_discount(base, rate) if rate else base
+            save(name, (base - unit) * quantity)
+            free, free_name = 0, None
+            for buy, get, rule_name in self._multi_buy.get(product_id, ()):
+                count = quantity // (buy + get) * get
+                if count > free:
+                    free, free_name = count, rule_name
+            save(free_name, unit * free)
+            lines[product_id] = {'id': product_id, 'quantity': quantity, 'base_price': base,
+                                 'unit': unit, 'paid': quantity - free, 'total': unit * (quantity - free)}
+
+        touched = sorted({i for product_id in lines for i in self._bundles_by_product.get(product_id, ())})
+        for index in touched:
+            rate, name, parts = self._bundles[index]
+            count = min(lines[p]['paid'] // need if p in lines else 0 for p, need in parts.items())
+            if not count:
+                continue
+            for product_id, need in parts.items():
+                line = lines[product_id]
+                units = count * need
+                amount = (line['unit'] - apply_discount(line['unit'], rate)) * units
+                line['paid'] -= units
+                line['total'] -= amount
+                save(name, amount)
+
+        tier_rate, tier_name = self._tier_rates.get(self.tier(customer_id), (0.0, None))
+        result_lines = []
+        total = 0.0
+        for line in lines.values():
+            line_total = line['total']
+            if tier_rate:
+                discounted = apply_discount(line_total, tier_rate)
+                save(tier_name, line_total - discounted)
+                line_total = discounted
+            total += line_total
+            result_lines.append({'id': line['id'], 'quantity': line['quantity'], 'base_price': line['base_price'],
+                                 'unit_price': line_total / line['quantity'], 'total': line_total})
+        return {'lines': result_lines, 'subtotal': subtotal, 'discount': subtotal - total, 'total': total,
+                'promotions': savings}
+
+
+_engines = {}
+
+
+@instrumented()
+def get_promotions(file_path=PROMOTIONS_FILE):
+    """Zwraca skompilowane promocje; plik jest wczytywany ponownie tylko po zmianie."""
+    key = os.path.abspath(file_path)
+    signature = file_signature(file_path)
+    cached = _engines.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    engine = PromotionEngine.from_file(file_path)
+    _engines[key] = (signature, engine)
+    return engine
+
+
+@instrumented()
+def price_cart(cart, customer_id=None, file_path=PROMOTIONS_FILE):
+    """
+    Wycenia koszyk (cart.Cart) z uwzględnieniem promocji.
+
+    Wyceniana jest kopia koszyka z cenami odświeżonymi z katalogu, więc
+    wynik odpowiada kwocie, którą naliczy purchase_products, a sam koszyk
+    nie jest zmieniany. Koszyk modyfikowany w innym wątku (np. w GUI) należy
+    przekazać jako cart.copy() wykonane w tym wątku.
+
+    Returns:
+        dict: Wynik PromotionEngine.evaluate z nazwami produktów w pozycjach lub None przy błędzie.
+    """
+    try:
+        snapshot = cart.copy()
+        snapshot.refresh()
+        return snapshot.priced(get_promotions(file_path), customer_id)
+    except Exception as e:
+        print(f"Błąd podczas naliczania promocji: {e}")
+        return None
+
+
+@instrumented()
+def reprice_carts(carts, customer_ids=None, products_file=PRODUCTS_FILE, file_path=PROMOTIONS_FILE):
+    """
+    Wycenia wiele koszyków naraz przy jednym odczycie katalogu i reguł promocji.
+
+    Args:
+        carts: Koszyki (pary (ID, ilość) lub słowniki ID -> ilość).
+        customer_ids: ID klientów odpowiadające koszykom (opcjonalnie).
+
+    Returns:
+        list: Wyniki PromotionEngine.evaluate; None dla koszyków z nieistniejącymi produktami.
+    """
+    try:
+        engine = get_promotions(file_path)
+        store = get_store(products_file)
+    except Exception as e:
+        print(f"Błąd podczas wczytywania promocji: {e}")
+        return []
+    prices = {}
+
+    def price_of(product_id):
+        price = prices.get(product_id)
+        if price is None:
+            product = store.get(product_id)
+            if product is None:
+                raise KeyError(f"Produkt o ID {product_id} nie istnieje.")
+            price = prices[product_id] = float(product['price'])
+        return price
+
+    if customer_ids is None:
+        customer_ids = itertools.repeat(None)
+    results = []
+    for items, customer_id in zip(carts, customer_ids):
+        try:
+            results.append(engine.evaluate(items, price_of, customer_id))
+        except KeyError as e:
+            print(f"Pominięto koszyk: {e}")
+            results.append(None)
+    return results
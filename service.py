@@ -0,0 +1,441 @@
+import argparse
+import asyncio
+import functools
+import json
+import re
+import secrets
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from cart import Cart
+from instrumentation import metrics
+from product_management import SEARCH_LIMIT, get_store
+from projekt_customers import login, purchase_products
+from promotions import price_cart
+from storage import PRODUCTS_FILE
+from utils import normalize_id
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+SESSION_TTL = 30 * 60
+MAX_BODY_BYTES = 1024 * 1024
+MAX_PAGE = 500
+STOCK_BATCH_DELAY = 0.005
+STOCK_BATCH_MAX = 1000
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_default(value):
+    item = getattr(value, 'item', None)
+    return item() if item is not None else str(value)
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+async def _read_request(reader):
+    """Czyta jedno żądanie HTTP/1.x; zwraca None, gdy klient zamknął połączenie."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "Nieprawidłowy wiersz żądania.")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise HTTPError(400, "Nieprawidłowy nagłówek Content-Length.")
+    if length < 0 or length > MAX_BODY_BYTES:
+        raise HTTPError(413, "Zbyt duże żądanie.")
+    body = await reader.readexactly(length) if length else b""
+    keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+    return method.upper(), target, headers, body, keep_alive
+
+
+class StockBatcher:
+    """
+    Łączy równoczesne zmiany stanów magazynowych w jeden zapis katalogu.
+
+    Zmiany zgłoszone w ciągu STOCK_BATCH_DELAY (lub w czasie trwania
+    poprzedniego zapisu) trafiają do jednej partii; partia jest sprawdzana
+    zmiana po zmianie, a poprawne zmiany są zapisywane jednym wywołaniem
+    ProductStore.apply_stock_changes. Każde żądanie dostaje własny wynik.
+    """
+
+    def __init__(self, service, delay=STOCK_BATCH_DELAY, max_size=STOCK_BATCH_MAX):
+        self.service = service
+        self.delay = delay
+        self.max_size = max_size
+        self._pending = []
+        self._timer = None
+        self._flushing = False
+        self._task = None
+        self.batches = 0
+
+    async def submit(self, product_id, change):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((product_id, change, future))
+        if not self._flushing:
+            if len(self._pending) >= self.max_size:
+                self._start_flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.delay, self._start_flush)
+        return await future
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flushing or not self._pending:
+            return
+        self._flushing = True
+        self._task = asyncio.ensure_future(self._flush())
+
+    async def _flush(self):
+        try:
+            while self._pending:
+                batch, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+                try:
+                    outcomes = await self.service.run(self.service.apply_stock_batch,
+                                                      [(pid, change) for pid, change, _ in batch])
+                except Exception as e:
+                    outcomes = [e] * len(batch)
+                self.batches += 1
+                for (_, _, future), outcome in zip(batch, outcomes):
+                    if future.done():
+                        continue
+                    if isinstance(outcome, Exception):
+                        future.set_exception(outcome)
+                    else:
+                        future.set_result(outcome)
+        finally:
+            self._flushing = False
+
+
+class ShopService:
+    """
+    Usługa HTTP/JSON nad katalogiem produktów, klientami, koszykiem i zakupami.
+
+    Jeden proces trzyma katalog w pamięci (ProductStore), więc wielu
+    klientów korzysta z niego bez ponownego czytania products.xlsx. Pętla
+    asyncio obsługuje połączenia, a operacje na plikach i bazie wykonują się
+    w puli wątków; domyślnie jest to jeden wątek, więc operacje na katalogu
+    wykonują się po kolei, jak w GUI. Zmiany stanów magazynowych są łączone
+    w partie (StockBatcher).
+
+    Sesje i koszyki są przechowywane w pamięci procesu i wygasają po
+    SESSION_TTL sekundach bezczynności. Operacje na koszyku jednej sesji
+    są wykonywane po kolei (asyncio.Lock sesji), także przy wielu wątkach puli.
+    """
+
+    def __init__(self, products_file=PRODUCTS_FILE, workers=1):
+        self.products_file = products_file
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service")
+        self._sessions = {}
+        self.stock_batcher = StockBatcher(self)
+        self._routes = [
+            ("GET", re.compile(r"/products"), self.list_products),
+            ("GET", re.compile(r"/products/(?P<product_id>[^/]+)"), self.get_product),
+            ("POST", re.compile(r"/products/(?P<product_id>[^/]+)/stock"), self.update_stock),
+            ("GET", re.compile(r"/stats"), self.stats),
+            ("POST", re.compile(r"/login"), self.login),
+            ("POST", re.compile(r"/logout"), self.logout),
+            ("GET", re.compile(r"/cart"), self.get_cart),
+            ("POST", re.compile(r"/cart"), self.add_to_cart),
+            ("DELETE", re.compile(r"/cart/(?P<product_id>[^/]+)"), self.remove_from_cart),
+            ("POST", re.compile(r"/checkout"), self.checkout),
+        ]
+
+    @property
+    def store(self):
+        return get_store(self.products_file)
+
+    async def run(self, func, *args, **kwargs):
+        """Wykonuje blokującą funkcję w puli wątków usługi."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor,
+                                                                functools.partial(func, *args, **kwargs))
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Wczytuje katalog i zaczyna przyjmować połączenia; zwraca asyncio.Server."""
+        await self.run(self.store.load)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    writer.write(_response(e.status, {"error": e.message}, False))
+                    break
+                if request is None:
+                    break
+                method, target, headers, body, keep_alive = request
+                status, payload = await self.dispatch(method, target, headers, body)
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, headers, body):
+        """Wywołuje obsługę trasy; zwraca (kod HTTP, odpowiedź JSON)."""
+        url = urlsplit(target)
+        started = time.perf_counter()
+        route_name = "unknown"
+        status = 500
+        try:
+            allowed = False
+            for route_method, pattern, handler in self._routes:
+                match = pattern.fullmatch(url.path.rstrip("/") or "/")
+                if match is None:
+                    continue
+                allowed = True
+                if route_method != method:
+                    continue
+                route_name = handler.__name__
+                request = {
+                    'params': match.groupdict(),
+                    'query': {k: v[-1] for k, v in parse_qs(url.query).items()},
+                    'headers': headers,
+                    'json': _parse_json(body),
+                }
+                status, payload = 200, await handler(request)
+                return status, payload
+            if allowed:
+                raise HTTPError(405, "Niedozwolona metoda.")
+            raise HTTPError(404, "Nie znaleziono zasobu.")
+        except HTTPError as e:
+            status = e.status
+            return e.status, {"error": e.message}
+        except Exception as e:
+            print(f"Błąd podczas obsługi żądania {method} {url.path}: {e}")
+            return 500, {"error": "Błąd serwera."}
+        finally:
+            if metrics.enabled:
+                metrics.record(f"service.{route_name}", time.perf_counter() - started, status < 500)
+
+    def _session(self, request):
+        token = request['headers'].get('authorization', '').removeprefix('Bearer ').strip()
+        session = self._sessions.get(token)
+        now = time.monotonic()
+        if session is None or now - session['used'] > SESSION_TTL:
+            self._sessions.pop(token, None)
+            raise HTTPError(401, "Wymagane logowanie.")
+        session['used'] = now
+        return session
+
+    def _expire_sessions(self):
+        now = time.monotonic()
+        for token in [t for t, s in self._sessions.items() if now - s['used'] > SESSION_TTL]:
+            del self._sessions[token]
+
+    # Katalog
+
+    async def list_products(self, request):
+        query = request['query']
+        limit = min(_int(query.get('limit', SEARCH_LIMIT if 'q' in query else 50), 'limit'), MAX_PAGE)
+        if 'q' in query:
+            return {"products": await self.run(self.store.search, query['q'], limit)}
+        offset = _int(query.get('offset', 0), 'offset')
+        return {"products": await self.run(self.store.page, offset, limit), "offset": offset}
+
+    async def get_product(self, request):
+        product = await self.run(self.store.get, request['params']['product_id'])
+        if product is None:
+            raise HTTPError(404, "Produkt nie istnieje.")
+        return product
+
+    async def stats(self, request):
+        return await self.run(self.store.stats)
+
+    async def update_stock(self, request):
+        change = _int((request['json'] or {}).get('change'), 'change')
+        product_id = normalize_id(request['params']['product_id'])
+        ok, result = await self.stock_batcher.submit(product_id, change)
+        if not ok:
+            raise HTTPError(*result)
+        return {"id": product_id, "stock": result}
+
+    def apply_stock_batch(self, changes):
+        """
+        Sprawdza i zapisuje partię zmian stanów jednym zapisem katalogu.
+
+        Returns:
+            list: Dla każdej zmiany (True, nowy stan) albo (False, (kod HTTP, komunikat)).
+        """
+        store = self.store
+        outcomes = []
+        accepted = []
+        with store.lock():
+            running = {}
+            for product_id, change in changes:
+                stock = running.get(product_id)
+                if stock is None:
+                    stock = store.stock(product_id)
+                if stock is None:
+                    outcomes.append((False, (404, f"Produkt o ID {product_id} nie istnieje.")))
+                    continue
+                if stock + change < 0:
+                    outcomes.append((False, (409, "Nie można zaktualizować stanu - wynikowy stan byłby ujemny.")))
+                    continue
+                running[product_id] = stock + change
+                accepted.append((product_id, change))
+                outcomes.append((True, running[product_id]))
+            if accepted:
+                store.apply_stock_changes(accepted)
+        return outcomes
+
+    # Klienci i koszyk
+
+    async def login(self, request):
+        email = (request['json'] or {}).get('email')
+        if not email:
+            raise HTTPError(400, "Brak pola email.")
+        user = await self.run(login, email)
+        if user is None:
+            raise HTTPError(401, "Nie znaleziono użytkownika.")
+        self._expire_sessions()
+        token = secrets.token_urlsafe(24)
+        cart = Cart(lookup=lambda product_id: self.store.get(product_id))
+        self._sessions[token] = {'user': user, 'cart': cart, 'lock': asyncio.Lock(), 'used': time.monotonic()}
+        return {"token": token, "user": user}
+
+    async def logout(self, request):
+        session = self._session(request)
+        for token in [t for t, s in self._sessions.items() if s is session]:
+            del self._sessions[token]
+        return {}
+
+    async def get_cart(self, request):
+        session = self._session(request)
+        async with session['lock']:
+            return await self._priced(session)
+
+    async def _priced(self, session):
+        priced = await self.run(price_cart, session['cart'], session['user']['ID'])
+        if priced is None:
+            raise HTTPError(500, "Nie udało się wycenić koszyka.")
+        return priced
+
+    async def add_to_cart(self, request):
+        session = self._session(request)
+        data = request['json'] or {}
+        product_id = normalize_id(data.get('product_id'))
+        quantity = _int(data.get('quantity', 1), 'quantity')
+        if quantity <= 0:
+            raise HTTPError(400, "Ilość musi być dodatnia.")
+        cart = session['cart']
+
+        def add():
+            product = self.store.get(product_id)
+            if product is None:
+                raise HTTPError(404, f"Produkt o ID {product_id} nie istnieje.")
+            if cart.quantity(product_id) + quantity > product['stock']:
+                raise HTTPError(409, f"Brak wystarczającej ilości produktu {product['name']} "
+                                     f"(dostępne: {product['stock']}).")
+            cart.add(product_id, quantity, product=product)
+
+        async with session['lock']:
+            await self.run(add)
+            return await self._priced(session)
+
+    async def remove_from_cart(self, request):
+        session = self._session(request)
+        quantity = request['query'].get('quantity')
+        quantity = None if quantity is None else _int(quantity, 'quantity')
+        async with session['lock']:
+            await self.run(session['cart'].remove, request['params']['product_id'], quantity)
+            return await self._priced(session)
+
+    async def checkout(self, request):
+        session = self._session(request)
+        expected_total = (request['json'] or {}).get('expected_total')
+        if expected_total is not None and not isinstance(expected_total, (int, float)):
+            raise HTTPError(400, "Pole expected_total musi być liczbą.")
+        cart = session['cart']
+        async with session['lock']:
+            if not cart:
+                raise HTTPError(400, "Koszyk jest pusty.")
+            total = await self.run(purchase_products, cart, session['user'], expected_total, self.products_file)
+            if total is None:
+                raise HTTPError(409, "Nie udało się zapisać zakupu. Sprawdź dostępność produktów i ceny.")
+            cart.clear()
+        return {"total": total}
+
+
+def _parse_json(body):
+    if not body:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise HTTPError(400, "Nieprawidłowy JSON.")
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"Pole {name} musi być liczbą całkowitą.")
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=1, products_file=PRODUCTS_FILE):
+    service = ShopService(products_file, workers)
+    server = await service.start(host, port)
+    addresses = ", ".join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in server.sockets)
+    print(f"Usługa działa na {addresses}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Usługa HTTP/JSON sklepu (katalog, logowanie, koszyk, zakup).")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="Liczba wątków dla operacji na plikach i bazie.")
+    parser.add_argument("--products", default=PRODUCTS_FILE, help="Plik katalogu produktów (.xlsx) lub baza SQLite.")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, products_file=args.products))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1313 @@
+import argparse
+import csv
+import hashlib
+import io
+import itertools
+import json
+import mmap
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+from catalog import ProductCatalog
+from instrumentation import instrument_methods
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+PRODUCTS_FILE = "database/products.xlsx"
+CUSTOMER_FILE = "database/customer.csv"
+DATABASE_DIR = "database/DATABASE"
+SQLITE_FILE = "database/frog.db"
+
+PRODUCT_COLUMNS = ['id', 'name', 'price', 'stock']
+PRODUCT_DTYPES = {'id': 'int64', 'name': 'object', 'price': 'float64', 'stock': 'int64'}
+PRODUCT_CACHE_SUFFIX = '.cache.csv'
+SNAPSHOT_SUFFIX = '.snapshot'
+SNAPSHOT_MAGIC = b'FROGSNAP1\n'
+SNAPSHOT_ALIGN = 64
+CUSTOMER_FIELDS = ["ID", "NAME", "E-MAIL", "PHONE", "CREATED", "UPDATED"]
+HISTORY_FIELDS = ["DATE", "PRODUCTS", "TOTAL_PRICE"]
+LINE_FIELDS = ["PURCHASE_ID", "DATE", "CUSTOMER_ID", "PRODUCT_ID", "NAME", "QUANTITY", "UNIT_PRICE"]
+LINE_DTYPES = {
+    "PURCHASE_ID": "string", "DATE": "string", "CUSTOMER_ID": "string", "PRODUCT_ID": "int64",
+    "NAME": "string", "QUANTITY": "int64", "UNIT_PRICE": "float64"
+}
+LEGACY_LINE_PATTERN = (r"(?P<NAME>[^;]*?) \(ID: (?P<PRODUCT_ID>\d+), "
+                       r"Ilość: (?P<QUANTITY>\d+), Cena: (?P<UNIT_PRICE>[\d.]+)\)")
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+STOCK_LOG_HEADER_BYTES = 256
+
+
+@contextmanager
+def atomic_write(path, suffix=''):
+    """
+    Zwraca ścieżkę pliku tymczasowego, który po udanym zapisie zastępuje plik docelowy.
+
+    Plik tymczasowy powstaje w tym samym katalogu, więc os.replace jest atomowy:
+    czytelnicy widzą albo stary, albo nowy plik, nigdy zapisany w połowie.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix=suffix)
+    os.close(fd)
+    try:
+        yield tmp_path
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _lock_fd(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+
+def _unlock_fd(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    Wyłączna blokada międzyprocesowa oparta na pliku (fcntl.flock, a w Windows msvcrt).
+
+    W obrębie procesu blokada jest reentrantna i serializuje również wątki.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    _lock_fd(fd)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                _unlock_fd(fd)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def read_table(source, as_text=False):
+    """
+    Wczytuje dane tabelaryczne do DataFrame.
+
+    Args:
+        source: Ścieżka do pliku CSV, Parquet lub Excel, DataFrame albo iterowalny zbiór słowników.
+        as_text (bool): Czy wczytać wartości z CSV i słowników jako tekst (np. numery telefonów).
+    """
+    import pandas as pd
+    if isinstance(source, pd.DataFrame):
+        return source.copy()
+    if isinstance(source, (str, os.PathLike)):
+        path = str(source)
+        if path.endswith('.parquet'):
+            return pd.read_parquet(path)
+        if path.endswith('.xlsx'):
+            return read_xlsx(path)
+        if path.endswith('.xls'):
+            return pd.read_excel(path)
+        return pd.read_csv(path, dtype=str if as_text else None)
+    if as_text:
+        return pd.DataFrame([{k: str(v) for k, v in row.items() if v is not None} for row in source])
+    return pd.DataFrame(list(source))
+
+
+def read_xlsx(path, columns=None):
+    """
+    Czyta pierwszy arkusz pliku xlsx w trybie tylko do odczytu (openpyxl read_only, same wartości).
+
+    Args:
+        columns: Kolumny do wczytania; pozostałe nie są nawet kopiowane z wierszy.
+    """
+    import pandas as pd
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = list(next(rows, None) or ())
+        if columns is not None:
+            positions = [header.index(c) for c in columns if c in header]
+            header = [header[i] for i in positions]
+            rows = ([row[i] for i in positions] for row in rows)
+        df = pd.DataFrame(list(rows), columns=header)
+    finally:
+        workbook.close()
+    return df.dropna(how='all')
+
+
+def _typed_products(df):
+    """Nadaje kolumnom produktów stałe typy; kolumna, której nie da się przekonwertować, zachowuje typ wykryty."""
+    for column, dtype in PRODUCT_DTYPES.items():
+        if column in df.columns:
+            try:
+                df[column] = df[column].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+    return df
+
+
+def read_products_frame(path, columns=None):
+    """
+    Wczytuje katalog produktów z pliku xlsx ze stałymi typami kolumn.
+
+    Po pierwszym odczycie obok arkusza zapisywana jest kopia CSV
+    (<plik>.cache.csv) z sygnaturą arkusza (i-węzeł, mtime, rozmiar) i typami
+    kolumn w pierwszym wierszu. Kolejne odczyty niezmienionego arkusza
+    czytają tylko tę kopię, z podanymi kolumnami i bez zgadywania typów.
+
+    Args:
+        columns: Kolumny do wczytania (domyślnie wszystkie).
+    """
+    signature = file_signature(path)
+    if signature is None:
+        raise FileNotFoundError(path)
+    cached = _read_product_cache(path, signature, columns)
+    if cached is not None:
+        return cached
+    df = _typed_products(read_xlsx(path))
+    try:
+        _write_product_cache(path, df, signature)
+    except OSError:
+        pass
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+def _read_product_cache(path, signature, columns):
+    import pandas as pd
+    try:
+        with open(path + PRODUCT_CACHE_SUFFIX, encoding='utf-8', newline='') as f:
+            meta = json.loads(f.readline().lstrip('#'))
+            if meta.get('signature') != list(signature):
+                return None
+            dtypes = meta['dtypes']
+            usecols = list(dtypes) if columns is None else [c for c in columns if c in dtypes]
+            df = pd.read_csv(f, usecols=usecols, dtype={c: dtypes[c] for c in usecols},
+                             float_precision='round_trip')
+            return df[usecols]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_product_cache(path, df, signature):
+    meta = {'signature': list(signature), 'dtypes': {c: str(t) for c, t in df.dtypes.items()}}
+    with atomic_write(path + PRODUCT_CACHE_SUFFIX) as tmp_path:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write('#' + json.dumps(meta) + '\n')
+            df.to_csv(f, index=False)
+
+
+def file_digest(path):
+    """Zwraca skrót BLAKE2b zawartości pliku."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_state(path):
+    """Stan pliku źródłowego migawki: [mtime, rozmiar, skrót zawartości] albo None, gdy pliku nie ma."""
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size, file_digest(path)]
+    except FileNotFoundError:
+        return None
+
+
+def write_binary_snapshot(path, source, arrays, meta=None, signature=None):
+    """
+    Zapisuje migawkę binarną danych odczytanych z pliku source.
+
+    Plik zaczyna się nagłówkiem JSON (stan pliku źródłowego: czas modyfikacji,
+    rozmiar i skrót zawartości, oraz położenie tablic), po którym następują
+    surowe tablice NumPy wyrównane do SNAPSHOT_ALIGN bajtów.
+
+    Args:
+        arrays (dict): Nazwa -> jednowymiarowa tablica NumPy (bez obiektów Pythona).
+        meta: Dodatkowe dane zapisywane w nagłówku (muszą dać się zapisać jako JSON).
+        signature: Sygnatura pliku source (file_signature) sprzed odczytu danych; gdy plik
+            od tego czasu się zmienił, migawka nie jest zapisywana.
+    """
+    state = _source_state(source)
+    # Sygnatura sprawdzana po policzeniu skrótu: skrót na pewno dotyczy tej wersji pliku, z której pochodzą dane.
+    if state is None or (signature is not None and file_signature(source) != tuple(signature)):
+        return
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = [array.dtype.str, len(array), offset]
+        offset += -(-array.nbytes // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+    header = json.dumps({'source': state, 'arrays': layout, 'meta': meta}).encode('utf-8')
+    start = -(-(len(SNAPSHOT_MAGIC) + 8 + len(header)) // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+    with atomic_write(path) as tmp_path:
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + len(header).to_bytes(8, 'little') + header)
+            for name, array in arrays.items():
+                f.seek(start + layout[name][2])
+                f.write(array.tobytes())
+            f.truncate(start + offset)
+
+
+def read_binary_snapshot(path, source):
+    """
+    Wczytuje migawkę zapisaną przez write_binary_snapshot.
+
+    Migawka jest ważna, gdy czas modyfikacji, rozmiar i skrót zawartości pliku
+    source zgadzają się z nagłówkiem. Plik jest mapowany w pamięci (mmap z
+    kopiowaniem przy zapisie), więc tablice są widokami na plik: nic nie jest
+    kopiowane ani parsowane, a zmiany tablic nie trafiają do pliku.
+
+    Returns:
+        tuple: (tablice, meta) albo None, gdy migawki brak lub jest nieaktualna.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        prefix = f.read(len(SNAPSHOT_MAGIC) + 8)
+        if len(prefix) < len(SNAPSHOT_MAGIC) + 8 or not prefix.startswith(SNAPSHOT_MAGIC):
+            return None
+        length = int.from_bytes(prefix[len(SNAPSHOT_MAGIC):], 'little')
+        try:
+            header = json.loads(f.read(length))
+            st = os.stat(source)
+        except (ValueError, FileNotFoundError):
+            return None
+        state = header.get('source')
+        # Najpierw tani test czasu i rozmiaru, skrót liczymy tylko wtedy, gdy one się zgadzają.
+        if not state or state[:2] != [st.st_mtime_ns, st.st_size] or state[2] != file_digest(source):
+            return None
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    start = -(-(len(SNAPSHOT_MAGIC) + 8 + length) // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+    try:
+        arrays = {name: np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=start + offset)
+                  for name, (dtype, count, offset) in header['arrays'].items()}
+    except (TypeError, ValueError):
+        return None
+    return arrays, header.get('meta')
+
+
+def write_table_chunks(chunks, dest):
+    """
+    Zapisuje kolejne porcje DataFrame do pliku CSV lub Parquet bez składania ich w całość.
+
+    Returns:
+        int: Liczba zapisanych wierszy.
+    """
+    dest = str(dest)
+    rows = 0
+    if dest.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(dest, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+    with open(dest, 'w', newline='', encoding='utf-8') as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, index=False, header=(i == 0))
+            rows += len(chunk)
+    return rows
+
+
+def empty_lines_frame():
+    """Zwraca pustą ramkę pozycji zakupów z właściwymi typami kolumn."""
+    import pandas as pd
+    return _typed_lines(pd.DataFrame(columns=LINE_FIELDS))
+
+
+def _typed_lines(df):
+    import pandas as pd
+    df = df[LINE_FIELDS].astype(LINE_DTYPES)
+    df["DATE"] = pd.to_datetime(df["DATE"])
+    return df
+
+
+def read_lines_csv(path):
+    """Wczytuje plik pozycji zakupów ze stałymi typami kolumn (bez zgadywania typów)."""
+    import pandas as pd
+    df = pd.read_csv(path, dtype=LINE_DTYPES, keep_default_na=False)
+    df["DATE"] = pd.to_datetime(df["DATE"])
+    return df
+
+
+def read_lines_tail(path, offset=0):
+    """
+    Wczytuje pozycje zakupów dopisane do pliku od podanego przesunięcia.
+
+    Czytane są tylko pełne wiersze (zakończone znakiem nowej linii), więc
+    wiersz w trakcie zapisu zostanie wczytany przy kolejnym wywołaniu.
+
+    Returns:
+        tuple: (ramka pozycji, przesunięcie za ostatnim wczytanym wierszem).
+    """
+    import pandas as pd
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+    if offset == 0:
+        # Pomijamy nagłówek; plik bez pełnego nagłówka traktujemy jak pusty.
+        start = data.find(b'\n') + 1
+        if start == 0:
+            return empty_lines_frame(), 0
+    else:
+        start = 0
+    if end <= start:
+        return empty_lines_frame(), offset + max(start, end)
+    df = pd.read_csv(io.BytesIO(data[start:end]), header=None, names=LINE_FIELDS, dtype=LINE_DTYPES,
+                     keep_default_na=False, encoding='utf-8')
+    df["DATE"] = pd.to_datetime(df["DATE"])
+    return df, offset + end
+
+
+def parse_legacy_history(rows, customer_id):
+    """
+    Zamienia wiersze historii [DATE, PRODUCTS, TOTAL_PRICE] na pozycje zakupów.
+
+    Tekst w kolumnie PRODUCTS jest rozbierany jednym wektorowym wyrażeniem
+    regularnym; każdy wiersz historii dostaje ID zakupu legacy-<klient>-<nr>.
+    """
+    import pandas as pd
+    history = pd.DataFrame([row[:3] for row in rows], columns=HISTORY_FIELDS)
+    if history.empty:
+        return empty_lines_frame()
+    items = history["PRODUCTS"].str.extractall(LEGACY_LINE_PATTERN)
+    if items.empty:
+        return empty_lines_frame()
+    row_numbers = items.index.get_level_values(0)
+    items = items.reset_index(drop=True)
+    items["NAME"] = items["NAME"].str.strip()
+    items["DATE"] = history["DATE"].to_numpy()[row_numbers]
+    items["CUSTOMER_ID"] = str(customer_id)
+    items["PURCHASE_ID"] = [f"legacy-{customer_id}-{n}" for n in row_numbers]
+    return _typed_lines(items)
+
+
+def _stock_log_generation(head):
+    """
+    Zwraca (generacja, przesunięcie pierwszego rekordu) z początku dziennika stanów.
+
+    Dziennik bez nagłówka (zapisany przez starszą wersję) ma generację None,
+    a niedokończony nagłówek oznacza, że rekordów jeszcze nie ma.
+    """
+    end = head.find(b"\n") + 1
+    if not end:
+        return None, len(head)
+    try:
+        header = json.loads(head[:end])
+    except ValueError:
+        return None, 0
+    if isinstance(header, dict) and 'generation' in header:
+        return header['generation'], end
+    return None, 0
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # Każdy zapis podmienia plik przez os.replace, więc zmienia się też i-węzeł.
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+@instrument_methods('storage.StorageBackend', skip=('lock', 'close'), io=True)
+class StorageBackend:
+    """
+    Interfejs magazynu danych dla produktów, klientów i historii zakupów.
+
+    Zapisy produktów przyjmują pełny stan katalogu oraz listę zmienionych
+    i usuniętych ID, dzięki czemu backend plikowy może przepisać cały plik,
+    a backend bazodanowy zapisać tylko zmienione wiersze.
+
+    Operacje typu odczyt-modyfikacja-zapis należy wykonywać pod blokadą
+    zwracaną przez lock(), wspólną dla wszystkich procesów.
+    """
+
+    # Czy zmiany stanów domyślnie trafiają najpierw do dziennika (zapis opóźniony).
+    WRITE_BEHIND = False
+
+    def lock(self):
+        """Zwraca międzyprocesową blokadę katalogu produktów."""
+        return self._file_lock
+
+    def products_exist(self):
+        raise NotImplementedError
+
+    def products_signature(self):
+        """Zwraca znacznik, który zmienia się, gdy katalog zmieni inny proces."""
+        raise NotImplementedError
+
+    def load_products(self):
+        raise NotImplementedError
+
+    def load_product_columns(self, columns):
+        """Zwraca DataFrame z wybranymi kolumnami katalogu."""
+        import pandas as pd
+        return pd.DataFrame(self.load_products(), columns=PRODUCT_COLUMNS)[list(columns)]
+
+    def write_products(self, products, changed=None, removed=()):
+        """
+        Zapisuje katalog.
+
+        Args:
+            products: Pełny stan katalogu (ID -> produkt), np. catalog.ProductCatalog albo słownik słowników.
+            changed (iterable): ID dodanych lub zmienionych produktów; None oznacza wszystkie.
+            removed (iterable): ID usuniętych produktów.
+        """
+        raise NotImplementedError
+
+    def load_catalog_snapshot(self):
+        """Zwraca katalog (catalog.ProductCatalog) z aktualnej migawki binarnej albo None, gdy jej brak."""
+        return None
+
+    def save_catalog_snapshot(self, catalog, signature=None):
+        """Zapisuje migawkę binarną katalogu wczytanego przy sygnaturze signature (products_signature)."""
+
+    def load_reservations(self):
+        """Zwraca aktywne rezerwacje: ID -> {'expires': znacznik czasu, 'items': [[ID produktu, ilość], ...]}."""
+        raise NotImplementedError
+
+    def write_reservations(self, reservations):
+        raise NotImplementedError
+
+    # Dziennik zmian stanów (zapis opóźniony, zob. ProductStore). Każdy rekord
+    # zawiera wynikowy stan produktu, więc ponowne odtworzenie jest bezpieczne.
+
+    def append_stock_log(self, records):
+        """
+        Dopisuje rekordy zmian stanów do dziennika i wymusza zapis na dysk (fsync).
+
+        Nowy dziennik zaczyna się nagłówkiem z losowym numerem generacji, więc
+        pozycja zapamiętana w wyczyszczonym dzienniku nigdy nie pasuje do
+        następnego (w przeciwieństwie do numeru i-węzła, który system może
+        użyć ponownie). Wywoływać pod blokadą lock().
+
+        Returns:
+            tuple: Pozycja końca dziennika (generacja, przesunięcie) do użycia w read_stock_log.
+        """
+        data = "".join(json.dumps(record) + "\n" for record in records).encode('utf-8')
+        fd = os.open(self.stock_log_file, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size == 0:
+                generation = uuid.uuid4().hex
+                # Nagłówek i rekordy jednym zapisem: czytelnik nie zobaczy dziennika bez nagłówka.
+                data = (json.dumps({'generation': generation}) + "\n").encode('utf-8') + data
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                generation = _stock_log_generation(os.read(fd, STOCK_LOG_HEADER_BYTES))[0]
+            os.write(fd, data)
+            os.fsync(fd)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        return generation, size
+
+    def read_stock_log(self, position=None):
+        """
+        Czyta rekordy dziennika stanów dopisane po pozycji position.
+
+        Gdy dziennik został w międzyczasie wyczyszczony (inna generacja w
+        nagłówku lub mniejszy rozmiar), czyta go od początku. Niedokończony
+        ostatni wiersz (awaria w trakcie zapisu) jest pomijany.
+
+        Returns:
+            tuple: (rekordy, nowa pozycja); pozycja None, gdy dziennika nie ma.
+        """
+        try:
+            with open(self.stock_log_file, 'rb') as f:
+                generation, start = _stock_log_generation(f.read(STOCK_LOG_HEADER_BYTES))
+                offset = start
+                if position is not None and position[0] == generation and start <= position[1]:
+                    offset = position[1]
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], None
+        end = data.rfind(b"\n") + 1
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records, (generation, offset + end)
+
+    def clear_stock_log(self):
+        """Usuwa dziennik stanów po zapisaniu zmian w katalogu."""
+        try:
+            os.remove(self.stock_log_file)
+        except FileNotFoundError:
+            pass
+
+    def customers_signature(self):
+        """Zwraca znacznik, który zmienia się, gdy klientów zmieni inny proces."""
+        raise NotImplementedError
+
+    def load_customers(self):
+        raise NotImplementedError
+
+    def save_customers(self, customers):
+        raise NotImplementedError
+
+    def insert_customer(self, customer):
+        self.insert_customers([customer])
+
+    def insert_customers(self, customers):
+        raise NotImplementedError
+
+    def delete_customers(self, ids):
+        raise NotImplementedError
+
+    def compact_customers(self):
+        """Scala zaległe zmiany klientów z główną kopią danych (jeśli backend je buforuje)."""
+
+    def append_history(self, customer_id, row):
+        """Dopisuje wiersz [DATE, PRODUCTS, TOTAL_PRICE] do historii klienta."""
+        raise NotImplementedError
+
+    def append_purchase(self, customer_id, row, lines):
+        """
+        Zapisuje zakup: wiersz historii [DATE, PRODUCTS, TOTAL_PRICE] oraz jego pozycje.
+
+        Args:
+            lines (list): Słowniki z kluczami LINE_FIELDS, po jednym na produkt.
+        """
+        raise NotImplementedError
+
+    def load_purchase_lines(self, customer_id=None):
+        """Zwraca pozycje zakupów (jednego klienta lub wszystkich) jako DataFrame o typach LINE_DTYPES."""
+        raise NotImplementedError
+
+    def write_purchase_lines(self, customer_id, lines):
+        """Zastępuje wszystkie pozycje zakupów klienta podaną ramką."""
+        raise NotImplementedError
+
+    def purchase_line_customers(self):
+        """Zwraca ID klientów, którzy mają zapisane pozycje zakupów."""
+        raise NotImplementedError
+
+    def read_history(self, customer_id):
+        """Zwraca wiersze historii klienta; FileNotFoundError, gdy jej brak."""
+        return list(self.iter_history(customer_id))
+
+    def iter_history(self, customer_id, start=None, end=None, offset=0, limit=None):
+        """
+        Leniwie zwraca wiersze [DATE, PRODUCTS, TOTAL_PRICE] historii klienta.
+
+        Args:
+            start (str): Najwcześniejsza data (włącznie), np. "2025-05-18" lub "2025-05-18 23:00".
+            end (str): Najpóźniejsza data (włącznie); porównywany jest prefiks o długości end.
+            offset (int): Liczba pominiętych wierszy (po filtrach).
+            limit (int): Maksymalna liczba zwróconych wierszy; None oznacza bez limitu.
+        """
+        raise NotImplementedError
+
+    def history_customers(self):
+        """Zwraca ID klientów, którzy mają historię zakupów."""
+        raise NotImplementedError
+
+
+@instrument_methods('storage.FileBackend', skip=('lock', 'close'), io=True)
+class FileBackend(StorageBackend):
+    """
+    Dotychczasowy układ plików: products.xlsx, customer.csv i <ID>_history.csv.
+
+    Rejestracje i usunięcia klientów są dopisywane do dziennika customer.csv.journal
+    (rekordy insert i delete w formacie JSON lines), więc pojedyncza operacja to
+    jeden zapis na końcu pliku. Odczyt odtwarza dziennik na kopii customer.csv,
+    a kompaktowanie przepisuje customer.csv i czyści dziennik, gdy ten
+    przekroczy journal_compact_bytes.
+
+    Zmiany stanów magazynowych są domyślnie zapisywane z opóźnieniem
+    (WRITE_BEHIND): najpierw do products.xlsx.stock.log, a arkusz jest
+    przepisywany raz dla całej grupy zmian.
+    """
+
+    WRITE_BEHIND = True
+
+    def __init__(self, products_file=PRODUCTS_FILE, customer_file=CUSTOMER_FILE, history_dir=DATABASE_DIR,
+                 journal_compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.products_file = products_file
+        self.customer_file = customer_file
+        self.history_dir = history_dir
+        self._file_lock = FileLock(products_file + '.lock')
+        self.reservations_file = products_file + '.reservations.json'
+        self.stock_log_file = products_file + '.stock.log'
+        self.journal_file = customer_file + '.journal'
+        self.journal_compact_bytes = journal_compact_bytes
+        self._customers_lock = FileLock(customer_file + '.lock')
+
+    def products_exist(self):
+        return os.path.exists(self.products_file)
+
+    def products_signature(self):
+        return file_signature(self.products_file)
+
+    def load_products(self):
+        if not self.products_exist():
+            return []
+        return read_products_frame(self.products_file).to_dict('records')
+
+    def load_product_columns(self, columns):
+        import pandas as pd
+        if not self.products_exist():
+            return pd.DataFrame(columns=list(columns))
+        return read_products_frame(self.products_file, columns)
+
+    def write_products(self, products, changed=None, removed=()):
+        import pandas as pd
+        # Katalog kolumnowy (ProductCatalog) oddaje ramkę wprost z kolumn, bez słowników dla każdego wiersza.
+        frame = getattr(products, 'frame', None)
+        df = frame() if frame is not None else pd.DataFrame(list(products.values()), columns=PRODUCT_COLUMNS)
+        with atomic_write(self.products_file, suffix='.xlsx') as tmp_path:
+            df.to_excel(tmp_path, index=False, engine='openpyxl')
+        # Kopia CSV i migawka od razu po zapisie, żeby kolejny odczyt nie parsował arkusza.
+        signature = file_signature(self.products_file)
+        try:
+            _write_product_cache(self.products_file, _typed_products(df), signature)
+        except OSError:
+            pass
+        if isinstance(products, ProductCatalog):
+            self.save_catalog_snapshot(products, signature)
+
+    def load_catalog_snapshot(self):
+        cached = read_binary_snapshot(self.products_file + SNAPSHOT_SUFFIX, self.products_file)
+        if cached is None:
+            return None
+        try:
+            return ProductCatalog.from_arrays(*cached)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def save_catalog_snapshot(self, catalog, signature=None):
+        arrays = catalog.to_arrays()
+        if arrays is None:
+            return
+        try:
+            write_binary_snapshot(self.products_file + SNAPSHOT_SUFFIX, self.products_file, *arrays, signature=signature)
+        except (OSError, TypeError, ValueError):
+            # Nazwy spoza bufora, których nie da się zapisać w nagłówku JSON - zostaje odczyt z kopii CSV.
+            pass
+
+    def load_reservations(self):
+        try:
+            with open(self.reservations_file, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def write_reservations(self, reservations):
+        with atomic_write(self.reservations_file) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(reservations, f)
+
+    def customers_signature(self):
+        return file_signature(self.customer_file), file_signature(self.journal_file)
+
+    def _read_snapshot(self):
+        # Niezmieniony customer.csv jest wczytywany z migawki binarnej (lista klientów w pickle), bez parsowania CSV.
+        cached = read_binary_snapshot(self.customer_file + SNAPSHOT_SUFFIX, self.customer_file)
+        if cached is not None:
+            return pickle.loads(cached[0]['customers'])
+        signature = file_signature(self.customer_file)
+        try:
+            with open(self.customer_file, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                expected_headers = set(CUSTOMER_FIELDS)
+                if not expected_headers.issubset(reader.fieldnames or []):
+                    raise ValueError(f"Nieprawidłowe nagłówki w pliku {self.customer_file}. Oczekiwano: {expected_headers}")
+                customers = list(reader)
+        except FileNotFoundError:
+            return []
+        self._write_binary_snapshot(customers, signature)
+        return customers
+
+    def _read_journal(self):
+        try:
+            with open(self.journal_file, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Niedokończony ostatni wpis po awarii - pomijamy go.
+                        continue
+        except FileNotFoundError:
+            return
+
+    def load_customers(self):
+        customers = {c["ID"]: c for c in self._read_snapshot()}
+        for record in self._read_journal():
+            if record["op"] == "insert":
+                customer = record["customer"]
+                customers[customer["ID"]] = customer
+            elif record["op"] == "delete":
+                customers.pop(record["id"], None)
+        return list(customers.values())
+
+    def _write_snapshot(self, customers):
+        # Wiersze w takiej postaci, w jakiej zwróciłby je odczyt CSV, żeby migawka binarna była z nim zgodna.
+        rows = [{field: '' if customer.get(field) is None else str(customer[field]) for field in CUSTOMER_FIELDS}
+                for customer in customers]
+        with atomic_write(self.customer_file) as tmp_path:
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=CUSTOMER_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+        self._write_binary_snapshot(rows, file_signature(self.customer_file))
+
+    def _write_binary_snapshot(self, customers, signature):
+        payload = np.frombuffer(pickle.dumps(customers, protocol=pickle.HIGHEST_PROTOCOL), np.uint8)
+        try:
+            write_binary_snapshot(self.customer_file + SNAPSHOT_SUFFIX, self.customer_file,
+                                  {'customers': payload}, signature=signature)
+        except OSError:
+            pass
+
+    def save_customers(self, customers):
+        self._ensure_customer_dir()
+        with self._customers_lock:
+            self._write_snapshot(customers)
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+
+    def _ensure_customer_dir(self):
+        directory = os.path.dirname(self.customer_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _append_journal(self, records):
+        self._ensure_customer_dir()
+        with self._customers_lock:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.getsize(self.journal_file) >= self.journal_compact_bytes:
+                self.compact_customers()
+
+    def insert_customers(self, customers):
+        self._append_journal([{"op": "insert", "customer": customer} for customer in customers])
+
+    def delete_customers(self, ids):
+        self._append_journal([{"op": "delete", "id": str(i)} for i in ids])
+
+    def compact_customers(self):
+        self._ensure_customer_dir()
+        with self._customers_lock:
+            if not os.path.exists(self.journal_file):
+                return
+            # Dziennik jest usuwany dopiero po podmianie kopii; ponowne odtworzenie
+            # go po awarii jest bezpieczne, bo wpisy są idempotentne.
+            self._write_snapshot(self.load_customers())
+            os.remove(self.journal_file)
+
+    def history_file(self, customer_id):
+        return os.path.join(self.history_dir, f"{customer_id}_history.csv")
+
+    def append_history(self, customer_id, row):
+        os.makedirs(self.history_dir, exist_ok=True)
+        history_file = self.history_file(customer_id)
+        with open(history_file, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if os.path.getsize(history_file) == 0:
+                writer.writerow(HISTORY_FIELDS)
+            writer.writerow(row)
+
+    def lines_file(self, customer_id):
+        return os.path.join(self.history_dir, f"{customer_id}_lines.csv")
+
+    def append_purchase(self, customer_id, row, lines):
+        lines_file = self.lines_file(customer_id)
+        if not os.path.exists(lines_file) and os.path.exists(self.history_file(customer_id)):
+            # Plik pozycji ma zawsze obejmować całą historię, więc starą historię konwertujemy przed pierwszym zapisem.
+            self.write_purchase_lines(customer_id, parse_legacy_history(self.read_history(customer_id), customer_id))
+        self.append_history(customer_id, row)
+        with open(lines_file, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=LINE_FIELDS)
+            if os.path.getsize(lines_file) == 0:
+                writer.writeheader()
+            writer.writerows(lines)
+
+    def load_purchase_lines(self, customer_id=None):
+        import pandas as pd
+        customers = self.purchase_line_customers() if customer_id is None else [customer_id]
+        frames = [read_lines_csv(self.lines_file(c)) for c in customers if os.path.exists(self.lines_file(c))]
+        if not frames:
+            return empty_lines_frame()
+        return pd.concat(frames, ignore_index=True)
+
+    def write_purchase_lines(self, customer_id, lines):
+        with atomic_write(self.lines_file(customer_id)) as tmp_path:
+            out = lines[LINE_FIELDS].copy()
+            out["DATE"] = out["DATE"].dt.strftime("%Y-%m-%d %H:%M:%S")
+            out.to_csv(tmp_path, index=False)
+
+    def purchase_line_customers(self):
+        if not os.path.isdir(self.history_dir):
+            return []
+        suffix = "_lines.csv"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.history_dir) if name.endswith(suffix))
+
+    def iter_history(self, customer_id, start=None, end=None, offset=0, limit=None):
+        with open(self.history_file(customer_id), newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            rows = (row for row in reader if row)
+            if start is not None:
+                rows = (row for row in rows if row[0] >= start)
+            if end is not None:
+                rows = (row for row in rows if row[0][:len(end)] <= end)
+            stop = None if limit is None else offset + limit
+            yield from itertools.islice(rows, offset, stop)
+
+    def history_customers(self):
+        if not os.path.isdir(self.history_dir):
+            return []
+        suffix = "_history.csv"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.history_dir) if name.endswith(suffix))
+
+
+@instrument_methods('storage.SQLiteBackend', skip=('lock', 'close'), io=True)
+class SQLiteBackend(StorageBackend):
+    """Baza SQLite w trybie WAL z indeksowanymi tabelami i zapisami w transakcjach."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            price REAL,
+            stock INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_products_name ON products (name COLLATE NOCASE);
+        CREATE TABLE IF NOT EXISTS customers (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            phone TEXT,
+            created TEXT,
+            updated TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_customers_email ON customers (email COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_customers_name ON customers (name COLLATE NOCASE);
+        CREATE TABLE IF NOT EXISTS history (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            products TEXT NOT NULL,
+            total_price TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_history_customer ON history (customer_id, date);
+        CREATE TABLE IF NOT EXISTS purchase_lines (
+            purchase_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            customer_id TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_lines_customer ON purchase_lines (customer_id);
+        CREATE INDEX IF NOT EXISTS idx_lines_product ON purchase_lines (product_id, date);
+        CREATE TABLE IF NOT EXISTS reservations (
+            id TEXT PRIMARY KEY,
+            expires REAL NOT NULL,
+            items TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path=SQLITE_FILE):
+        self.db_path = db_path
+        self._file_lock = FileLock(db_path + '.lock')
+        self.stock_log_file = db_path + '.stock.log'
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def products_exist(self):
+        return True
+
+    def products_signature(self):
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load_products(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, name, price, stock FROM products ORDER BY rowid").fetchall()
+        return [dict(zip(PRODUCT_COLUMNS, row)) for row in rows]
+
+    def load_product_columns(self, columns):
+        import pandas as pd
+        columns = [c for c in columns if c in PRODUCT_COLUMNS]
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(columns)} FROM products ORDER BY rowid").fetchall()
+        return pd.DataFrame(rows, columns=columns)
+
+    def write_products(self, products, changed=None, removed=()):
+        ids = products.keys() if changed is None else changed
+        rows = [tuple(products[i][c] for c in PRODUCT_COLUMNS) for i in ids if i in products]
+        with self._lock, self._conn:
+            if removed:
+                self._conn.executemany("DELETE FROM products WHERE id = ?", [(i,) for i in removed])
+            self._conn.executemany(
+                "INSERT INTO products (id, name, price, stock) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET name = excluded.name, price = excluded.price, stock = excluded.stock",
+                rows
+            )
+
+    def load_reservations(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, expires, items FROM reservations").fetchall()
+        return {rid: {'expires': expires, 'items': json.loads(items)} for rid, expires, items in rows}
+
+    def write_reservations(self, reservations):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM reservations")
+            self._conn.executemany(
+                "INSERT INTO reservations (id, expires, items) VALUES (?, ?, ?)",
+                [(rid, r['expires'], json.dumps(r['items'])) for rid, r in reservations.items()]
+            )
+
+    def customers_signature(self):
+        return self.products_signature()
+
+    def load_customers(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, email, phone, created, updated FROM customers ORDER BY rowid"
+            ).fetchall()
+        return [dict(zip(CUSTOMER_FIELDS, ("" if v is None else v for v in row))) for row in rows]
+
+    def save_customers(self, customers):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM customers")
+            self._conn.executemany(
+                "INSERT INTO customers (id, name, email, phone, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                [tuple(c.get(f, "") for f in CUSTOMER_FIELDS) for c in customers]
+            )
+
+    def insert_customers(self, customers):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO customers (id, name, email, phone, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                [tuple(customer.get(f, "") for f in CUSTOMER_FIELDS) for customer in customers]
+            )
+
+    def delete_customers(self, ids):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM customers WHERE id = ?", [(str(i),) for i in ids])
+
+    def append_history(self, customer_id, row):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO history (customer_id, date, products, total_price) VALUES (?, ?, ?, ?)",
+                (str(customer_id), *row)
+            )
+
+    def append_purchase(self, customer_id, row, lines):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO history (customer_id, date, products, total_price) VALUES (?, ?, ?, ?)",
+                (str(customer_id), *row)
+            )
+            self._conn.executemany(
+                "INSERT INTO purchase_lines (purchase_id, date, customer_id, product_id, name, quantity, unit_price) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [tuple(line[f] for f in LINE_FIELDS) for line in lines]
+            )
+
+    def load_purchase_lines(self, customer_id=None):
+        import pandas as pd
+        sql = ("SELECT purchase_id AS PURCHASE_ID, date AS DATE, customer_id AS CUSTOMER_ID, product_id AS PRODUCT_ID, "
+               "name AS NAME, quantity AS QUANTITY, unit_price AS UNIT_PRICE FROM purchase_lines")
+        params = ()
+        if customer_id is not None:
+            sql += " WHERE customer_id = ?"
+            params = (str(customer_id),)
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+        return _typed_lines(df)
+
+    def write_purchase_lines(self, customer_id, lines):
+        out = lines[LINE_FIELDS].copy()
+        out["DATE"] = out["DATE"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM purchase_lines WHERE customer_id = ?", (str(customer_id),))
+            self._conn.executemany(
+                "INSERT INTO purchase_lines (purchase_id, date, customer_id, product_id, name, quantity, unit_price) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                out.astype(object).itertuples(index=False, name=None)
+            )
+
+    def purchase_line_customers(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT customer_id FROM purchase_lines ORDER BY customer_id").fetchall()
+        return [row[0] for row in rows]
+
+    def purchase_lines_position(self):
+        """Zwraca (liczba pozycji, największy rowid); zmienia się przy każdym dopisaniu i usunięciu pozycji."""
+        with self._lock:
+            count, last = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM purchase_lines").fetchone()
+        return count, last
+
+    def load_purchase_lines_after(self, rowid):
+        """
+        Wczytuje pozycje dopisane po podanym rowid (zakupy dopisywane przez append_purchase).
+
+        Returns:
+            tuple: (ramka pozycji, największy wczytany rowid).
+        """
+        import pandas as pd
+        sql = ("SELECT rowid AS ROWID, purchase_id AS PURCHASE_ID, date AS DATE, customer_id AS CUSTOMER_ID, "
+               "product_id AS PRODUCT_ID, name AS NAME, quantity AS QUANTITY, unit_price AS UNIT_PRICE "
+               "FROM purchase_lines WHERE rowid > ? ORDER BY rowid")
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=(rowid,))
+        last = int(df["ROWID"].max()) if not df.empty else rowid
+        return _typed_lines(df), last
+
+    HISTORY_BATCH = 500
+
+    def iter_history(self, customer_id, start=None, end=None, offset=0, limit=None):
+        where = "customer_id = ?"
+        params = [str(customer_id)]
+        if start is not None:
+            where += " AND date >= ?"
+            params.append(start)
+        if end is not None:
+            where += " AND substr(date, 1, ?) <= ?"
+            params += [len(end), end]
+        # Stronicowanie po kluczu: blokada połączenia jest trzymana tylko na czas jednej porcji.
+        last_seq, remaining = None, limit
+        while remaining is None or remaining > 0:
+            batch = self.HISTORY_BATCH if remaining is None else min(self.HISTORY_BATCH, remaining)
+            sql = f"SELECT seq, date, products, total_price FROM history WHERE {where}"
+            batch_params = list(params)
+            if last_seq is not None:
+                sql += " AND seq > ?"
+                batch_params.append(last_seq)
+            sql += " ORDER BY seq LIMIT ? OFFSET ?"
+            batch_params += [batch, offset if last_seq is None else 0]
+            with self._lock:
+                rows = self._conn.execute(sql, batch_params).fetchall()
+            for row in rows:
+                yield list(row[1:])
+            if len(rows) < batch:
+                return
+            last_seq = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def history_customers(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT customer_id FROM history ORDER BY customer_id").fetchall()
+        return [row[0] for row in rows]
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(products_file=PRODUCTS_FILE, customer_file=CUSTOMER_FILE, history_dir=DATABASE_DIR):
+    """
+    Zwraca współdzielony backend dla podanych ścieżek.
+
+    Ścieżka z rozszerzeniem .db/.sqlite wskazuje bezpośrednio bazę SQLite.
+    Zmienna środowiskowa FROG_STORAGE=sqlite przełącza całą aplikację na bazę
+    wskazaną przez FROG_DB (domyślnie database/frog.db).
+    """
+    if str(products_file).endswith(SQLITE_SUFFIXES):
+        key = ('sqlite', os.path.abspath(products_file))
+        factory = lambda: SQLiteBackend(products_file)
+    elif os.environ.get("FROG_STORAGE", "file").lower() == "sqlite":
+        db_path = os.environ.get("FROG_DB", SQLITE_FILE)
+        key = ('sqlite', os.path.abspath(db_path))
+        factory = lambda: SQLiteBackend(db_path)
+    else:
+        key = ('file', os.path.abspath(products_file), os.path.abspath(customer_file), os.path.abspath(history_dir))
+        factory = lambda: FileBackend(products_file, customer_file, history_dir)
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            backend = _backends[key] = factory()
+        return backend
+
+
+def migrate_to_sqlite(db_path=SQLITE_FILE, products_file=PRODUCTS_FILE, customer_file=CUSTOMER_FILE, history_dir=DATABASE_DIR):
+    """
+    Importuje produkty, klientów i historię zakupów z plików do bazy SQLite.
+
+    Import odbywa się w jednej transakcji i zastępuje dotychczasową zawartość bazy.
+
+    Returns:
+        dict: Liczba zaimportowanych produktów, klientów i wierszy historii.
+    """
+    import pandas as pd
+    source = FileBackend(products_file, customer_file, history_dir)
+    target = SQLiteBackend(db_path)
+    products = source.load_products()
+    customers = source.load_customers()
+    history = [(cid, row) for cid in source.history_customers() for row in source.read_history(cid)]
+    converted = set(source.purchase_line_customers())
+    lines = pd.concat(
+        [source.load_purchase_lines()] + [
+            parse_legacy_history(source.read_history(cid), cid)
+            for cid in source.history_customers() if cid not in converted
+        ],
+        ignore_index=True
+    )
+    lines["DATE"] = lines["DATE"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        with target._conn:
+            target._conn.execute("DELETE FROM products")
+            target._conn.execute("DELETE FROM customers")
+            target._conn.execute("DELETE FROM history")
+            target._conn.execute("DELETE FROM purchase_lines")
+            target._conn.executemany(
+                "INSERT INTO products (id, name, price, stock) VALUES (?, ?, ?, ?)",
+                [(int(p['id']), p['name'], float(p['price']), int(p['stock'])) for p in products]
+            )
+            target._conn.executemany(
+                "INSERT INTO customers (id, name, email, phone, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                [tuple(c.get(f, "") for f in CUSTOMER_FIELDS) for c in customers]
+            )
+            target._conn.executemany(
+                "INSERT INTO history (customer_id, date, products, total_price) VALUES (?, ?, ?, ?)",
+                [(cid, *row[:3]) for cid, row in history]
+            )
+            target._conn.executemany(
+                "INSERT INTO purchase_lines (purchase_id, date, customer_id, product_id, name, quantity, unit_price) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                lines[LINE_FIELDS].astype(object).itertuples(index=False, name=None)
+            )
+    finally:
+        target.close()
+    return {'products': len(products), 'customers': len(customers), 'history': len(history), 'lines': len(lines)}
+
+
+def convert_legacy_history(backend=None, overwrite=False):
+    """
+    Tworzy pozycje zakupów z tekstowej historii (<ID>_history.csv) dla każdego klienta.
+
+    Klienci, którzy mają już zapisane pozycje, są pomijani, chyba że overwrite=True.
+
+    Returns:
+        int: Liczba utworzonych pozycji.
+    """
+    backend = backend or get_backend()
+    done = set() if overwrite else set(backend.purchase_line_customers())
+    converted = 0
+    for customer_id in backend.history_customers():
+        if customer_id in done:
+            continue
+        lines = parse_legacy_history(backend.read_history(customer_id), customer_id)
+        backend.write_purchase_lines(customer_id, lines)
+        converted += len(lines)
+    return converted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Narzędzia magazynu danych Żabka Online.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Importuje pliki xlsx/csv do bazy SQLite.")
+    migrate.add_argument("--db", default=SQLITE_FILE)
+    migrate.add_argument("--products", default=PRODUCTS_FILE)
+    migrate.add_argument("--customers", default=CUSTOMER_FILE)
+    migrate.add_argument("--history-dir", default=DATABASE_DIR)
+    convert = sub.add_parser("convert-history", help="Tworzy pozycje zakupów z tekstowej historii.")
+    convert.add_argument("--overwrite", action="store_true")
+    compact = sub.add_parser("compact", help="Scala dziennik klientów z plikiem customer.csv.")
+    compact.add_argument("--customers", default=CUSTOMER_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        counts = migrate_to_sqlite(args.db, args.products, args.customers, args.history_dir)
+        print(f"Zaimportowano do {args.db}: {counts['products']} produktów, "
+              f"{counts['customers']} klientów, {counts['history']} wierszy historii, "
+              f"{counts['lines']} pozycji zakupów.")
+    elif args.command == "convert-history":
+        converted = convert_legacy_history(overwrite=args.overwrite)
+        print(f"Utworzono {converted} pozycji zakupów z historii.")
+    elif args.command == "compact":
+        FileBackend(customer_file=args.customers).compact_customers()
+        print(f"Scalono dziennik klientów z plikiem {args.customers}.")
+
+
+if __name__ == "__main__":
+    main()
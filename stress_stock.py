@@ -0,0 +1,91 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+
+import pandas as pd
+
+from product_management import get_store
+from storage import read_products_frame
+
+
+def _worker(file_path, product_ids, operations, seed, results):
+    """Wykonuje losowe rezerwacje, zatwierdzenia i zwolnienia na wspólnym pliku."""
+    rng = random.Random(seed)
+    store = get_store(file_path)
+    sold = {pid: 0 for pid in product_ids}
+    negative = 0
+    for _ in range(operations):
+        items = [(rng.choice(product_ids), rng.randint(1, 3)) for _ in range(rng.randint(1, 3))]
+        try:
+            reservation_id = store.reserve(items)
+        except ValueError:
+            continue
+        if rng.random() < 0.8:
+            store.commit(reservation_id)
+            for pid, quantity in items:
+                sold[pid] += quantity
+        else:
+            store.release(reservation_id)
+        with store.backend.lock():
+            negative += sum(1 for p in store.all() if p['stock'] < 0)
+    results.put((sold, negative))
+
+
+def run(processes=8, operations=25, products=5, stock=60, seed=0):
+    """
+    Uruchamia test obciążeniowy rezerwacji na tymczasowym pliku produktów.
+
+    Returns:
+        bool: True, jeśli stan nigdy nie spadł poniżej zera i zgadza się z liczbą sprzedanych sztuk.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "products.xlsx")
+        product_ids = list(range(1, products + 1))
+        pd.DataFrame([
+            {'id': pid, 'name': f"produkt {pid}", 'price': 1.0, 'stock': stock} for pid in product_ids
+        ]).to_excel(file_path, index=False, engine='openpyxl')
+
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        workers = [
+            ctx.Process(target=_worker, args=(file_path, product_ids, operations, seed + i, results))
+            for i in range(processes)
+        ]
+        for w in workers:
+            w.start()
+        outcomes = [results.get() for _ in workers]
+        for w in workers:
+            w.join()
+
+        sold = {pid: sum(o[0][pid] for o in outcomes) for pid in product_ids}
+        negative = sum(o[1] for o in outcomes)
+        # Zaległe zmiany z dzienników procesów roboczych trafiają do arkusza przed jego odczytem.
+        get_store(file_path).flush()
+        levels = read_products_frame(file_path, ['id', 'stock'])
+        final = dict(zip(levels['id'], levels['stock']))
+        leftover = get_store(file_path).backend.load_reservations()
+
+        ok = negative == 0 and not leftover
+        for pid in product_ids:
+            expected = stock - sold[pid]
+            line_ok = final[pid] == expected and final[pid] >= 0
+            ok = ok and line_ok
+            print(f"Produkt {pid}: sprzedano {sold[pid]}, stan {final[pid]} (oczekiwano {expected})"
+                  f"{'' if line_ok else ' <- BŁĄD'}")
+        print(f"Obserwacje ujemnego stanu: {negative}, pozostałe rezerwacje: {len(leftover)}")
+        print("Wynik: OK" if ok else "Wynik: BŁĄD")
+        return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test obciążeniowy rezerwacji stanów magazynowych.")
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=25)
+    parser.add_argument("--products", type=int, default=5)
+    parser.add_argument("--stock", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.processes, args.operations, args.products, args.stock, args.seed) else 1)
@@ -0,0 +1,290 @@
+import itertools
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+CHUNK_SIZE = 5000
+VISIBLE_ROWS = 20
+BUFFER_ROWS = 200
+
+
+def iter_table_chunks(source, columns, chunksize=CHUNK_SIZE):
+    """
+    Czyta dane tabelaryczne porcjami, bez wczytywania całego pliku.
+
+    Args:
+        source: Ścieżka do pliku CSV lub xlsx albo funkcja zwracająca iterowalny zbiór słowników
+            lub kolejne porcje jako DataFrame (np. ProductStore.iter_frames).
+        columns: Kolumny do wczytania (pozostałe są pomijane).
+
+    Yields:
+        pd.DataFrame: Kolejne porcje z kolumnami columns.
+    """
+    import pandas as pd
+    if callable(source):
+        rows = iter(source())
+        first = next(rows, None)
+        if isinstance(first, pd.DataFrame):
+            for chunk in itertools.chain([first], rows):
+                yield chunk.reindex(columns=columns)
+            return
+        if first is not None:
+            rows = itertools.chain([first], rows)
+        while True:
+            batch = list(itertools.islice(rows, chunksize))
+            if not batch:
+                return
+            yield pd.DataFrame(batch).reindex(columns=columns)
+    elif str(source).endswith(".xlsx"):
+        from openpyxl import load_workbook
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            while True:
+                batch = list(itertools.islice(rows, chunksize))
+                if not batch:
+                    return
+                yield pd.DataFrame(batch, columns=header).reindex(columns=columns)
+        finally:
+            workbook.close()
+    else:
+        for chunk in pd.read_csv(source, chunksize=chunksize, usecols=lambda c: c in columns):
+            yield chunk.reindex(columns=columns)
+
+
+class TableQuery:
+    """
+    Filtrowany i sortowany widok danych tabelarycznych, czytany porcjami na żądanie.
+
+    Bez sortowania wiersze są doczytywane kolejnymi porcjami tylko do
+    potrzebnej pozycji. Przy sortowaniu każdy przebieg po danych zachowuje
+    jedynie `limit` pierwszych wierszy w porządku sortowania, więc w pamięci
+    nigdy nie ma całego pliku; gdy użytkownik przewinie dalej, limit rośnie
+    dwukrotnie i dane są czytane ponownie.
+    """
+
+    def __init__(self, source, columns, filter_column=None, filter_text="", sort_column=None,
+                 descending=False, chunksize=CHUNK_SIZE):
+        self.source = source
+        self.columns = list(columns)
+        self.filter_column = filter_column
+        self.filter_text = (filter_text or "").strip().lower()
+        self.sort_column = sort_column
+        self.descending = descending
+        self.chunksize = chunksize
+        self.rows = []
+        self.exhausted = False
+        self.total = None
+        self._chunks = None
+        self._limit = 0
+
+    def _filtered(self, chunk):
+        if not self.filter_column or not self.filter_text:
+            return chunk
+        values = chunk[self.filter_column].astype(str).str.lower()
+        return chunk[values.str.contains(self.filter_text, regex=False, na=False)]
+
+    def _sorted(self, frame):
+        return frame.sort_values(self.sort_column, ascending=not self.descending, na_position="last",
+                                 key=_sort_key, kind="stable")
+
+    def fetch(self, count):
+        """Zapewnia, że dostępnych jest co najmniej count wierszy (lub wszystkie, jeśli jest ich mniej)."""
+        if self.exhausted or len(self.rows) >= count:
+            return self.rows
+        if self.sort_column:
+            self._fetch_sorted(count)
+        else:
+            self._fetch_streaming(count)
+        return self.rows
+
+    def _fetch_streaming(self, count):
+        if self._chunks is None:
+            self._chunks = iter_table_chunks(self.source, self.columns, self.chunksize)
+        rows = self.rows
+        while len(rows) < count:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.exhausted = True
+                self.total = len(rows)
+                return
+            rows.extend(self._filtered(chunk).itertuples(index=False, name=None))
+
+    def _fetch_sorted(self, count):
+        import pandas as pd
+        limit = max(count, self._limit * 2, self.chunksize)
+        best = None
+        total = 0
+        for chunk in iter_table_chunks(self.source, self.columns, self.chunksize):
+            chunk = self._filtered(chunk)
+            total += len(chunk)
+            candidates = chunk if best is None else pd.concat([best, chunk], ignore_index=True)
+            best = self._sorted(candidates).head(limit)
+        self._limit = limit
+        self.total = total
+        self.exhausted = total <= limit
+        self.rows = [] if best is None else list(best.itertuples(index=False, name=None))
+
+
+def _sort_key(values):
+    """Sortuje kolumny liczbowe numerycznie, a tekstowe bez rozróżniania wielkości liter."""
+    import pandas as pd
+    numeric = pd.to_numeric(values, errors="coerce")
+    if numeric.notna().sum() == values.notna().sum():
+        return numeric
+    return values.astype(str).str.lower()
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Tabela, która wstawia do ttk.Treeview tylko widoczne wiersze.
+
+    Dane pochodzą z TableQuery i są doczytywane w tle (TaskRunner) z
+    wyprzedzeniem BUFFER_ROWS wierszy. Własny pasek przewijania odwzorowuje
+    pozycję w całym zbiorze, kliknięcie nagłówka sortuje po kolumnie, a pole
+    filtru zawęża wiersze do zawierających podany tekst.
+    """
+
+    def __init__(self, parent, source, columns, tasks, visible_rows=VISIBLE_ROWS, on_error=None):
+        super().__init__(parent)
+        self.source = source
+        self.columns = list(columns)
+        self.tasks = tasks
+        self.visible_rows = visible_rows
+        self.on_error = on_error
+        self.offset = 0
+        self._loading = False
+        self._generation = 0
+        self._sort_column = None
+        self._descending = False
+
+        bar = ttk.Frame(self)
+        bar.pack(fill="x", padx=10, pady=(10, 0))
+        ttk.Label(bar, text="Filtr:").pack(side="left")
+        self.filter_column = ttk.Combobox(bar, values=self.columns, width=12, state="readonly")
+        self.filter_column.current(0)
+        self.filter_column.pack(side="left", padx=5)
+        self.filter_entry = ttk.Entry(bar, width=25)
+        self.filter_entry.pack(side="left", padx=5)
+        self.filter_entry.bind("<Return>", lambda event: self.apply_filter())
+        ttk.Button(bar, text="Filtruj", command=self.apply_filter).pack(side="left", padx=5)
+        self.status = ttk.Label(bar, text="")
+        self.status.pack(side="right")
+
+        body = ttk.Frame(self)
+        body.pack(fill="both", expand=True, padx=10, pady=10)
+        self.tree = ttk.Treeview(body, columns=self.columns, show="headings", height=visible_rows)
+        for col in self.columns:
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, width=100, anchor="center")
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_wheel)
+        self.tree.bind("<Configure>", self._on_resize)
+
+        self.query = TableQuery(source, self.columns)
+        self._ensure_loaded()
+
+    def apply_filter(self):
+        """Zastosowuje filtr z pola tekstowego do wybranej kolumny."""
+        self._reset_query()
+
+    def sort_by(self, column):
+        """Sortuje po kolumnie; ponowne kliknięcie odwraca kierunek."""
+        if self._sort_column == column:
+            self._descending = not self._descending
+        else:
+            self._sort_column, self._descending = column, False
+        for col in self.columns:
+            arrow = (" ▼" if self._descending else " ▲") if col == column else ""
+            self.tree.heading(col, text=col + arrow)
+        self._reset_query()
+
+    def _reset_query(self):
+        self._generation += 1
+        self._loading = False
+        self.offset = 0
+        self.query = TableQuery(self.source, self.columns, self.filter_column.get(), self.filter_entry.get(),
+                                self._sort_column, self._descending)
+        self._render()
+        self._ensure_loaded()
+
+    def _known_rows(self):
+        return len(self.query.rows)
+
+    def _max_offset(self):
+        return max(0, self._known_rows() - self.visible_rows)
+
+    def scroll_to(self, offset):
+        self.offset = int(min(max(0, offset), self._max_offset()))
+        self._render()
+        self._ensure_loaded()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            total = self.query.total if self.query.total is not None else self._known_rows()
+            self.scroll_to(float(amount) * total)
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.offset - 3)
+        else:
+            self.scroll_to(self.offset + 3)
+        return "break"
+
+    def _on_resize(self, event):
+        row_height = 20
+        visible = max(1, event.height // row_height - 1)
+        if visible != self.visible_rows:
+            self.visible_rows = visible
+            self.scroll_to(self.offset)
+
+    def _render(self):
+        rows = self.query.rows[self.offset:self.offset + self.visible_rows]
+        self.tree.delete(*self.tree.get_children())
+        for values in rows:
+            self.tree.insert("", "end", values=values)
+        known = self._known_rows()
+        total = self.query.total
+        if known:
+            denominator = total if total else known + (0 if self.query.exhausted else self.visible_rows)
+            self.scrollbar.set(self.offset / denominator, min(1.0, (self.offset + len(rows)) / denominator))
+            count = f"{total}" if total is not None else f"{known}+"
+            self.status.configure(text=f"Wiersze {self.offset + 1}–{self.offset + len(rows)} z {count}")
+        else:
+            self.scrollbar.set(0, 1)
+            self.status.configure(text="Wczytywanie..." if not self.query.exhausted else "Brak wierszy")
+
+    def _ensure_loaded(self):
+        """Doczytuje w tle wiersze potrzebne do wyświetlenia bieżącego okna wraz z buforem."""
+        needed = self.offset + self.visible_rows + BUFFER_ROWS
+        if self._loading or self.query.exhausted or self._known_rows() >= needed:
+            return
+        self._loading = True
+        generation = self._generation
+        query = self.query
+
+        def done(_rows):
+            if generation != self._generation or not self.winfo_exists():
+                return
+            self._loading = False
+            self._render()
+            self._ensure_loaded()
+
+        def failed(error):
+            if generation != self._generation:
+                return
+            self._loading = False
+            if self.on_error is not None:
+                self.on_error(error)
+            else:
+                messagebox.showerror("Błąd", f"Błąd podczas wczytywania danych: {error}")
+
+        self.tasks.submit(query.fetch, needed, on_success=done, on_error=failed)
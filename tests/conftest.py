@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import FileBackend, get_backend  # noqa: E402
+
+PRODUCTS = [
+    {'id': 1, 'name': 'Mleko', 'price': 3.5, 'stock': 10},
+    {'id': 2, 'name': 'Chleb', 'price': 4.0, 'stock': 5},
+    {'id': 3, 'name': 'Masło', 'price': 7.25, 'stock': 0},
+]
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """Backend plikowy w katalogu tymczasowym z trzema produktami."""
+    database = tmp_path / "database"
+    database.mkdir()
+    backend = FileBackend(str(database / "products.xlsx"), str(database / "customer.csv"),
+                          str(database / "DATABASE"))
+    backend.write_products({product['id']: dict(product) for product in PRODUCTS})
+    return backend
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Katalog roboczy z domyślnymi ścieżkami database/... (produkty jak w backend, bez klientów)."""
+    import projekt_customers
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FROG_WRITE_BEHIND", "0")
+    (tmp_path / "database").mkdir()
+    backend = get_backend()
+    backend.write_products({product['id']: dict(product) for product in PRODUCTS})
+    projekt_customers._invalidate_customer_index()
+    return backend
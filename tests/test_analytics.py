@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+import analytics
+from analytics import SalesAnalytics
+
+
+def purchase(backend, customer_id, purchase_id, date, *items):
+    lines = [{"PURCHASE_ID": purchase_id, "DATE": date, "CUSTOMER_ID": str(customer_id), "PRODUCT_ID": pid,
+              "NAME": name, "QUANTITY": quantity, "UNIT_PRICE": price} for pid, name, quantity, price in items]
+    total = sum(quantity * price for _, _, quantity, price in items)
+    backend.append_purchase(customer_id, [date, "...", f"{total:.2f}"], lines)
+
+
+@pytest.fixture
+def history(backend):
+    purchase(backend, 1, "a", "2025-05-01 10:00:00", (1, "Mleko", 2, 3.5), (2, "Chleb", 1, 4.0))
+    purchase(backend, 1, "b", "2025-05-02 11:00:00", (1, "Mleko", 1, 3.5))
+    purchase(backend, 2, "c", "2025-05-02 12:00:00", (3, "Masło", 3, 7.25))
+    return backend
+
+
+def test_aggregates(history):
+    sales = SalesAnalytics(history)
+    assert sales.refresh() == 2
+    top = sales.top_products(by='units')
+    assert top.index.tolist()[0] == 1 and top.loc[1, 'UNITS'] == 3
+    assert sales.top_products(n=1, by='revenue').index.tolist() == [3]
+    daily = sales.revenue_by_day()
+    assert daily.tolist() == pytest.approx([11.0, 25.25])
+    clv = sales.customer_lifetime_value()
+    assert clv.index.tolist() == ['2', '1']
+    assert clv.loc['1', 'PURCHASES'] == 2 and clv.loc['1', 'REVENUE'] == pytest.approx(14.5)
+
+
+def test_only_changed_files_are_recomputed(history):
+    sales = SalesAnalytics(history)
+    sales.refresh()
+    assert sales.refresh() == 0
+    purchase(history, 2, "d", "2025-05-03 09:00:00", (2, "Chleb", 5, 4.0))
+    assert sales.refresh() == 1
+    assert sales.top_products(n=1).index.tolist() == [2]
+    assert sales.customer_lifetime_value().loc['2', 'PURCHASES'] == 2
+
+
+def test_cache_is_shared_between_instances_and_follows_removals(history):
+    first = SalesAnalytics(history)
+    first.refresh()
+    second = SalesAnalytics(history)
+    assert second.refresh() == 0
+    assert second.revenue_by_day().tolist() == pytest.approx([11.0, 25.25])
+    os.remove(history.lines_file(2))
+    os.remove(history.history_file(2))
+    assert second.refresh() == 0
+    assert second.customer_lifetime_value().index.tolist() == ['1']
+
+
+def test_legacy_history_is_used_until_lines_exist(backend):
+    backend.append_history(5, ["2025-05-01 10:00:00", "Mleko (ID: 1, Ilość: 4, Cena: 3.50)", "14.00"])
+    sales = SalesAnalytics(backend)
+    assert sales.refresh() == 1
+    assert sales.top_products().loc[1, 'UNITS'] == 4
+    purchase(backend, 5, "n", "2025-05-02 10:00:00", (1, "Mleko", 1, 3.5))
+    assert sales.refresh() == 1
+    assert sales.top_products().loc[1, 'UNITS'] == 5
+
+
+def test_parallel_refresh_matches_serial(backend, monkeypatch):
+    for customer_id in range(1, 11):
+        purchase(backend, customer_id, f"p{customer_id}", f"2025-05-{customer_id:02d} 10:00:00",
+                 (customer_id, f"Produkt {customer_id}", customer_id, 1.5))
+    serial = SalesAnalytics(backend, cache_file="")
+    serial.refresh()
+    monkeypatch.setattr(analytics, "PARALLEL_THRESHOLD", 2)
+    parallel = SalesAnalytics(backend, cache_file="", max_workers=2)
+    assert parallel.refresh() == 10
+    assert parallel.top_products(n=20).equals(serial.top_products(n=20))
+    assert parallel.revenue_by_day().equals(serial.revenue_by_day())
+
+
+def test_empty_history(backend):
+    sales = SalesAnalytics(backend)
+    assert sales.refresh() == 0
+    assert sales.top_products().empty and sales.revenue_by_day().empty
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from product_management import bulk_add_products, bulk_upsert_products, export_products, get_store
+from projekt_customers import bulk_register_customers, export_customers, register_customer
+from storage import PRODUCTS_FILE
+
+
+def by_row(report):
+    return [(r['row'], r['status']) for r in report]
+
+
+def test_bulk_add_reports_every_row(workdir):
+    feed = [
+        {'id': 10, 'name': 'Ser', 'price': 12.5, 'stock': 4},
+        {'id': 1, 'name': 'Mleko 2%', 'price': 3.9, 'stock': 1},
+        {'id': 10, 'name': 'Ser drugi', 'price': 1, 'stock': 1},
+        {'id': 11, 'name': '', 'price': 1, 'stock': 1},
+        {'id': 12, 'name': 'Sok', 'price': -1, 'stock': 1},
+        {'id': 13, 'name': 'Woda', 'price': 1.5, 'stock': 2.5},
+        {'id': 'x', 'name': 'Kawa', 'price': 9, 'stock': 1},
+        {'id': 14, 'name': 'Herbata', 'price': '6.20', 'stock': '3'},
+    ]
+    report = bulk_add_products(PRODUCTS_FILE, feed)
+    assert by_row(report) == [(0, 'added'), (1, 'exists'), (2, 'duplicate'), (3, 'invalid'),
+                              (4, 'invalid'), (5, 'invalid'), (6, 'invalid'), (7, 'added')]
+    assert all(r['message'] for r in report)
+    store = get_store(PRODUCTS_FILE)
+    assert store.get(10)['name'] == 'Ser'
+    assert store.get(14)['price'] == 6.2 and store.get(14)['stock'] == 3
+    assert store.get(1)['name'] == 'Mleko'
+    assert store.get(11) is None
+
+
+def test_bulk_upsert_overwrites_existing(workdir):
+    report = bulk_upsert_products(PRODUCTS_FILE, pd.DataFrame(
+        {'ID': [1, 20], 'Name': ['Mleko 2%', 'Jogurt'], 'Price': [3.9, 2.0], 'Stock': [1, 8]}))
+    assert by_row(report) == [(0, 'updated'), (1, 'added')]
+    store = get_store(PRODUCTS_FILE)
+    assert store.get(1)['name'] == 'Mleko 2%' and store.get(20)['stock'] == 8
+
+
+def test_bulk_import_from_csv_and_missing_columns(workdir, tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text("id,name,price,stock\n30,Ryż,4.5,2\n31,Kasza,3,0\n", encoding='utf-8')
+    assert by_row(bulk_add_products(PRODUCTS_FILE, str(path))) == [(0, 'added'), (1, 'added')]
+    assert get_store(PRODUCTS_FILE).get(30)['name'] == 'Ryż'
+    assert bulk_add_products(PRODUCTS_FILE, [{'id': 1, 'name': 'X'}]) is None
+
+
+def test_export_products_round_trip(workdir, tmp_path):
+    dest = tmp_path / "export.csv"
+    assert export_products(PRODUCTS_FILE, str(dest), chunksize=2) == 3
+    exported = pd.read_csv(dest)
+    assert exported['id'].tolist() == [1, 2, 3]
+    assert exported['name'].tolist() == ['Mleko', 'Chleb', 'Masło']
+
+
+def test_bulk_register_customers_reports_every_row(workdir, tmp_path):
+    register_customer("Anna", "anna@example.com")
+    report = bulk_register_customers([
+        {'NAME': 'Jan', 'E-MAIL': 'jan@example.com', 'PHONE': '123'},
+        {'NAME': 'Anna B', 'E-MAIL': 'ANNA@example.com'},
+        {'NAME': 'Jan 2', 'E-MAIL': 'Jan@Example.com'},
+        {'NAME': '', 'E-MAIL': 'pusty@example.com'},
+        {'NAME': 'Ewa', 'E-MAIL': 'ewa@example.com'},
+    ])
+    assert by_row(report) == [(0, 'added'), (1, 'exists'), (2, 'duplicate'), (3, 'invalid'), (4, 'added')]
+    first_id = int(report[0]['id'])
+    assert int(report[4]['id']) == first_id + 1
+    assert report[1]['id'] == ''
+
+    dest = tmp_path / "customers.csv"
+    assert export_customers(str(dest), chunksize=2) == 3
+    emails = pd.read_csv(dest, dtype=str)['E-MAIL'].tolist()
+    assert emails == ['anna@example.com', 'jan@example.com', 'ewa@example.com']
+
+
+def test_bulk_register_requires_columns(workdir):
+    assert bulk_register_customers([{'NAME': 'Jan'}]) is None
@@ -0,0 +1,166 @@
+import math
+import random
+
+import pytest
+
+from cart import Cart
+from utils import apply_discount
+
+CATALOG = {pid: {'id': pid, 'name': f'Produkt {pid}', 'price': price, 'stock': 100}
+           for pid, price in enumerate([0.1, 0.2, 0.3, 1.15, 3.33, 7.25, 19.99, 0.07], start=1)}
+
+
+def recompute(cart, discounts, cart_rate):
+    """Pełne przeliczenie koszyka od zera, bez sum przyrostowych."""
+    lines = []
+    for product_id, quantity in cart.items():
+        price = float(CATALOG[product_id]['price'])
+        unit = apply_discount(apply_discount(price, discounts.get(product_id, 0.0)), cart_rate)
+        lines.append({'id': product_id, 'quantity': quantity, 'base_price': price,
+                      'unit_price': unit, 'total': unit * quantity})
+    subtotal = math.fsum(line['base_price'] * line['quantity'] for line in lines)
+    return lines, subtotal, math.fsum(line['total'] for line in lines)
+
+
+def assert_matches(cart, discounts, cart_rate):
+    lines, subtotal, total = recompute(cart, discounts, cart_rate)
+    assert cart.subtotal == pytest.approx(subtotal, rel=1e-9, abs=1e-9)
+    assert cart.total == pytest.approx(total, rel=1e-9, abs=1e-9)
+    assert cart.discount == pytest.approx(subtotal - total, abs=1e-9)
+    cart_lines = cart.lines()
+    assert [line['id'] for line in cart_lines] == [line['id'] for line in lines]
+    for actual, expected in zip(cart_lines, lines):
+        assert actual['quantity'] == expected['quantity']
+        assert actual['unit_price'] == pytest.approx(expected['unit_price'])
+        assert actual['total'] == pytest.approx(expected['total'])
+    assert math.fsum(line['total'] for line in cart_lines) == pytest.approx(cart.total, abs=1e-9)
+
+
+def test_add_aggregates_quantities_and_normalizes_ids():
+    cart = Cart(lookup=CATALOG.get)
+    cart.add(1, 2)
+    cart.add('1', 3)
+    cart.add(2.0)
+    assert cart.items() == [(1, 5), (2, 1)]
+    assert '2' in cart and cart.quantity(1) == 5
+    assert cart.subtotal == pytest.approx(0.7)
+
+
+def test_invalid_operations():
+    cart = Cart(lookup=CATALOG.get)
+    with pytest.raises(KeyError):
+        cart.add(999)
+    with pytest.raises(ValueError):
+        cart.add(1, 0)
+    with pytest.raises(KeyError):
+        cart.apply_discount(0.1, product_id=1)
+    cart.add(1)
+    with pytest.raises(ValueError):
+        cart.apply_discount(1.5)
+    cart.remove(999)
+    assert cart.items() == [(1, 1)]
+
+
+def test_removing_everything_resets_totals_exactly():
+    cart = Cart(lookup=CATALOG.get)
+    for product_id in (1, 2, 3):
+        cart.add(product_id, 3)
+    cart.apply_discount(0.15)
+    for product_id in (1, 2, 3):
+        cart.remove(product_id)
+    assert not cart
+    assert cart.subtotal == 0.0 and cart.total == 0.0 and cart.lines() == []
+
+
+def test_line_discount_is_dropped_with_the_line():
+    cart = Cart(lookup=CATALOG.get)
+    cart.add(6, 2)
+    cart.apply_discount(0.5, product_id=6)
+    cart.remove(6)
+    cart.add(6, 1)
+    assert cart.total == pytest.approx(7.25)
+
+
+def test_set_quantity_and_clear():
+    cart = Cart(lookup=CATALOG.get)
+    cart.set_quantity(5, 4)
+    cart.set_quantity(5, 1)
+    assert cart.items() == [(5, 1)]
+    cart.set_quantity(5, 0)
+    assert not cart
+    cart.add(7)
+    cart.clear()
+    assert cart.total == cart.subtotal == 0.0 and cart.lines() == []
+
+
+def test_refresh_picks_up_price_changes_and_removed_products():
+    catalog = {pid: dict(product) for pid, product in CATALOG.items()}
+    cart = Cart(lookup=catalog.get)
+    cart.add(1, 2)
+    cart.add(7, 1)
+    cart.apply_discount(0.1, product_id=7)
+    catalog[7] = dict(catalog[7], price=10.0)
+    del catalog[1]
+    assert cart.total == pytest.approx(0.2 + 19.99 * 0.9)
+    cart.refresh()
+    assert cart.items() == [(7, 1)]
+    assert cart.total == pytest.approx(9.0)
+    assert cart.subtotal == pytest.approx(10.0)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_sequences_match_full_recomputation(seed):
+    rng = random.Random(seed)
+    cart = Cart(lookup=CATALOG.get)
+    discounts, cart_rate = {}, 0.0
+    for step in range(2000):
+        action = rng.random()
+        product_id = rng.choice(list(CATALOG))
+        if action < 0.45:
+            cart.add(product_id, rng.randint(1, 5))
+        elif action < 0.7:
+            quantity = rng.choice([None, rng.randint(1, 4)])
+            cart.remove(product_id, quantity)
+            if product_id not in cart:
+                discounts.pop(product_id, None)
+        elif action < 0.8 and product_id in cart:
+            discounts[product_id] = rate = rng.choice([0.0, 0.05, 0.1, 0.33])
+            cart.apply_discount(rate, product_id=product_id)
+        elif action < 0.85:
+            cart_rate = rng.choice([0.0, 0.02, 0.125])
+            cart.apply_discount(cart_rate)
+        elif action < 0.95:
+            cart.set_quantity(product_id, rng.randint(0, 6))
+            if product_id not in cart:
+                discounts.pop(product_id, None)
+        else:
+            cart.refresh()
+        if step % 50 == 0:
+            assert_matches(cart, discounts, cart_rate)
+    assert_matches(cart, discounts, cart_rate)
+
+
+def test_copy_is_independent():
+    cart = Cart(lookup=CATALOG.get)
+    cart.add(1, 2)
+    cart.apply_discount(0.1, product_id=1)
+    snapshot = cart.copy()
+    cart.add(2, 5)
+    cart.apply_discount(0.5)
+    snapshot.remove(1, 1)
+    assert snapshot.items() == [(1, 1)]
+    assert snapshot.total == pytest.approx(0.09)
+    assert cart.items() == [(1, 2), (2, 5)]
+    assert_matches(cart, {1: 0.1}, 0.5)
+
+
+def test_price_cart_prices_current_prices_without_touching_the_cart(tmp_path):
+    from promotions import price_cart
+    catalog = {pid: dict(product) for pid, product in CATALOG.items()}
+    cart = Cart(lookup=catalog.get)
+    cart.add(6, 2)
+    catalog[6] = dict(catalog[6], price=5.0)
+    priced = price_cart(cart, file_path=str(tmp_path / "promotions.json"))
+    assert priced['total'] == pytest.approx(10.0)
+    assert cart.total == pytest.approx(14.5)
+    assert cart.lines()[0]['base_price'] == 7.25
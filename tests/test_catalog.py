@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog import INDEX_PENDING, Product, ProductCatalog
+
+FRAME = pd.DataFrame({'id': [3, 1, 2, 4], 'name': ['Mleko', 'Chleb', 'Mleko', 'Masło'],
+                      'price': [3.5, 4.0, 3.9, 7.25], 'stock': [10, 0, 5, 2]})
+
+
+@pytest.fixture
+def catalog():
+    return ProductCatalog.from_frame(FRAME)
+
+
+def test_lookup_and_iteration(catalog):
+    assert list(catalog) == [3, 1, 2, 4] and len(catalog) == 4
+    assert catalog[2] == Product(2, 'Mleko', 3.9, 5)
+    assert dict(catalog[1]) == {'id': 1, 'name': 'Chleb', 'price': 4.0, 'stock': 0}
+    assert catalog.get(99) is None and 99 not in catalog and 'abc' not in catalog
+    with pytest.raises(KeyError):
+        catalog[99]
+    assert [p.name for p in catalog.values(1, 3)] == ['Chleb', 'Mleko']
+    pd.testing.assert_frame_equal(catalog.frame(), FRAME)
+
+
+def test_columns_are_typed_read_only_views(catalog):
+    assert catalog.column('id').dtype == np.int64 and catalog.column('price').dtype == np.float64
+    with pytest.raises(ValueError):
+        catalog.column('stock')[0] = 1
+    assert catalog.column('name').tolist() == ['Mleko', 'Chleb', 'Mleko', 'Masło']
+
+
+def test_put_adds_and_replaces(catalog):
+    catalog.put({'id': 5, 'name': 'Ser', 'price': 12.0, 'stock': 1})
+    catalog.put({'id': 3, 'name': 'Mleko 2%', 'price': 3.6, 'stock': 8})
+    assert list(catalog) == [3, 1, 2, 4, 5]
+    assert catalog[3] == Product(3, 'Mleko 2%', 3.6, 8)
+    assert catalog[5].name == 'Ser'
+    catalog.set_stock(5, 0)
+    assert catalog[5].stock == 0
+    with pytest.raises(KeyError):
+        catalog.set_stock(99, 1)
+
+
+def test_many_puts_keep_index_consistent():
+    catalog = ProductCatalog()
+    for i in range(INDEX_PENDING * 3):
+        catalog.put({'id': i * 2, 'name': f'P{i % 7}', 'price': float(i), 'stock': i})
+        if i % 500 == 0:
+            assert catalog.get(i * 2).stock == i
+    assert all(catalog[i * 2].price == float(i) for i in range(0, INDEX_PENDING * 3, 97))
+    assert catalog.get(1) is None
+    assert len(catalog._names) == 7
+
+
+def test_mixed_types_fall_back_to_object_columns(catalog):
+    catalog.put({'id': 'ABC', 'name': 'Kawa', 'price': 9.0, 'stock': math.nan})
+    assert catalog.column('id').dtype == object and catalog.column('stock').dtype == object
+    assert catalog['ABC'].name == 'Kawa' and catalog[2].stock == 5
+    assert catalog.to_arrays() is None
+    catalog.put({'id': 7, 'name': 'Sok', 'price': True, 'stock': 1})
+    assert catalog[7].price is True
+
+
+def test_remove_and_copy(catalog):
+    backup = catalog.copy()
+    assert catalog.remove([1, 99]) == 1
+    assert catalog.remove([99]) == 0
+    assert list(catalog) == [3, 2, 4] and catalog[4].name == 'Masło'
+    assert list(backup) == [3, 1, 2, 4]
+    backup.set_stock(3, 0)
+    assert catalog[3].stock == 10
+
+
+def test_filter(catalog):
+    assert catalog.filter(min_price=3.6, max_price=5)['id'].tolist() == [1, 2]
+    assert catalog.filter(in_stock=False)['id'].tolist() == [1]
+    assert catalog.filter(in_stock=True, max_price=4)['id'].tolist() == [3, 2]
+    assert catalog.filter(min_price=100).empty
+    catalog.put({'id': 8, 'name': 'X', 'price': 'brak', 'stock': 'brak'})
+    assert 8 not in catalog.filter(min_price=0)['id'].tolist()
+    assert 8 not in catalog.filter(in_stock=True)['id'].tolist()
+
+
+def test_name_table_is_shared_between_products(catalog):
+    assert len(catalog._names) == 3
+    assert catalog._codes[0] == catalog._codes[2]
+    catalog.put({'id': 9, 'name': 'Chleb', 'price': 4.5, 'stock': 1})
+    assert len(catalog._names) == 3
+    catalog.put({'id': 10, 'name': 'Żółty ser', 'price': 11.0, 'stock': 3})
+    assert len(catalog._names) == 4 and catalog[10].name == 'Żółty ser'
+    # Usunięcie jedynego produktu o danej nazwie usuwa ją z tabeli; wspólne nazwy zostają.
+    catalog.remove([4, 3])
+    assert len(catalog._names) == 3
+    assert catalog.column('name').tolist() == ['Chleb', 'Mleko', 'Chleb', 'Żółty ser']
+
+
+def test_name_table_keeps_special_names():
+    frame = pd.DataFrame({'id': [1, 2, 3], 'name': ['A', None, 'B\x00C'], 'price': [1.0, 2.0, 3.0],
+                          'stock': [1, 2, 3]})
+    catalog = ProductCatalog.from_frame(frame)
+    assert pd.isna(catalog[2].name) and catalog[3].name == 'B\x00C'
+    names = catalog.column('name').tolist()
+    assert names[0] == 'A' and pd.isna(names[1]) and names[2] == 'B\x00C'
+
+
+def test_arrays_round_trip(catalog):
+    catalog.put({'id': 6, 'name': 'Ser', 'price': 12.0, 'stock': 1})
+    arrays, meta = catalog.to_arrays()
+    restored = ProductCatalog.from_arrays(arrays, meta)
+    pd.testing.assert_frame_equal(restored.frame(), catalog.frame())
+    assert restored[6].name == 'Ser' and restored.get(99) is None
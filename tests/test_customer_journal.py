@@ -0,0 +1,58 @@
+import json
+import os
+
+from storage import SNAPSHOT_SUFFIX
+
+
+def customer(customer_id, name):
+    return {'ID': str(customer_id), 'NAME': name, 'E-MAIL': f'{name.lower()}@example.com', 'PHONE': '500100200',
+            'CREATED': '2025-01-01 10:00:00', 'UPDATED': ''}
+
+
+def test_journal_is_replayed_on_top_of_csv(backend):
+    backend.save_customers([customer(201, 'Anna'), customer(202, 'Piotr')])
+    backend.insert_customers([customer(203, 'Ewa')])
+    backend.delete_customers([201])
+    assert os.path.exists(backend.journal_file)
+    assert [c['ID'] for c in backend.load_customers()] == ['202', '203']
+
+
+def test_compaction_rewrites_csv_and_removes_journal(backend):
+    backend.save_customers([customer(201, 'Anna')])
+    backend.insert_customers([customer(202, 'Piotr'), customer(203, 'Ewa')])
+    backend.delete_customers([202])
+    expected = backend.load_customers()
+    backend.compact_customers()
+    assert not os.path.exists(backend.journal_file)
+    assert backend.load_customers() == expected
+    os.remove(backend.customer_file + SNAPSHOT_SUFFIX)
+    assert backend.load_customers() == expected
+
+
+def test_compaction_runs_automatically_past_threshold(backend):
+    backend.journal_compact_bytes = 1
+    backend.save_customers([customer(201, 'Anna')])
+    backend.insert_customers([customer(202, 'Piotr')])
+    assert not os.path.exists(backend.journal_file)
+    assert [c['ID'] for c in backend.load_customers()] == ['201', '202']
+
+
+def test_replaying_journal_after_compaction_is_idempotent(backend):
+    backend.save_customers([customer(201, 'Anna')])
+    backend.insert_customers([customer(202, 'Piotr')])
+    backend.delete_customers([201])
+    with open(backend.journal_file, encoding='utf-8') as f:
+        journal = f.read()
+    backend.compact_customers()
+    # Awaria po podmianie customer.csv, a przed usunięciem dziennika.
+    with open(backend.journal_file, 'w', encoding='utf-8') as f:
+        f.write(journal)
+    assert [c['ID'] for c in backend.load_customers()] == ['202']
+
+
+def test_torn_last_journal_record_is_skipped(backend):
+    backend.save_customers([customer(201, 'Anna')])
+    backend.insert_customers([customer(202, 'Piotr')])
+    with open(backend.journal_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'op': 'insert', 'customer': customer(203, 'Ewa')})[:25])
+    assert [c['ID'] for c in backend.load_customers()] == ['201', '202']
@@ -0,0 +1,118 @@
+import math
+import os
+
+import pytest
+
+from forecast import RestockForecast
+from storage import SQLiteBackend, parse_legacy_history, read_lines_tail
+
+AS_OF = "2025-05-28"
+
+
+def line(purchase_id, product_id, quantity, date, customer="7"):
+    return {"PURCHASE_ID": purchase_id, "DATE": date, "CUSTOMER_ID": customer, "PRODUCT_ID": product_id,
+            "NAME": f"Produkt {product_id}", "QUANTITY": quantity, "UNIT_PRICE": 1.0}
+
+
+def buy(backend, customer_id, purchase_id, date, *items):
+    backend.append_purchase(customer_id, [date, "...", "0.00"],
+                            [line(purchase_id, pid, quantity, date, str(customer_id)) for pid, quantity in items])
+
+
+@pytest.fixture
+def sales(backend):
+    buy(backend, 7, "a", "2025-05-27 10:00:00", (1, 2))
+    buy(backend, 7, "b", "2025-05-10 10:00:00", (1, 3))
+    buy(backend, 8, "c", "2025-05-28 18:00:00", (2, 14))
+    buy(backend, 8, "d", "2025-04-20 10:00:00", (1, 50), (2, 50))
+    return backend
+
+
+def forecast(backend):
+    return RestockForecast(backend, products_file=backend.products_file)
+
+
+def test_velocity_windows(sales):
+    velocity = forecast(sales).velocity(AS_OF)
+    assert velocity.loc[1, "units_7d"] == 2 and velocity.loc[1, "units_28d"] == 5
+    assert velocity.loc[1, "velocity"] == pytest.approx(2 / 7)
+    assert velocity.loc[2, "units_7d"] == 14 and velocity.loc[2, "velocity"] == pytest.approx(2.0)
+    # Zakupy spoza 28 dni i późniejsze niż as_of nie są liczone.
+    earlier = forecast(sales).velocity("2025-05-27")
+    assert 2 not in earlier.index and earlier.loc[1, "units_7d"] == 2
+
+
+def test_report_ranks_products_to_restock(sales):
+    report = forecast(sales).report(AS_OF)
+    assert report["id"].tolist() == [2, 3]
+    chleb, maslo = report.to_dict("records")
+    assert chleb["days_left"] == 2.5 and chleb["stockout_date"] == "2025-05-30"
+    assert chleb["reorder"] == 56 - 5
+    assert math.isinf(maslo["days_left"]) and maslo["reorder"] == 5
+    assert forecast(sales).report(AS_OF, horizon=40)["id"].tolist() == [2, 1, 3]
+
+
+def test_refresh_reads_only_appended_lines(sales):
+    restock = forecast(sales)
+    assert restock.refresh() == 5
+    assert restock.refresh() == 0
+    buy(sales, 7, "e", "2025-05-28 09:00:00", (1, 4), (3, 1))
+    assert restock.refresh() == 2
+    velocity = restock.velocity(AS_OF)
+    assert velocity.loc[1, "units_7d"] == 6 and velocity.loc[3, "units_7d"] == 1
+    assert velocity.equals(forecast(sales).velocity(AS_OF))
+
+
+def test_rewritten_and_removed_files_replace_their_contribution(sales):
+    restock = forecast(sales)
+    restock.refresh()
+    lines = sales.load_purchase_lines(7)
+    sales.write_purchase_lines(7, lines[lines["PURCHASE_ID"] == "a"])
+    assert restock.refresh() == 1
+    assert restock.velocity(AS_OF).loc[1, "units_28d"] == 2
+    os.remove(sales.lines_file(8))
+    os.remove(sales.history_file(8))
+    restock.refresh()
+    velocity = restock.velocity(AS_OF)
+    assert 2 not in velocity.index
+    assert velocity.equals(forecast(sales).velocity(AS_OF))
+
+
+def test_legacy_history_counts_until_converted(backend):
+    backend.append_history(9, ["2025-05-26 10:00:00", "Mleko (ID: 1, Ilość: 7, Cena: 3.50)", "24.50"])
+    restock = forecast(backend)
+    assert restock.refresh() == 1
+    assert restock.velocity(AS_OF).loc[1, "units_7d"] == 7
+    backend.write_purchase_lines(9, parse_legacy_history(backend.read_history(9), 9))
+    restock.refresh()
+    assert restock.velocity(AS_OF).loc[1, "units_7d"] == 7
+
+
+def test_database_backend_reads_new_rows_only(tmp_path):
+    database = SQLiteBackend(str(tmp_path / "frog.db"))
+    try:
+        buy(database, 7, "a", "2025-05-27 10:00:00", (1, 2))
+        restock = RestockForecast(database)
+        assert restock.refresh() == 1
+        buy(database, 7, "b", "2025-05-28 10:00:00", (1, 3), (2, 1))
+        assert restock.refresh() == 2
+        assert restock.refresh() == 0
+        assert restock.velocity(AS_OF).loc[1, "units_7d"] == 5
+    finally:
+        database.close()
+
+
+def test_read_lines_tail_returns_complete_rows_only(backend):
+    buy(backend, 7, "a", "2025-06-01 08:00:00", (1, 1))
+    path = backend.lines_file(7)
+    lines, offset = read_lines_tail(path)
+    assert lines["PURCHASE_ID"].tolist() == ["a"]
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("b,2025-06-02 08:00:00,7,2,Chleb,1,4.0\nc,2025-06-0")
+    lines, offset = read_lines_tail(path, offset)
+    assert lines["PURCHASE_ID"].tolist() == ["b"] and lines["PRODUCT_ID"].tolist() == [2]
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("3 08:00:00,7,3,Masło,2,7.25\n")
+    lines, offset = read_lines_tail(path, offset)
+    assert lines["PURCHASE_ID"].tolist() == ["c"] and lines["QUANTITY"].tolist() == [2]
+    assert read_lines_tail(path, offset)[0].empty
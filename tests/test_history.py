@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+from history import HistoryPager, iter_history, read_history_page
+from storage import get_backend
+
+ROWS = [[f"2025-05-{day:02d} 1{hour}:00:00", f"Produkt {day}.{hour}", f"{day}.{hour}0"]
+        for day in range(1, 11) for hour in range(3)]
+
+
+@pytest.fixture(params=['file', 'sqlite'])
+def history_backend(request, workdir, monkeypatch):
+    """Historia 30 zakupów klienta 7 (po trzy dziennie, 1-10 maja) w pliku CSV albo w SQLite."""
+    if request.param == 'sqlite':
+        monkeypatch.setenv("FROG_STORAGE", "sqlite")
+    backend = get_backend()
+    for row in ROWS:
+        backend.append_history(7, row)
+    return backend
+
+
+def test_pager_reads_consecutive_pages(history_backend):
+    pager = HistoryPager(7, page_size=8)
+    pages = []
+    while not pager.exhausted:
+        pages.append(pager.next_page())
+    assert [len(page) for page in pages] == [8, 8, 8, 6]
+    assert [row for page in pages for row in page] == ROWS
+    assert pager.loaded == 30
+    assert pager.next_page() == []
+
+
+def test_pager_marks_exact_multiple_as_exhausted_after_empty_page(history_backend):
+    pager = HistoryPager(7, page_size=10)
+    assert [len(pager.next_page()) for _ in range(3)] == [10, 10, 10]
+    assert not pager.exhausted
+    assert pager.next_page() == [] and pager.exhausted
+
+
+def test_pager_close_stops_paging(history_backend):
+    pager = HistoryPager(7, page_size=5)
+    pager.next_page()
+    pager.close()
+    assert pager.exhausted and pager.next_page() == []
+
+
+def test_date_filters_are_inclusive(history_backend):
+    rows = list(iter_history(7, start="2025-05-03", end="2025-05-04"))
+    assert [row[0][:10] for row in rows] == ["2025-05-03"] * 3 + ["2025-05-04"] * 3
+    rows = list(iter_history(7, start=datetime.datetime(2025, 5, 10, 11), end=datetime.date(2025, 5, 10)))
+    assert [row[0] for row in rows] == ["2025-05-10 11:00:00", "2025-05-10 12:00:00"]
+    rows = list(iter_history(7, end="2025-05-01 11:00"))
+    assert [row[0] for row in rows] == ["2025-05-01 10:00:00", "2025-05-01 11:00:00"]
+    pager = HistoryPager(7, page_size=4, start=datetime.date(2025, 5, 9))
+    assert pager.next_page() == ROWS[24:28]
+    assert pager.next_page() == ROWS[28:]
+
+
+def test_offset_and_limit_apply_after_filters(history_backend):
+    assert read_history_page(7, offset=2, limit=3, start="2025-05-02") == ROWS[5:8]
+    assert read_history_page(7, offset=29) == ROWS[29:]
+    assert read_history_page(7, offset=40) == []
+
+
+def test_missing_history_raises(workdir):
+    with pytest.raises(FileNotFoundError):
+        list(iter_history(404))
@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import utils
+from utils import LogSink, log_action
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_are_written_in_order_on_flush(tmp_path):
+    sink = LogSink(str(tmp_path / "logs" / "log.txt"), flush_interval=3600)
+    for i in range(10):
+        sink.put({"n": i})
+    sink.flush()
+    assert [r["n"] for r in read_records(sink.path)] == list(range(10))
+    sink.close()
+
+
+def test_batch_is_written_after_flush_records(tmp_path):
+    sink = LogSink(str(tmp_path / "log.txt"), flush_records=3, flush_interval=3600)
+    for i in range(3):
+        sink.put({"n": i})
+    sink.close()
+    assert [r["n"] for r in read_records(sink.path)] == [0, 1, 2]
+
+
+def test_rotation_keeps_limited_backups(tmp_path):
+    path = str(tmp_path / "log.txt")
+    sink = LogSink(path, max_bytes=100, backups=2, flush_interval=3600)
+    for i in range(11):
+        sink.put({"n": i, "pad": "x" * 10})
+        sink.flush()
+    sink.close()
+    assert sorted(os.listdir(tmp_path)) == ["log.txt", "log.txt.1", "log.txt.2"]
+    assert all(os.path.getsize(tmp_path / name) <= 100 for name in os.listdir(tmp_path))
+    # Po trzy rekordy (30 bajtów) w pliku; najstarsze [0, 1, 2] wypadły poza kopie.
+    assert [r["n"] for r in read_records(path + ".2") + read_records(path + ".1") + read_records(path)] == [
+        3, 4, 5, 6, 7, 8, 9, 10]
+
+
+def test_rotation_without_backups_truncates(tmp_path):
+    path = str(tmp_path / "log.txt")
+    sink = LogSink(path, max_bytes=60, backups=0, flush_interval=3600)
+    for i in range(3):
+        sink.put({"n": i, "pad": "x" * 30})
+        sink.flush()
+    sink.close()
+    assert os.listdir(tmp_path) == ["log.txt"]
+    assert [r["n"] for r in read_records(path)] == [2]
+
+
+def test_pending_records_are_flushed_at_exit(tmp_path):
+    path = tmp_path / "log.txt"
+    script = (
+        "from utils import LogSink\n"
+        f"sink = LogSink({str(path)!r}, flush_interval=3600)\n"
+        "for i in range(5):\n"
+        "    sink.put({'n': i})\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, timeout=30)
+    assert [r["n"] for r in read_records(path)] == list(range(5))
+
+
+@pytest.fixture
+def sink(tmp_path, monkeypatch):
+    sink = LogSink(str(tmp_path / "log.txt"), flush_interval=3600)
+    monkeypatch.setattr(utils, "_sink", sink)
+    yield sink
+    sink.close()
+
+
+def test_log_action_records_success_and_errors(sink):
+    @log_action("test")
+    def divide(a, b):
+        return a / b
+
+    assert divide(4, b=2) == 2
+    with pytest.raises(ZeroDivisionError):
+        divide(1, 0)
+    sink.flush()
+    ok, failed = read_records(sink.path)
+    assert ok["action"] == "test" and ok["function"] == "divide"
+    assert ok["args"] == "4, b=2" and ok["success"] and ok["error"] is None
+    assert not failed["success"] and "ZeroDivisionError" in failed["error"]
+
+
+def test_log_action_records_interrupts_as_failures(sink):
+    @log_action("test")
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        interrupted()
+    sink.flush()
+    record, = read_records(sink.path)
+    assert record["success"] is False and "KeyboardInterrupt" in record["error"]
@@ -0,0 +1,88 @@
+import os
+
+import pandas as pd
+import pytest
+
+import storage
+from storage import PRODUCT_CACHE_SUFFIX, read_products_frame
+
+FRAME = pd.DataFrame({'id': [1, 2, 3], 'name': ['Mleko', 'Chleb', '007'], 'price': [3.5, 0.1 + 0.2, 7.25],
+                      'stock': [10, 5, 0]})
+
+
+@pytest.fixture
+def xlsx(tmp_path):
+    path = str(tmp_path / "products.xlsx")
+    FRAME.to_excel(path, index=False)
+    return path
+
+
+@pytest.fixture
+def xlsx_reads(monkeypatch):
+    """Liczy odczyty samego arkusza (z pominięciem kopii CSV)."""
+    calls = []
+    original = storage.read_xlsx
+
+    def counting(path, columns=None):
+        calls.append(path)
+        return original(path, columns)
+
+    monkeypatch.setattr(storage, "read_xlsx", counting)
+    return calls
+
+
+def test_sidecar_is_written_and_reused(xlsx, xlsx_reads):
+    first = read_products_frame(xlsx)
+    assert os.path.exists(xlsx + PRODUCT_CACHE_SUFFIX)
+    second = read_products_frame(xlsx)
+    assert len(xlsx_reads) == 1
+    pd.testing.assert_frame_equal(first, second, check_exact=True)
+    assert second.dtypes.astype(str).to_dict() == {'id': 'int64', 'name': 'object', 'price': 'float64',
+                                                  'stock': 'int64'}
+    assert second['price'].tolist() == first['price'].tolist()
+    assert second['name'].tolist() == ['Mleko', 'Chleb', '007']
+
+
+def test_sidecar_reads_selected_columns(xlsx, xlsx_reads):
+    read_products_frame(xlsx)
+    df = read_products_frame(xlsx, columns=['stock', 'id', 'missing'])
+    assert list(df.columns) == ['stock', 'id'] and df['stock'].tolist() == [10, 5, 0]
+    assert len(xlsx_reads) == 1
+
+
+def test_mtime_change_invalidates_sidecar(xlsx, xlsx_reads):
+    read_products_frame(xlsx)
+    st = os.stat(xlsx)
+    os.utime(xlsx, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    read_products_frame(xlsx)
+    assert len(xlsx_reads) == 2
+    read_products_frame(xlsx)
+    assert len(xlsx_reads) == 2
+
+
+def test_content_change_in_place_invalidates_sidecar(xlsx, xlsx_reads):
+    read_products_frame(xlsx)
+    st = os.stat(xlsx)
+    changed = pd.concat([FRAME, pd.DataFrame([{'id': 4, 'name': 'Ser', 'price': 12.0, 'stock': 1}])])
+    changed.to_excel(xlsx + ".new.xlsx", index=False)
+    with open(xlsx + ".new.xlsx", 'rb') as src, open(xlsx, 'r+b') as dst:
+        dst.truncate(0)
+        dst.write(src.read())
+    # Ten sam i-węzeł i czas modyfikacji - zmiana widoczna tylko w rozmiarze.
+    os.utime(xlsx, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert os.stat(xlsx).st_ino == st.st_ino and os.stat(xlsx).st_size != st.st_size
+    assert read_products_frame(xlsx)['id'].tolist() == [1, 2, 3, 4]
+    assert len(xlsx_reads) == 2
+
+
+def test_damaged_sidecar_falls_back_to_xlsx(xlsx, xlsx_reads):
+    read_products_frame(xlsx)
+    with open(xlsx + PRODUCT_CACHE_SUFFIX, 'w', encoding='utf-8') as f:
+        f.write('#{"signature": nie json\n')
+    assert read_products_frame(xlsx)['id'].tolist() == [1, 2, 3]
+    assert len(xlsx_reads) == 2
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_products_frame(str(tmp_path / "brak.xlsx"))
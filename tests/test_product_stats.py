@@ -0,0 +1,68 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from product_management import ProductStats, ProductStore, _is_number
+
+
+@pytest.mark.parametrize('value, expected', [
+    (1, True), (2.5, True), (np.int64(3), True), (np.float32(1.5), True), (np.int32(-1), True),
+    (True, False), (np.bool_(True), False), (math.nan, False), (np.float64('nan'), False),
+    ('3.5', False), (None, False),
+])
+def test_is_number(value, expected):
+    assert _is_number(value) is expected
+
+
+def test_numpy_values_are_counted():
+    stats = ProductStats([{'id': 1, 'price': np.float32(2.5), 'stock': np.int64(4)},
+                          {'id': 2, 'price': 1.5, 'stock': 2}])
+    snapshot = stats.snapshot()
+    assert snapshot['min_price'] == 1.5 and snapshot['max_price'] == 2.5
+    assert snapshot['total_stock'] == 6
+    assert snapshot['inventory_value'] == pytest.approx(13.0)
+
+
+def test_snapshot_matches_recompute():
+    rng = random.Random(1)
+    products = [{'id': i, 'name': f'P{i}', 'price': round(rng.uniform(0, 50), 2), 'stock': rng.randint(0, 20)}
+                for i in range(200)]
+    stats = ProductStats(products)
+    for product in rng.sample(products, 80):
+        stats.discard(product)
+        products.remove(product)
+    for i in range(200, 260):
+        product = {'id': i, 'name': f'P{i}', 'price': np.float64(rng.uniform(0, 50)), 'stock': np.int64(rng.randint(0, 20))}
+        stats.add(product)
+        products.append(product)
+    snapshot, full = stats.snapshot(), ProductStats.recompute(products)
+    assert set(snapshot) == set(full)
+    for key in full:
+        assert snapshot[key] == pytest.approx(full[key]), key
+
+
+def test_empty_stats():
+    assert ProductStats().snapshot() == {}
+    assert ProductStats.recompute([]) == {}
+
+
+def test_verify_stats_after_store_changes(backend):
+    store = ProductStore(backend.products_file, backend=backend, write_behind=False)
+    assert store.verify_stats() == {}
+    store.add({'id': 4, 'name': 'Ser', 'price': 12.0, 'stock': 2})
+    store.update_stock(1, -7)
+    store.remove(2)
+    assert store.verify_stats() == {}
+    assert store.stats()['count'] == 3
+    assert store.stats()['low_stock_count'] == 3
+
+
+def test_verify_stats_reports_mismatches(backend):
+    store = ProductStore(backend.products_file, backend=backend, write_behind=False)
+    store.stats()
+    store._stats.stock_sum += 100
+    mismatches = store.verify_stats()
+    assert set(mismatches) == {'total_stock', 'avg_stock'}
+    assert mismatches['total_stock'] == (115, 15)
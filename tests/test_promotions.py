@@ -0,0 +1,145 @@
+import json
+
+import pytest
+
+from cart import Cart
+from promotions import PromotionEngine
+
+PRICES = {1: 10.0, 2: 4.0, 3: 2.5, 4: 6.0}
+
+
+def evaluate(rules, items, customer_id=None, tiers=None):
+    return PromotionEngine(rules, tiers).evaluate(items, PRICES.__getitem__, customer_id)
+
+
+def assert_consistent(result):
+    """Suma pozycji równa się sumie koszyka, a rabaty promocji - różnicy sum."""
+    assert sum(line['total'] for line in result['lines']) == pytest.approx(result['total'])
+    assert result['subtotal'] - result['discount'] == pytest.approx(result['total'])
+    assert sum(result['promotions'].values()) == pytest.approx(result['discount'])
+    for line in result['lines']:
+        assert line['unit_price'] * line['quantity'] == pytest.approx(line['total'])
+
+
+def test_no_rules_keeps_prices():
+    result = evaluate([], [(1, 2), (2, 1), (1, 1)])
+    assert [(line['id'], line['quantity']) for line in result['lines']] == [(1, 3), (2, 1)]
+    assert result['total'] == result['subtotal'] == 34.0
+    assert result['promotions'] == {}
+
+
+def test_percentage_on_selected_products():
+    result = evaluate([{'type': 'percentage', 'products': [1], 'rate': 0.1}], {1: 3, 2: 1})
+    assert result['total'] == pytest.approx(31.0)
+    assert result['promotions'] == {'Rabat 10%': pytest.approx(3.0)}
+    assert_consistent(result)
+
+
+def test_best_percentage_wins():
+    rules = [{'type': 'percentage', 'products': [1], 'rate': 0.05},
+             {'type': 'percentage', 'products': [1, 2], 'rate': 0.2, 'name': 'Duży'},
+             {'type': 'percentage', 'rate': 0.1, 'name': 'Wszystko'}]
+    result = evaluate(rules, {1: 1, 2: 1, 3: 2})
+    assert result['promotions'] == {'Duży': pytest.approx(2.8), 'Wszystko': pytest.approx(0.5)}
+    assert result['total'] == pytest.approx(8.0 + 3.2 + 4.5)
+    # Rabat na wszystkie produkty wygrywa z mniejszym rabatem na konkretny produkt.
+    result = evaluate([{'type': 'percentage', 'products': [1], 'rate': 0.05},
+                       {'type': 'percentage', 'rate': 0.1, 'name': 'Wszystko'}], {1: 1})
+    assert result['promotions'] == {'Wszystko': pytest.approx(1.0)}
+
+
+def test_buy_x_get_y_counts_full_groups_only():
+    result = evaluate([{'type': 'buy_x_get_y', 'products': [3], 'buy': 2, 'get': 1}], {3: 7})
+    assert result['total'] == pytest.approx(5 * 2.5)
+    assert result['promotions'] == {'2+1 gratis': pytest.approx(5.0)}
+    assert evaluate([{'type': 'buy_x_get_y', 'products': [3], 'buy': 2, 'get': 1}], {3: 2})['total'] == 5.0
+
+
+def test_best_buy_x_get_y_rule_is_used():
+    rules = [{'type': 'buy_x_get_y', 'products': [3], 'buy': 2, 'get': 1},
+             {'type': 'buy_x_get_y', 'products': [3], 'buy': 1, 'get': 1}]
+    assert evaluate(rules, {3: 6})['promotions'] == {'1+1 gratis': pytest.approx(7.5)}
+
+
+def test_bundle_discounts_complete_sets_and_leaves_leftovers():
+    rules = [{'type': 'bundle', 'name': 'Zestaw', 'products': {'1': 1, '2': 2}, 'rate': 0.5}]
+    result = evaluate(rules, {1: 3, 2: 5})
+    # Dwa komplety (2 × produkt 1 i 4 × produkt 2), reszta po cenie regularnej.
+    assert result['promotions'] == {'Zestaw': pytest.approx(10.0 + 8.0)}
+    assert result['total'] == pytest.approx(30.0 + 20.0 - 18.0)
+    assert_consistent(result)
+    assert evaluate(rules, {1: 3, 2: 1})['promotions'] == {}
+
+
+def test_higher_bundle_takes_shared_units_first():
+    rules = [{'type': 'bundle', 'name': 'Mały', 'products': [1, 2], 'rate': 0.1},
+             {'type': 'bundle', 'name': 'Duży', 'products': [1, 3], 'rate': 0.3}]
+    result = evaluate(rules, {1: 1, 2: 1, 3: 1})
+    assert result['promotions'] == {'Duży': pytest.approx(3.0 + 0.75)}
+    assert_consistent(result)
+
+
+def test_free_units_do_not_count_towards_bundles():
+    rules = [{'type': 'buy_x_get_y', 'products': [3], 'buy': 1, 'get': 1},
+             {'type': 'bundle', 'name': 'Zestaw', 'products': [3, 4], 'rate': 0.5}]
+    result = evaluate(rules, {3: 2, 4: 2})
+    assert result['promotions'] == {'1+1 gratis': pytest.approx(2.5), 'Zestaw': pytest.approx(1.25 + 3.0)}
+    assert_consistent(result)
+
+
+def test_tier_discount_applies_to_customers_of_the_tier():
+    rules = [{'type': 'tier', 'tier': 'gold', 'rate': 0.05}, {'type': 'tier', 'tier': 'gold', 'rate': 0.1},
+             {'type': 'tier', 'tier': 'silver', 'rate': 0.02}]
+    tiers = {201: 'gold', '202': 'silver'}
+    assert evaluate(rules, {1: 2}, 201, tiers)['total'] == pytest.approx(18.0)
+    assert evaluate(rules, {1: 2}, '202', tiers)['total'] == pytest.approx(19.6)
+    assert evaluate(rules, {1: 2}, 203, tiers)['total'] == 20.0
+    assert evaluate(rules, {1: 2}, None, tiers)['total'] == 20.0
+
+
+def test_combined_rules_stack_in_order():
+    rules = [{'type': 'percentage', 'products': [1], 'rate': 0.1},
+             {'type': 'buy_x_get_y', 'products': [3], 'buy': 2, 'get': 1},
+             {'type': 'bundle', 'name': 'Zestaw', 'products': [1, 2], 'rate': 0.5},
+             {'type': 'tier', 'tier': 'gold', 'rate': 0.1}]
+    result = evaluate(rules, [(1, 2), (2, 1), (3, 3), (4, 1)], 7, {7: 'gold'})
+    # Produkt 1: 9.00 po rabacie, jedna sztuka w zestawie -> 9 + 4.5; produkt 2: 2; produkt 3: 2 × 2.5; produkt 4: 6.
+    before_tier = 13.5 + 2.0 + 5.0 + 6.0
+    assert result['total'] == pytest.approx(before_tier * 0.9)
+    assert result['subtotal'] == pytest.approx(20.0 + 4.0 + 7.5 + 6.0)
+    assert set(result['promotions']) == {'Rabat 10%', '2+1 gratis', 'Zestaw', 'Klient gold -10%'}
+    assert_consistent(result)
+
+
+@pytest.mark.parametrize('rule', [
+    {'type': 'unknown'},
+    {'type': 'percentage', 'rate': 0},
+    {'type': 'percentage', 'rate': 1.5},
+    {'type': 'buy_x_get_y', 'products': [1], 'buy': 0, 'get': 1},
+    {'type': 'bundle', 'products': [1], 'rate': 0.1},
+])
+def test_invalid_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        PromotionEngine([rule])
+
+
+def test_rules_from_file(tmp_path):
+    path = tmp_path / "promotions.json"
+    assert not PromotionEngine.from_file(str(path))
+    path.write_text(json.dumps({'tiers': {'201': 'gold'}, 'rules': [{'type': 'tier', 'tier': 'gold', 'rate': 0.5}]}))
+    engine = PromotionEngine.from_file(str(path))
+    assert engine.tier(201) == 'gold'
+    assert engine.evaluate({2: 1}, PRICES.__getitem__, 201)['total'] == 2.0
+
+
+def test_cart_priced_uses_cart_discounts_and_names():
+    products = {pid: {'id': pid, 'name': f'P{pid}', 'price': price, 'stock': 10} for pid, price in PRICES.items()}
+    cart = Cart(lookup=products.get)
+    cart.add(1, 2)
+    cart.add(3, 3)
+    cart.apply_discount(0.5, product_id=1)
+    engine = PromotionEngine([{'type': 'buy_x_get_y', 'products': [3], 'buy': 2, 'get': 1}])
+    result = cart.priced(engine, customer_id=None)
+    assert [(line['id'], line['name']) for line in result['lines']] == [(1, 'P1'), (3, 'P3')]
+    assert result['total'] == pytest.approx(10.0 + 5.0)
+    assert_consistent(result)
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from storage import LINE_FIELDS, convert_legacy_history, parse_legacy_history, read_lines_csv
+
+LEGACY_ROWS = [
+    ["2025-05-01 10:00:00", "Mleko (ID: 1, Ilość: 2, Cena: 3.50); Chleb (ID: 2, Ilość: 1, Cena: 4.00)", "11.00"],
+    ["2025-05-02 12:30:00", "Masło, extra (ID: 3, Ilość: 1, Cena: 7.25)", "7.25"],
+    ["2025-05-03 09:00:00", "", "0.00"],
+]
+
+
+def line(purchase_id, product_id, name, quantity, price, date="2025-06-01 08:00:00", customer="7"):
+    return {"PURCHASE_ID": purchase_id, "DATE": date, "CUSTOMER_ID": customer, "PRODUCT_ID": product_id,
+            "NAME": name, "QUANTITY": quantity, "UNIT_PRICE": price}
+
+
+def test_parse_legacy_history_splits_items():
+    lines = parse_legacy_history(LEGACY_ROWS, 7)
+    assert list(lines.columns) == LINE_FIELDS
+    assert lines["PURCHASE_ID"].tolist() == ["legacy-7-0", "legacy-7-0", "legacy-7-1"]
+    assert lines["PRODUCT_ID"].tolist() == [1, 2, 3]
+    assert lines["NAME"].tolist() == ["Mleko", "Chleb", "Masło, extra"]
+    assert lines["QUANTITY"].tolist() == [2, 1, 1]
+    assert lines["UNIT_PRICE"].tolist() == [3.5, 4.0, 7.25]
+    assert (lines["CUSTOMER_ID"] == "7").all()
+    assert lines["DATE"].iloc[2] == pd.Timestamp("2025-05-02 12:30:00")
+    assert parse_legacy_history([], 7).empty
+
+
+def test_lines_csv_keeps_types(backend):
+    backend.append_purchase(7, ["2025-06-01 08:00:00", "...", "10.50"], [
+        line("a", 1, 'Mleko "UHT", 3,2%', 2, 3.5),
+        line("a", 2, "00123", 1, 3.5),
+    ])
+    lines = read_lines_csv(backend.lines_file(7))
+    assert lines["NAME"].tolist() == ['Mleko "UHT", 3,2%', "00123"]
+    assert lines["PRODUCT_ID"].dtype == "int64" and lines["UNIT_PRICE"].dtype == "float64"
+    assert str(lines["DATE"].dtype).startswith("datetime64")
+    assert backend.load_purchase_lines(7).equals(lines)
+    assert backend.read_history(7) == [["2025-06-01 08:00:00", "...", "10.50"]]
+
+
+def test_first_purchase_converts_existing_history(backend):
+    for row in LEGACY_ROWS:
+        backend.append_history(7, row)
+    backend.append_purchase(7, ["2025-06-01 08:00:00", "Chleb (ID: 2, Ilość: 3, Cena: 4.00)", "12.00"],
+                            [line("new", 2, "Chleb", 3, 4.0)])
+    lines = backend.load_purchase_lines(7)
+    assert lines["PURCHASE_ID"].tolist() == ["legacy-7-0", "legacy-7-0", "legacy-7-1", "new"]
+    assert len(backend.read_history(7)) == 4
+
+
+def test_convert_legacy_history_skips_converted_customers(backend):
+    for row in LEGACY_ROWS:
+        backend.append_history(7, row)
+    backend.append_history(8, LEGACY_ROWS[1])
+    assert convert_legacy_history(backend) == 4
+    assert sorted(backend.purchase_line_customers()) == ["7", "8"]
+    assert convert_legacy_history(backend) == 0
+    assert convert_legacy_history(backend, overwrite=True) == 4
+    assert len(backend.load_purchase_lines()) == 4
+
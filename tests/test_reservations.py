@@ -0,0 +1,100 @@
+import pytest
+
+from product_management import ProductStore
+
+
+@pytest.fixture(params=[False, True], ids=["direct", "write_behind"])
+def store(request, backend):
+    store = ProductStore(backend.products_file, backend=backend, write_behind=request.param)
+    store.flush_interval = 3600
+    return store
+
+
+def reopened(store):
+    """Nowa instancja katalogu na tych samych plikach, jak w innym procesie."""
+    return ProductStore(store.file_path, backend=store.backend, write_behind=store.write_behind)
+
+
+def test_reserve_takes_stock_and_records_reservation(store):
+    reservation_id = store.reserve([(1, 3), (2, 1), (1, 2)])
+    assert store.get(1)['stock'] == 5
+    assert store.get(2)['stock'] == 4
+    assert store.backend.load_reservations()[reservation_id]['items'] == [[1, 5], [2, 1]]
+    assert reopened(store).get(1)['stock'] == 5
+
+
+def test_commit_keeps_stock_and_drops_reservation(store):
+    reservation_id = store.reserve({1: 4})
+    store.commit(reservation_id)
+    assert store.backend.load_reservations() == {}
+    assert reopened(store).get(1)['stock'] == 6
+    with pytest.raises(KeyError):
+        store.commit(reservation_id)
+
+
+def test_release_returns_stock_once(store):
+    reservation_id = store.reserve({2: 5})
+    assert store.get(2)['stock'] == 0
+    assert store.release(reservation_id) is True
+    assert store.release(reservation_id) is False
+    assert store.get(2)['stock'] == 5
+    assert reopened(store).get(2)['stock'] == 5
+
+
+def test_reserve_more_than_stock_changes_nothing(store):
+    with pytest.raises(ValueError):
+        store.reserve({1: 1, 3: 1})
+    with pytest.raises(KeyError):
+        store.reserve({99: 1})
+    assert store.get(1)['stock'] == 10
+    assert store.backend.load_reservations() == {}
+
+
+def test_expired_reservation_is_released_by_next_reserve(store):
+    store.reserve({1: 7}, ttl=0)
+    assert store.get(1)['stock'] == 3
+    reservation_id = store.reserve({2: 1})
+    assert store.get(1)['stock'] == 10
+    assert list(store.backend.load_reservations()) == [reservation_id]
+
+
+@pytest.mark.parametrize('write_behind', ["0", "1"], ids=["direct", "write_behind"])
+def test_concurrent_processes_never_oversell(write_behind, monkeypatch):
+    import stress_stock
+    monkeypatch.setenv("FROG_WRITE_BEHIND", write_behind)
+    assert stress_stock.run(processes=4, operations=50, products=3, stock=80, seed=11)
+
+
+def test_purchase_takes_stock_without_writing_reservations(store, monkeypatch):
+    writes = []
+    monkeypatch.setattr(store.backend, "write_reservations", writes.append)
+    with store.purchase([(1, 3), (2, 1), (1, 1)]):
+        assert store.get(1)['stock'] == 6
+    assert writes == []
+    assert reopened(store).get(1)['stock'] == 6 and reopened(store).get(2)['stock'] == 4
+
+
+def test_purchase_returns_stock_when_block_fails(store):
+    with pytest.raises(OSError):
+        with store.purchase({1: 4}):
+            raise OSError("zapis historii nieudany")
+    assert store.get(1)['stock'] == 10
+    assert reopened(store).get(1)['stock'] == 10
+
+
+def test_purchase_rejects_missing_stock(store):
+    with pytest.raises(ValueError):
+        with store.purchase({1: 4, 3: 1}):
+            pytest.fail("blok nie powinien się wykonać")
+    assert store.get(1)['stock'] == 10
+
+
+def test_purchase_products_does_not_rewrite_reservations(workdir, monkeypatch):
+    from projekt_customers import purchase_products
+    writes = []
+    monkeypatch.setattr(workdir, "write_reservations", writes.append)
+    user = {'ID': 201, 'NAME': 'Jan'}
+    assert purchase_products([(1, 2), (2, 1)], user) == pytest.approx(11.0)
+    assert purchase_products([(3, 1)], user) is None
+    assert writes == []
+    assert len(workdir.read_history(201)) == 1
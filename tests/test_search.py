@@ -0,0 +1,141 @@
+import random
+
+import pytest
+
+from product_management import ProductSearchIndex, _edit_distance, fold_text
+
+PRODUCTS = [
+    {'id': 1, 'name': 'Mleko'},
+    {'id': 2, 'name': 'Mleko zsiadłe'},
+    {'id': 3, 'name': 'Masło extra'},
+    {'id': 4, 'name': 'Żółty ser'},
+    {'id': 5, 'name': 'Chleb żytni'},
+    {'id': 6, 'name': 'Mleczko do kawy'},
+    {'id': 12, 'name': 'Kawa ziarnista'},
+]
+
+
+@pytest.fixture
+def index():
+    return ProductSearchIndex(PRODUCTS)
+
+
+def test_fold_text_removes_polish_diacritics():
+    assert fold_text("Zażółć GĘŚLĄ jaźń") == "zazolc gesla jazn"
+    assert fold_text("Łódź") == "lodz"
+    assert fold_text("Crème brûlée") == "creme brulee"
+    assert fold_text(42) == "42"
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    ('mleko', 'mleko', 0),
+    ('mleko', 'mleki', 1),
+    ('mleko', 'mlekoo', 1),
+    ('mleko', 'mlkeo', 1),
+    ('mleko', 'lmeko', 1),
+    ('maslo', 'msalo', 1),
+    ('kawa', 'awak', 2),
+    ('', 'abc', 3),
+])
+def test_edit_distance_counts_transpositions_as_one_edit(a, b, expected):
+    assert _edit_distance(a, b, 5) == expected
+
+
+def test_edit_distance_stops_above_max_distance():
+    assert _edit_distance('mleko', 'chleb', 1) == 2
+    assert _edit_distance('ab', 'abcdef', 2) == 3
+
+
+def test_exact_word_ranks_before_prefix_and_shorter_names_first(index):
+    assert index.search('mleko') == [1, 2]
+    assert index.search('mle') == [1, 2, 6]
+
+
+def test_search_without_diacritics(index):
+    assert index.search('zolty') == [4]
+    assert index.search('ŻYTNI') == [5]
+    assert index.search('maslo') == [3]
+
+
+def test_search_by_id(index):
+    assert index.search('12') == [12]
+    assert index.search('1') == [1, 12]
+
+
+def test_fuzzy_matches_typos(index):
+    assert index.search('mlkeo') == [1, 2]
+    assert index.search('chelb') == [5]
+    assert index.search('ziarnsta') == [12]
+    assert index.search('xyz') == []
+
+
+def test_all_query_words_must_match(index):
+    assert index.search('mleko zsiadle') == [2]
+    assert index.search('kawa') == [12]
+    assert index.search('kaw') == [12, 6]
+    assert index.search('kaw mleczko') == [6]
+    assert index.search('mleko chleb') == []
+
+
+def test_empty_query_and_limit(index):
+    assert index.search('') == [1, 2, 3, 4, 5, 6, 12]
+    assert index.search('', limit=2) == [1, 2]
+    assert index.search('m', limit=2) == [1, 3]
+
+
+def test_index_follows_add_and_discard(index):
+    index.add({'id': 7, 'name': 'Mleko owsiane'})
+    assert index.search('owsiane') == [7]
+    assert index.search('mleko') == [1, 2, 7]
+    index.add({'id': 7, 'name': 'Napój owsiany'})
+    assert index.search('mleko') == [1, 2]
+    assert index.search('napoj') == [7]
+    index.discard({'id': 7})
+    index.discard({'id': 7})
+    assert index.search('owsiany') == []
+    assert index.search('napoj') == []
+    assert len(index) == len(PRODUCTS)
+    index.discard({'id': 4})
+    assert index.search('ser') == []
+    assert index.search('zolty') == []
+
+
+def test_incremental_index_matches_bulk_build():
+    rng = random.Random(3)
+    words = ['mleko', 'masło', 'ser', 'żółty', 'chleb', 'kawa', 'herbata', 'sok', 'jabłkowy', 'bio']
+    products = {pid: {'id': pid, 'name': ' '.join(rng.sample(words, rng.randint(1, 3)))} for pid in range(1, 200)}
+    incremental = ProductSearchIndex()
+    for product in products.values():
+        incremental.add(product)
+    for pid in rng.sample(list(products), 60):
+        incremental.discard(products.pop(pid))
+    bulk = ProductSearchIndex(products.values())
+    for query in ['mleko', 'ma', 'zolty ser', 'kawa bio', 'herbta', 'sok jablk', '1']:
+        assert incremental.search(query, limit=15) == bulk.search(query, limit=15)
+
+
+def test_multi_word_ranking_matches_brute_force():
+    rng = random.Random(7)
+    words = ['mleko', 'mleczko', 'masło', 'maślanka', 'ser', 'serek', 'kawa', 'kakao', 'chleb', 'chlebek']
+    products = [{'id': pid, 'name': ' '.join(rng.sample(words, rng.randint(1, 4)))} for pid in range(1, 300)]
+    index = ProductSearchIndex(products)
+    for query in ['ml ser', 'mas kawa', 'chleb serek', 'ka ka', 'mleko chlbek']:
+        matches = [index._term_matches(term) for term in dict.fromkeys(fold_text(query).split())]
+        expected = []
+        for product in products:
+            tokens = index._product_tokens[product['id']]
+            scores = [max(m.get(token, 0) for token in tokens) for m in matches]
+            if all(scores):
+                expected.append((-sum(scores), index._rank(product['id']), product['id']))
+        expected = [product_id for *_, product_id in sorted(expected)[:10]]
+        assert index.search(query, limit=10) == expected
+
+
+def test_store_search_follows_catalog_changes(backend):
+    from product_management import ProductStore
+    store = ProductStore(backend.products_file, backend=backend, write_behind=False)
+    assert [product['id'] for product in store.search('maslo')] == [3]
+    store.add({'id': 4, 'name': 'Masło klarowane', 'price': 12.0, 'stock': 3})
+    assert [product['id'] for product in store.search('masl')] == [3, 4]
+    store.remove(3)
+    assert [product['id'] for product in store.search('masło')] == [4]
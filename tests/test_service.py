@@ -0,0 +1,149 @@
+import asyncio
+import json
+
+import pytest
+
+import projekt_customers
+import service
+from projekt_customers import register_customer
+from service import ShopService, StockBatcher
+
+
+@pytest.fixture
+def shop(workdir):
+    """Usługa nad katalogiem i klientami w katalogu tymczasowym (domyślne ścieżki database/...)."""
+    register_customer("Jan Kowalski", "jan@example.com")
+    shop = ShopService()
+    yield shop
+    shop.close()
+
+
+def call(shop, method, target, payload=None, token=None):
+    headers = {'authorization': f"Bearer {token}"} if token else {}
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b""
+    return asyncio.run(shop.dispatch(method, target, headers, body))
+
+
+def log_in(shop):
+    status, payload = call(shop, "POST", "/login", {'email': 'jan@example.com'})
+    assert status == 200
+    return payload['token']
+
+
+def test_catalog_endpoints(shop):
+    status, payload = call(shop, "GET", "/products?limit=2")
+    assert status == 200 and [p['id'] for p in payload['products']] == [1, 2]
+    status, payload = call(shop, "GET", "/products?offset=2")
+    assert [p['id'] for p in payload['products']] == [3]
+    status, payload = call(shop, "GET", "/products?q=maslo")
+    assert [p['name'] for p in payload['products']] == ['Masło']
+    assert call(shop, "GET", "/products/2")[1]['name'] == 'Chleb'
+    assert call(shop, "GET", "/products/99")[0] == 404
+    assert call(shop, "GET", "/stats")[0] == 200
+
+
+def test_routing_and_request_errors(shop):
+    assert call(shop, "GET", "/nope")[0] == 404
+    assert call(shop, "DELETE", "/products")[0] == 405
+    assert call(shop, "GET", "/products?limit=x")[0] == 400
+    assert asyncio.run(shop.dispatch("POST", "/login", {}, b"{"))[0] == 400
+    assert call(shop, "POST", "/login", {})[0] == 400
+    assert call(shop, "POST", "/login", {'email': 'nikt@example.com'})[0] == 401
+    assert call(shop, "GET", "/cart")[0] == 401
+    assert call(shop, "GET", "/cart", token="zly-token")[0] == 401
+
+
+def test_update_stock(shop):
+    status, payload = call(shop, "POST", "/products/1/stock", {'change': -4})
+    assert status == 200 and payload == {'id': 1, 'stock': 6}
+    assert call(shop, "POST", "/products/1/stock", {'change': -7})[0] == 409
+    assert call(shop, "POST", "/products/99/stock", {'change': 1})[0] == 404
+    assert call(shop, "POST", "/products/1/stock", {'change': 'dużo'})[0] == 400
+    assert shop.store.get(1)['stock'] == 6
+
+
+def test_cart_and_checkout(shop):
+    token = log_in(shop)
+    status, payload = call(shop, "POST", "/cart", {'product_id': 1, 'quantity': 2}, token)
+    assert status == 200 and payload['total'] == pytest.approx(7.0)
+    assert call(shop, "POST", "/cart", {'product_id': 2, 'quantity': 6}, token)[0] == 409
+    assert call(shop, "POST", "/cart", {'product_id': 99}, token)[0] == 404
+    assert call(shop, "POST", "/cart", {'product_id': 1, 'quantity': 0}, token)[0] == 400
+    call(shop, "POST", "/cart", {'product_id': 2, 'quantity': 3}, token)
+    status, payload = call(shop, "DELETE", "/cart/2?quantity=1", token=token)
+    assert [(line['id'], line['quantity']) for line in payload['lines']] == [(1, 2), (2, 2)]
+    assert call(shop, "GET", "/cart", token=token)[1]['total'] == pytest.approx(15.0)
+
+    assert call(shop, "POST", "/checkout", {'expected_total': 14.0}, token)[0] == 409
+    status, payload = call(shop, "POST", "/checkout", {'expected_total': 15.0}, token)
+    assert status == 200 and payload == {'total': pytest.approx(15.0)}
+    assert shop.store.get(1)['stock'] == 8 and shop.store.get(2)['stock'] == 3
+    assert call(shop, "GET", "/cart", token=token)[1]['lines'] == []
+    assert call(shop, "POST", "/checkout", None, token)[0] == 400
+    assert len(projekt_customers.get_purchase_history(201)) == 1
+
+    assert call(shop, "POST", "/logout", token=token)[0] == 200
+    assert call(shop, "GET", "/cart", token=token)[0] == 401
+
+
+def test_concurrent_stock_updates_are_batched_in_order(shop):
+    async def run():
+        changes = [-3, -3, 4, -3, -1]
+        results = await asyncio.gather(*(shop.dispatch("POST", "/products/2/stock", {}, json.dumps(
+            {'change': change}).encode()) for change in changes))
+        return results
+
+    results = asyncio.run(run())
+    # Stan 5: -3 -> 2, -3 odrzucone, +4 -> 6, -3 -> 3, -1 -> 2.
+    assert [status for status, _ in results] == [200, 409, 200, 200, 200]
+    assert [payload.get('stock') for _, payload in results] == [2, None, 6, 3, 2]
+    assert shop.stock_batcher.batches == 1
+    assert shop.store.get(2)['stock'] == 2
+
+
+class FakeService:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    async def run(self, func, *args):
+        return func(*args)
+
+    def apply_stock_batch(self, changes):
+        self.calls.append(list(changes))
+        if self.fail:
+            raise RuntimeError("zapis nieudany")
+        return [(True, change) for _, change in changes]
+
+
+def test_stock_batcher_splits_large_batches():
+    fake = FakeService()
+    batcher = StockBatcher(fake, delay=0.001, max_size=2)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i, i * 10) for i in range(5)))
+
+    assert asyncio.run(run()) == [(True, i * 10) for i in range(5)]
+    assert fake.calls == [[(0, 0), (1, 10)], [(2, 20), (3, 30)], [(4, 40)]]
+    assert batcher.batches == 3
+
+
+def test_stock_batcher_propagates_errors_to_every_request():
+    batcher = StockBatcher(FakeService(fail=True), delay=0.001)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1, 1), batcher.submit(2, 1), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_main_passes_products_file(monkeypatch):
+    seen = {}
+
+    async def fake_serve(host, port, workers, products_file):
+        seen.update(host=host, port=port, workers=workers, products_file=products_file)
+
+    monkeypatch.setattr(service, "serve", fake_serve)
+    assert service.main(["--port", "9000", "--products", "inny.xlsx"]) == 0
+    assert seen == {'host': service.DEFAULT_HOST, 'port': 9000, 'workers': 1, 'products_file': 'inny.xlsx'}
@@ -0,0 +1,98 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from catalog import ProductCatalog
+from product_management import ProductStore
+from storage import SNAPSHOT_SUFFIX, read_binary_snapshot, write_binary_snapshot
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.csv"
+    path.write_text("id\n1\n")
+    return str(path)
+
+
+def write(path, source, catalog):
+    write_binary_snapshot(path, source, *catalog.to_arrays())
+
+
+def test_catalog_round_trip(tmp_path, source):
+    catalog = ProductCatalog()
+    for product in ({'id': 5, 'name': 'Żółty ser', 'price': 9.5, 'stock': 2},
+                    {'id': 1, 'name': float('nan'), 'price': 1.0, 'stock': 0},
+                    {'id': 7, 'name': 'a\x00b', 'price': 2.0, 'stock': 3}):
+        catalog.put(product)
+    path = str(tmp_path / "catalog.snapshot")
+    write(path, source, catalog)
+    loaded = ProductCatalog.from_arrays(*read_binary_snapshot(path, source))
+    assert list(loaded) == [5, 1, 7]
+    assert loaded[5].to_dict() == catalog[5].to_dict()
+    assert math.isnan(loaded[1].name) and loaded[7].name == 'a\x00b'
+    # Tablice są kopią przy zapisie: zmiany w pamięci nie trafiają do pliku migawki.
+    loaded.set_stock(5, 100)
+    assert ProductCatalog.from_arrays(*read_binary_snapshot(path, source))[5].stock == 2
+
+
+def test_snapshot_is_invalid_after_source_change(tmp_path, source):
+    path = str(tmp_path / "catalog.snapshot")
+    write(path, source, ProductCatalog())
+    assert read_binary_snapshot(path, source) is not None
+    stat = os.stat(source)
+    with open(source, 'w') as f:
+        f.write("id\n2\n")
+    # Ten sam rozmiar i czas modyfikacji: różnicę wykrywa dopiero skrót zawartości.
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert read_binary_snapshot(path, source) is None
+
+
+def test_snapshot_is_not_written_when_source_changed_during_read(tmp_path, source):
+    path = str(tmp_path / "catalog.snapshot")
+    write_binary_snapshot(path, source, {'a': np.arange(3)}, signature=(0, 0, 0))
+    assert not os.path.exists(path)
+
+
+def test_damaged_or_missing_snapshot_is_ignored(tmp_path, source):
+    path = str(tmp_path / "catalog.snapshot")
+    assert read_binary_snapshot(path, source) is None
+    with open(path, 'wb') as f:
+        f.write(b'FROGSNAP1\n\xff')
+    assert read_binary_snapshot(path, source) is None
+
+
+def test_store_loads_catalog_from_snapshot(backend, monkeypatch):
+    ProductStore(backend.products_file, backend=backend, write_behind=False).load()
+    assert os.path.exists(backend.products_file + SNAPSHOT_SUFFIX)
+
+    def parse(columns):
+        raise AssertionError("katalog powinien pochodzić z migawki")
+
+    monkeypatch.setattr(backend, 'load_product_columns', parse)
+    store = ProductStore(backend.products_file, backend=backend, write_behind=False)
+    assert store.get(2) == {'id': 2, 'name': 'Chleb', 'price': 4.0, 'stock': 5}
+
+
+def test_store_write_refreshes_snapshot(backend):
+    store = ProductStore(backend.products_file, backend=backend, write_behind=False)
+    store.apply_stock_changes({1: -3})
+    catalog = backend.load_catalog_snapshot()
+    assert catalog is not None and catalog[1].stock == 7
+
+
+def test_catalog_with_text_ids_is_not_snapshotted(backend):
+    store = ProductStore(backend.products_file, backend=backend, write_behind=False)
+    store.add({'id': 'ABC', 'name': 'Tekstowe', 'price': 1.0, 'stock': 1})
+    assert backend.load_catalog_snapshot() is None
+    assert ProductStore(backend.products_file, backend=backend, write_behind=False).get('ABC')['stock'] == 1
+
+
+def test_customer_snapshot_follows_csv(backend):
+    backend.save_customers([{'ID': '201', 'NAME': 'Anna', 'E-MAIL': 'a@x.pl', 'PHONE': '1', 'CREATED': '',
+                             'UPDATED': ''}])
+    assert backend.load_customers()[0]['NAME'] == 'Anna'
+    with open(backend.customer_file, 'a', encoding='utf-8') as f:
+        f.write('202,Piotr,p@x.pl,2,,\n')
+    assert [c['ID'] for c in backend.load_customers()] == ['201', '202']
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from product_management import ProductStore
+
+
+@pytest.fixture
+def store(backend):
+    store = ProductStore(backend.products_file, backend=backend, write_behind=True)
+    store.flush_interval = 3600
+    return store
+
+
+def other_process(store):
+    return ProductStore(store.file_path, backend=store.backend, write_behind=True)
+
+
+def sheet_stock(backend, product_id):
+    return {p['id']: p['stock'] for p in backend.load_products()}[product_id]
+
+
+def test_changes_are_logged_and_replayed_before_flush(store):
+    store.apply_stock_changes({1: -4, 2: 3})
+    assert sheet_stock(store.backend, 1) == 10
+    assert store.pending_changes() == 2
+    other = other_process(store)
+    assert other.get(1)['stock'] == 6
+    assert other.stock(2) == 8
+    store.apply_stock_changes({1: -1})
+    assert other.get(1)['stock'] == 5
+
+
+def test_flush_writes_sheet_and_clears_log(store):
+    store.apply_stock_changes({1: -4})
+    assert store.flush() == 1
+    assert not os.path.exists(store.backend.stock_log_file)
+    assert store.pending_changes() == 0
+    assert sheet_stock(store.backend, 1) == 6
+    assert other_process(store).get(1)['stock'] == 6
+
+
+def test_flush_after_record_limit(store):
+    store.flush_records = 2
+    store.apply_stock_changes({1: -1})
+    assert os.path.exists(store.backend.stock_log_file)
+    store.apply_stock_changes({2: -1})
+    assert not os.path.exists(store.backend.stock_log_file)
+    assert (sheet_stock(store.backend, 1), sheet_stock(store.backend, 2)) == (9, 4)
+
+
+def test_position_from_cleared_log_does_not_skip_new_records(backend):
+    position = backend.append_stock_log([{'id': 1, 'stock': 9}])
+    backend.clear_stock_log()
+    # Nowy dziennik jest dłuższy niż stara pozycja, a system może dać mu ten sam i-węzeł.
+    backend.append_stock_log([{'id': 1, 'stock': 8}, {'id': 2, 'stock': 4}, {'id': 1, 'stock': 7}])
+    records, new_position = backend.read_stock_log(position)
+    assert [r['stock'] for r in records] == [8, 4, 7]
+    assert new_position[0] != position[0]
+    assert backend.read_stock_log(new_position) == ([], new_position)
+
+
+def test_torn_last_record_is_skipped(backend):
+    position = backend.append_stock_log([{'id': 1, 'stock': 9}])
+    with open(backend.stock_log_file, 'ab') as f:
+        f.write(b'{"id": 2, "sto')
+    records, new_position = backend.read_stock_log()
+    assert records == [{'id': 1, 'stock': 9}]
+    assert new_position == position
+
+
+def test_log_without_header_is_still_read(backend):
+    with open(backend.stock_log_file, 'w', encoding='utf-8') as f:
+        f.write('{"id": 1, "stock": 9}\n')
+    records, position = backend.read_stock_log()
+    assert records == [{'id': 1, 'stock': 9}]
+    backend.append_stock_log([{'id': 2, 'stock': 1}])
+    assert backend.read_stock_log(position)[0] == [{'id': 2, 'stock': 1}]
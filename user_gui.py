@@ -1,17 +1,25 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-import csv
 from projekt_customers import login, purchase_products
-from product_management import get_all_products, check_product_availability
+from history import HistoryPager
+from product_management import check_product_availability, search_products
+from gui_tasks import TaskRunner
+from cart import Cart
+from promotions import price_cart
+
+SEARCH_RESULTS = 50
+SEARCH_DELAY_MS = 150
+
 
 def create_user_gui(root):
     """
     Tworzy GUI dla użytkownika z ekranem logowania i panelem głównym.
     """
     root.title("Żabka Online - Panel Użytkownika")
-    root.geometry("500x400")
+    root.geometry("500x560")
     logged_in_user = None
-    cart = []
+    cart = Cart()
+    tasks = TaskRunner(root)
 
     def clear_window():
         """Czyści wszystkie widżety w oknie."""
@@ -22,7 +30,7 @@ def create_user_gui(root):
         """Wyświetla ekran logowania."""
         nonlocal logged_in_user, cart
         logged_in_user = None
-        cart = []
+        cart = Cart()
         clear_window()
         tk.Label(root, text="Logowanie użytkownika", font=("Arial", 14, "bold")).pack(pady=20)
         tk.Label(root, text="E-mail:", font=("Arial", 12)).pack()
@@ -35,14 +43,21 @@ def create_user_gui(root):
             if not email:
                 messagebox.showerror("Błąd", "Proszę podać adres e-mail.")
                 return
-            user = login(email)
-            if user:
-                logged_in_user = user
-                show_main_panel()
-            else:
-                messagebox.showerror("Błąd", "Nie znaleziono użytkownika o podanym e-mailu.")
 
-        tk.Button(root, text="Zaloguj", command=try_login, font=("Arial", 12), width=15).pack(pady=10)
+            def done(user):
+                nonlocal logged_in_user
+                if user:
+                    logged_in_user = user
+                    show_main_panel()
+                else:
+                    messagebox.showerror("Błąd", "Nie znaleziono użytkownika o podanym e-mailu.")
+
+            tasks.submit(login, email, on_success=done,
+                         on_error=lambda e: messagebox.showerror("Błąd", f"Błąd podczas logowania: {e}"),
+                         widgets=[login_button])
+
+        login_button = tk.Button(root, text="Zaloguj", command=try_login, font=("Arial", 12), width=15)
+        login_button.pack(pady=10)
 
     def show_main_panel():
         """Wyświetla główny panel użytkownika po zalogowaniu."""
@@ -50,13 +65,50 @@ def create_user_gui(root):
         tk.Label(root, text=f"Witaj, {logged_in_user['NAME']}!", font=("Arial", 14, "bold")).pack(pady=20)
 
         tk.Label(root, text="Zakupy", font=("Arial", 12, "bold")).pack(pady=10)
-        tk.Label(root, text="Wybierz produkt:", font=("Arial", 10)).pack()
-        products = get_all_products("database/products.xlsx")
-        product_names = [f"{p['name']} (ID: {p['id']}, Cena: {p['price']:.2f}, Dostępne: {p['stock']})" for p in products]
-        product_combobox = ttk.Combobox(root, values=product_names, width=50, state="readonly")
-        product_combobox.pack(pady=5)
-        if products:
-            product_combobox.current(0)
+        tk.Label(root, text="Szukaj produktu (nazwa lub ID):", font=("Arial", 10)).pack()
+        products = []
+        search_entry = tk.Entry(root, width=50)
+        search_entry.pack(pady=5)
+        product_listbox = tk.Listbox(root, width=60, height=6, exportselection=False)
+        product_listbox.pack(pady=5)
+        pending_search = None
+        search_generation = 0
+
+        def show_products(found, generation):
+            nonlocal products
+            if generation != search_generation or not product_listbox.winfo_exists():
+                return
+            products = found
+            product_listbox.delete(0, "end")
+            for p in products:
+                product_listbox.insert("end", f"{p['name']} (ID: {p['id']}, Cena: {p['price']:.2f}, Dostępne: {p['stock']})")
+            if products:
+                product_listbox.selection_set(0)
+            update_quantity_options(None)
+
+        def run_search():
+            nonlocal pending_search, search_generation
+            pending_search = None
+            search_generation += 1
+            generation = search_generation
+            tasks.submit(search_products, "database/products.xlsx", search_entry.get(), SEARCH_RESULTS,
+                         on_success=lambda found: show_products(found, generation),
+                         on_error=lambda e: messagebox.showerror("Błąd", f"Błąd podczas wyszukiwania produktów: {e}"))
+
+        def on_search_key(_):
+            """Wyszukuje po krótkiej przerwie w pisaniu, żeby nie szukać po każdym znaku."""
+            nonlocal pending_search
+            if pending_search is not None:
+                root.after_cancel(pending_search)
+            pending_search = root.after(SEARCH_DELAY_MS, run_search)
+
+        search_entry.bind("<KeyRelease>", on_search_key)
+
+        def selected_product():
+            selection = product_listbox.curselection()
+            if not products or not selection:
+                return None
+            return products[selection[0]]
 
         tk.Label(root, text="Ilość:", font=("Arial", 10)).pack()
         quantity_combobox = ttk.Combobox(root, values=[str(i) for i in range(1, 11)], width=10, state="readonly")
@@ -66,42 +118,51 @@ def create_user_gui(root):
 
         def update_quantity_options(_):
             """Aktualizuje opcje ilości na podstawie wybranego produktu."""
-            if not products or not product_combobox.get():
+            product = selected_product()
+            if product is None:
                 quantity_combobox['values'] = [str(i) for i in range(1, 11)]
                 if quantity_combobox['values']:
                     quantity_combobox.current(0)
                 return
-            selected_index = product_combobox.current()
-            stock = products[selected_index]['stock']
+            stock = product['stock']
             max_quantity = min(stock, 10)  # Maksymalnie 10 sztuk
             quantity_combobox['values'] = [str(i) for i in range(1, max_quantity + 1)]
             if quantity_combobox['values']:
                 quantity_combobox.current(0)
 
-        product_combobox.bind("<<ComboboxSelected>>", update_quantity_options)
+        product_listbox.bind("<<ListboxSelect>>", update_quantity_options)
 
         def add_to_cart():
             """Dodaje wybrany produkt i ilość do koszyka."""
-            nonlocal cart
-            if not products or not product_combobox.get():
+            product = selected_product()
+            if product is None:
                 messagebox.showerror("Błąd", "Proszę wybrać produkt.")
                 return
-            selected_index = product_combobox.current()
-            product = products[selected_index]
             quantity = int(quantity_combobox.get())
-            if not check_product_availability("database/products.xlsx", product['id'], quantity):
-                messagebox.showerror("Błąd", f"Brak wystarczającej ilości produktu {product['name']} (dostępne: {product['stock']}).")
-                return
-            cart.append((product['id'], quantity))
-            messagebox.showinfo("Sukces", f"Dodano {quantity} x {product['name']} do koszyka.")
 
-        tk.Button(root, text="Dodaj do koszyka", command=add_to_cart, font=("Arial", 10), width=15).pack(pady=5)
+            def done(available):
+                if not available:
+                    messagebox.showerror("Błąd", f"Brak wystarczającej ilości produktu {product['name']} (dostępne: {product['stock']}).")
+                    return
+                cart.add(product['id'], quantity, product=product)
+                messagebox.showinfo("Sukces", f"Dodano {quantity} x {product['name']} do koszyka.")
+
+            tasks.submit(check_product_availability, "database/products.xlsx", product['id'], quantity,
+                         on_success=done, widgets=[add_button])
+
+        add_button = tk.Button(root, text="Dodaj do koszyka", command=add_to_cart, font=("Arial", 10), width=15)
+        add_button.pack(pady=5)
 
         tk.Label(root, text="Koszyk i historia", font=("Arial", 12, "bold")).pack(pady=10)
         tk.Button(root, text="Pokaż koszyk", command=show_cart, font=("Arial", 10), width=15).pack(pady=5)
         tk.Button(root, text="Pokaż historię", command=show_history, font=("Arial", 10), width=15).pack(pady=5)
 
         tk.Button(root, text="Wyloguj", command=show_login_screen, font=("Arial", 10), width=15).pack(pady=20)
+        tasks.progress = ttk.Progressbar(root, mode="indeterminate", length=200)
+        tasks.progress.pack(pady=5)
+
+        run_search()
+        search_entry.focus_set()
 
     def show_cart():
         """Wyświetla koszyk z wybranymi produktami i całkowitą ceną."""
@@ -126,38 +187,64 @@ def create_user_gui(root):
         scrollbar_y.pack(side="right", fill="y")
         tree.configure(yscrollcommand=scrollbar_y.set)
 
-        products = get_all_products("database/products.xlsx")
-        total_cart_price = 0.0
-        for product_id, quantity in cart:
-            product = next((p for p in products if p['id'] == product_id), None)
-            if product:
-                price = float(product['price'])
-                total_price = price * quantity
-                total_cart_price += total_price
+        def show_lines(lines):
+            tree.delete(*tree.get_children())
+            for line in lines:
                 tree.insert("", "end", values=(
-                    product['id'],
-                    product['name'],
-                    quantity,
-                    f"{price:.2f}",
-                    f"{total_price:.2f}"
+                    line['id'],
+                    line['name'],
+                    line['quantity'],
+                    f"{line['unit_price']:.2f}",
+                    f"{line['total']:.2f}"
                 ))
 
-        tk.Label(cart_window, text=f"Całkowita cena: {total_cart_price:.2f} PLN", font=("Arial", 12, "bold")).pack(pady=10)
+        def show_priced(priced):
+            nonlocal shown_total
+            if priced is None or not cart_window.winfo_exists():
+                return
+            shown_total = priced['total']
+            show_lines(priced['lines'])
+            promotions_label.configure(text="\n".join(
+                f"{name}: -{amount:.2f} PLN" for name, amount in priced['promotions'].items()))
+            total_label.configure(text=f"Całkowita cena: {priced['total']:.2f} PLN")
+
+        # Do czasu wyceny z aktualnymi cenami (price_cart) widoczne są ceny z chwili dodania do koszyka.
+        shown_total = None
+        show_lines(cart.lines())
+        promotions_label = tk.Label(cart_window, text="", font=("Arial", 10), fg="green")
+        promotions_label.pack()
+        total_label = tk.Label(cart_window, text=f"Całkowita cena: {cart.total:.2f} PLN", font=("Arial", 12, "bold"))
+        total_label.pack(pady=10)
 
         def save_purchase():
-            nonlocal cart
             if not cart:
                 messagebox.showerror("Błąd", "Koszyk jest pusty.")
                 return
-            total_price = purchase_products(cart, logged_in_user)
-            if total_price is not None:
-                messagebox.showinfo("Sukces", f"Zakup zapisany! Całkowita cena: {total_price:.2f} PLN")
-                cart = []  # Wyczyść koszyk
-                cart_window.destroy()
-            else:
-                messagebox.showerror("Błąd", "Nie udało się zapisać zakupu. Sprawdź dostępność produktów lub uprawnienia.")
 
-        tk.Button(cart_window, text="Zapisz zakup", command=save_purchase, font=("Arial", 10), width=15).pack(pady=10)
+            def done(total_price):
+                if total_price is not None:
+                    messagebox.showinfo("Sukces", f"Zakup zapisany! Całkowita cena: {total_price:.2f} PLN")
+                    cart.clear()  # Wyczyść koszyk
+                    if cart_window.winfo_exists():
+                        cart_window.destroy()
+                else:
+                    messagebox.showerror("Błąd", "Nie udało się zapisać zakupu. Ceny lub dostępność produktów mogły się "
+                                                 "zmienić - sprawdź koszyk.")
+                    if cart_window.winfo_exists():
+                        tasks.submit(price_cart, cart.copy(), logged_in_user['ID'], on_success=show_priced)
+
+            if shown_total is None:
+                messagebox.showinfo("Koszyk", "Trwa wycena koszyka z aktualnymi cenami.")
+                return
+            tasks.submit(purchase_products, cart.copy(), logged_in_user, shown_total, on_success=done,
+                         on_error=lambda e: messagebox.showerror("Błąd", f"Błąd podczas zapisu zakupu: {e}"),
+                         widgets=[save_button])
+
+        save_button = tk.Button(cart_window, text="Zapisz zakup", command=save_purchase, font=("Arial", 10), width=15)
+        save_button.pack(pady=10)
+
+        # Wątki robocze dostają kopię koszyka - sam koszyk jest zmieniany tylko w wątku Tk.
+        tasks.submit(price_cart, cart.copy(), logged_in_user['ID'], on_success=show_priced)
 
     def show_history():
         """Wyświetla historię zakupów w osobnym oknie."""
@@ -176,24 +263,47 @@ def create_user_gui(root):
 
         scrollbar_y = ttk.Scrollbar(history_window, orient="vertical", command=tree.yview)
         scrollbar_y.pack(side="right", fill="y")
-        tree.configure(yscrollcommand=scrollbar_y.set)
 
-        history_file = f"database/DATABASE/{logged_in_user['ID']}_history.csv"
-        try:
-            with open(history_file, newline='', encoding='utf-8') as f:
-                next(f, None)  # Pomija nagłówek
-                for row in f:
-                    values = row.strip().split(',')
-                    tree.insert("", "end", values=(values[0], values[1], values[2]))
-        except FileNotFoundError:
-            messagebox.showinfo("Informacja", "Brak historii zakupów.")
-            history_window.destroy()
-        except PermissionError as e:
-            messagebox.showerror("Błąd", f"Brak uprawnień do pliku historii: {e}")
-            history_window.destroy()
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Błąd podczas wczytywania historii: {e}")
-            history_window.destroy()
+        pager = HistoryPager(logged_in_user['ID'])
+        loading = False
+
+        def show_page(page):
+            nonlocal loading
+            loading = False
+            if not history_window.winfo_exists():
+                return
+            for values in page:
+                tree.insert("", "end", values=(values[0], values[1], values[2]))
+            if pager.loaded == 0:
+                failed(FileNotFoundError())
+
+        def failed(error):
+            if isinstance(error, FileNotFoundError):
+                messagebox.showinfo("Informacja", "Brak historii zakupów.")
+            elif isinstance(error, PermissionError):
+                messagebox.showerror("Błąd", f"Brak uprawnień do pliku historii: {error}")
+            else:
+                messagebox.showerror("Błąd", f"Błąd podczas wczytywania historii: {error}")
+            if history_window.winfo_exists():
+                history_window.destroy()
+
+        def load_next_page():
+            tasks.submit(pager.next_page, on_success=show_page, on_error=failed)
+
+        def on_scroll(first, last):
+            """Doczytuje kolejną stronę, gdy użytkownik zbliża się do końca listy."""
+            nonlocal loading
+            scrollbar_y.set(first, last)
+            if float(last) > 0.9 and not pager.exhausted and not loading:
+                loading = True
+                load_next_page()
+
+        tree.configure(yscrollcommand=on_scroll)
+        # Iterator historii jest używany w wątku roboczym, więc zamykamy go tam samo (po zaległych stronach).
+        history_window.bind("<Destroy>", lambda event: tasks.submit(pager.close) if event.widget is history_window else None)
+
+        loading = True
+        load_next_page()
 
     # Uruchom ekran logowania przy starcie
     show_login_screen()
@@ -1,14 +1,179 @@
+import atexit
+import functools
+import json
+import os
+import queue
+import reprlib
+import threading
+import time
 from datetime import datetime
 
+LOG_FILE = "database/log.txt"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+LOG_FLUSH_RECORDS = 256
+LOG_FLUSH_INTERVAL = 1.0
+
+_arg_repr = reprlib.Repr()
+_arg_repr.maxstring = 60
+_arg_repr.maxother = 60
+_STOP = object()
+
+
+class LogSink:
+    """
+    Asynchroniczny zapis dziennika akcji w formacie JSON lines.
+
+    Rekordy trafiają do kolejki, a wątek zapisujący zbiera je w bufor i
+    zapisuje porcjami: po LOG_FLUSH_RECORDS rekordach, po LOG_FLUSH_INTERVAL
+    sekundach lub przy zamknięciu programu. Gdy plik przekroczy max_bytes,
+    jest rotowany (log.txt -> log.txt.1 -> ... -> log.txt.<backups>).
+    """
+
+    def __init__(self, path=LOG_FILE, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS,
+                 flush_records=LOG_FLUSH_RECORDS, flush_interval=LOG_FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def put(self, record):
+        """Dodaje rekord do kolejki (jedyny koszt po stronie wywołującego)."""
+        if self._thread is None:
+            self._start()
+        self._queue.put(record)
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def close(self, timeout=5.0):
+        """Zapisuje zaległe rekordy i zatrzymuje wątek zapisujący."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        with self._start_lock:
+            self._thread = None
+
+    def flush(self, timeout=5.0):
+        """Wymusza zapis buforowanych rekordów i czeka na jego zakończenie."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def _run(self):
+        buffer = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._write(buffer)
+                return
+            if isinstance(item, threading.Event):
+                self._write(buffer)
+                buffer = []
+                item.set()
+                continue
+            if item is not None:
+                buffer.append(item)
+            if len(buffer) >= self.flush_records or time.monotonic() >= deadline:
+                self._write(buffer)
+                buffer = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, records):
+        if not records:
+            return
+        data = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._rotate_if_needed(len(data.encode("utf-8")))
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+        except Exception as e:
+            print(f"Błąd podczas zapisu dziennika: {e}")
+
+    def _rotate_if_needed(self, incoming):
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return
+        if not size or size + incoming <= self.max_bytes:
+            return
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+_sink = LogSink()
+
+
+def _summarize_args(args, kwargs):
+    parts = [_arg_repr.repr(a) for a in args]
+    parts.extend(f"{k}={_arg_repr.repr(v)}" for k, v in kwargs.items())
+    return ", ".join(parts)
+
+
 def log_action(action: str):
+    """
+    Dekorator zapisujący wywołanie funkcji w dzienniku akcji.
+
+    Rekord zawiera czas, akcję, nazwę funkcji, czas wykonania w ms, skrót
+    argumentów i informację o powodzeniu (wraz z błędem, jeśli wystąpił).
+    Zapis odbywa się w tle przez LogSink.
+    """
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            result = func(*args, **kwargs)
-            with open("database/log.txt", "a") as f:
-                f.write(f"{datetime.now()}: {action} - {func.__name__}\n")
-            return result
+            started = time.perf_counter()
+            error = None
+            try:
+                return func(*args, **kwargs)
+            except BaseException as e:
+                # Także KeyboardInterrupt i SystemExit - inaczej przerwane wywołanie zostałoby zapisane jako udane.
+                error = repr(e)
+                raise
+            finally:
+                _sink.put({
+                    "time": datetime.now().isoformat(timespec="milliseconds"),
+                    "action": action,
+                    "function": func.__name__,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "args": _summarize_args(args, kwargs),
+                    "success": error is None,
+                    "error": error,
+                })
         return wrapper
     return decorator
 
 def apply_discount(price: float, discount_rate: float) -> float:
-    return price * (1 - discount_rate)
\ No newline at end of file
+    return price * (1 - discount_rate)
+
+
+def normalize_id(value):
+    """Sprowadza ID produktu do liczby całkowitej, jeśli to możliwe."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value